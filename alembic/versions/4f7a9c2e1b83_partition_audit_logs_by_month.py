@@ -0,0 +1,129 @@
+"""partition_audit_logs_by_month
+
+Revision ID: 4f7a9c2e1b83
+Revises: b31692dd6c74
+Create Date: 2026-10-18 10:12:41.508317
+
+"""
+from datetime import datetime, UTC
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f7a9c2e1b83'
+down_revision: Union[str, Sequence[str], None] = 'b31692dd6c74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly partitions created ahead of the current month; afterwards the
+# maintain_audit_log_partitions Celery beat task keeps this window filled.
+MONTHS_AHEAD = 3
+
+AUDIT_LOG_INDEXES = {
+    'idx_audit_logs_user_id': 'user_id',
+    'idx_audit_logs_category': 'category',
+    'idx_audit_logs_created_at': 'created_at',
+    'idx_audit_logs_table_name': 'table_name',
+    'idx_audit_logs_record_id': 'record_id',
+    'idx_audit_logs_ip_address': 'ip_address',
+}
+
+AUDIT_LOG_COLUMNS = "id, user_id, category, action_details, table_name, record_id, ip_address, user_agent, created_at"
+
+
+def _add_months(year: int, month: int, months: int) -> tuple:
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # Keep the old table (and its id sequence) around until the data is copied
+    for index_name in AUDIT_LOG_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legacy")
+    op.execute("ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey")
+
+    # The partition key has to be part of the primary key
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'::regclass),
+            user_id INTEGER REFERENCES users (id),
+            category VARCHAR(100) NOT NULL,
+            action_details VARCHAR(500),
+            table_name VARCHAR(100) NOT NULL,
+            record_id INTEGER,
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(500),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+
+    # One partition per month from the oldest row to MONTHS_AHEAD past the current month
+    now = datetime.now(UTC)
+    oldest = bind.execute(sa.text("SELECT MIN(created_at) FROM audit_logs_legacy")).scalar() or now
+    year, month = oldest.year, oldest.month
+    last_year, last_month = _add_months(now.year, now.month, MONTHS_AHEAD)
+    while (year, month) <= (last_year, last_month):
+        next_year, next_month = _add_months(year, month, 1)
+        op.execute(
+            f"CREATE TABLE audit_logs_y{year:04d}m{month:02d} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{year:04d}-{month:02d}-01') TO ('{next_year:04d}-{next_month:02d}-01')"
+        )
+        year, month = next_year, next_month
+
+    # Catches rows outside the pre-created window instead of failing the insert
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    for index_name, column in AUDIT_LOG_INDEXES.items():
+        op.execute(f"CREATE INDEX {index_name} ON audit_logs ({column})")
+
+    op.execute(f"""
+        INSERT INTO audit_logs ({AUDIT_LOG_COLUMNS})
+        SELECT id, user_id, category, action_details, table_name, record_id, ip_address, user_agent,
+               COALESCE(created_at, now() AT TIME ZONE 'utc')
+        FROM audit_logs_legacy
+    """)
+
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute("DROP TABLE audit_logs_legacy")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for index_name in AUDIT_LOG_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'::regclass),
+            user_id INTEGER REFERENCES users (id),
+            category VARCHAR(100) NOT NULL,
+            action_details VARCHAR(500),
+            table_name VARCHAR(100) NOT NULL,
+            record_id INTEGER,
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(500),
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"""
+        INSERT INTO audit_logs ({AUDIT_LOG_COLUMNS})
+        SELECT {AUDIT_LOG_COLUMNS} FROM audit_logs_partitioned
+    """)
+
+    for index_name, column in AUDIT_LOG_INDEXES.items():
+        op.execute(f"CREATE INDEX {index_name} ON audit_logs ({column})")
+
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    # Dropping the parent drops every attached partition
+    op.execute("DROP TABLE audit_logs_partitioned")
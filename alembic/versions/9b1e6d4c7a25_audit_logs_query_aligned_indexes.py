@@ -0,0 +1,53 @@
+"""audit_logs_query_aligned_indexes
+
+Revision ID: 9b1e6d4c7a25
+Revises: 4f7a9c2e1b83
+Create Date: 2026-10-18 11:03:27.114902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1e6d4c7a25'
+down_revision: Union[str, Sequence[str], None] = '4f7a9c2e1b83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Single-column indexes that no audit log query filters or sorts on by themselves
+LEGACY_INDEXES = {
+    'idx_audit_logs_user_id': ['user_id'],
+    'idx_audit_logs_category': ['category'],
+    'idx_audit_logs_created_at': ['created_at'],
+    'idx_audit_logs_table_name': ['table_name'],
+    'idx_audit_logs_record_id': ['record_id'],
+    'idx_audit_logs_ip_address': ['ip_address'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for index_name in LEGACY_INDEXES:
+        op.drop_index(index_name, table_name='audit_logs')
+
+    # Category / user filters, newest first, with id as the keyset tie-breaker
+    op.create_index('idx_audit_logs_category_created_at', 'audit_logs', ['category', 'created_at', 'id'])
+    op.create_index('idx_audit_logs_user_id_created_at', 'audit_logs', ['user_id', 'created_at', 'id'])
+    # Unfiltered and user-type listings need ordered access for keyset pagination
+    op.create_index('idx_audit_logs_created_at_id', 'audit_logs', ['created_at', 'id'])
+    # Date range scans; a few pages per partition and almost free to maintain on append-only data
+    op.create_index('idx_audit_logs_created_at_brin', 'audit_logs', ['created_at'], postgresql_using='brin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_audit_logs_created_at_brin', table_name='audit_logs')
+    op.drop_index('idx_audit_logs_created_at_id', table_name='audit_logs')
+    op.drop_index('idx_audit_logs_user_id_created_at', table_name='audit_logs')
+    op.drop_index('idx_audit_logs_category_created_at', table_name='audit_logs')
+
+    for index_name, columns in LEGACY_INDEXES.items():
+        op.create_index(index_name, 'audit_logs', columns)
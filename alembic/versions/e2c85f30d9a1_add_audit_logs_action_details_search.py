@@ -0,0 +1,43 @@
+"""add_audit_logs_action_details_search
+
+Revision ID: e2c85f30d9a1
+Revises: 9b1e6d4c7a25
+Create Date: 2026-10-18 11:48:09.635120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c85f30d9a1'
+down_revision: Union[str, Sequence[str], None] = '9b1e6d4c7a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 'simple' keeps emails, group ids and file ids as whole tokens (no stemming or stop words).
+    # Adding a stored generated column rewrites every partition once.
+    op.add_column('audit_logs', sa.Column(
+        'action_details_tsv',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('simple', coalesce(action_details, ''))", persisted=True),
+        nullable=True
+    ))
+    op.create_index(
+        'idx_audit_logs_action_details_tsv',
+        'audit_logs',
+        ['action_details_tsv'],
+        postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_audit_logs_action_details_tsv', table_name='audit_logs')
+    op.drop_column('audit_logs', 'action_details_tsv')
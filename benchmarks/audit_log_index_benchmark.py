@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Audit log index benchmark
+
+Compares the legacy audit_logs index set (six single-column B-trees) with the
+query-aligned set (composite category/user B-trees, a (created_at, id) B-tree and
+BRIN on created_at). Both variants are built in a scratch schema, filled with the
+same synthetic rows in bulk batches like the audit log writer, and then queried
+with the filters used by /admin/audit-logs and /auth/me/audit-logs.
+
+Run it against a disposable database, never production:
+
+Usage:
+    python benchmarks/audit_log_index_benchmark.py --database-url postgresql://... --rows 200000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+SCHEMA = "audit_index_benchmark"
+
+CATEGORIES = [
+    "authentication", "user_management", "data_access", "data_modification",
+    "document_processing", "system_admin", "security_event", "compliance"
+]
+
+INDEX_SETS = {
+    "legacy": [
+        "CREATE INDEX ON {table} (user_id)",
+        "CREATE INDEX ON {table} (category)",
+        "CREATE INDEX ON {table} (created_at)",
+        "CREATE INDEX ON {table} (table_name)",
+        "CREATE INDEX ON {table} (record_id)",
+        "CREATE INDEX ON {table} (ip_address)",
+    ],
+    "query_aligned": [
+        "CREATE INDEX ON {table} (category, created_at, id)",
+        "CREATE INDEX ON {table} (user_id, created_at, id)",
+        "CREATE INDEX ON {table} (created_at, id)",
+        "CREATE INDEX ON {table} USING brin (created_at)",
+    ],
+}
+
+# Same shapes as DatabaseService._query_audit_logs produces
+QUERIES = {
+    "latest_page": "SELECT * FROM {table} ORDER BY created_at DESC, id DESC LIMIT 100",
+    "category_page": (
+        "SELECT * FROM {table} WHERE category = :category "
+        "ORDER BY created_at DESC, id DESC LIMIT 100"
+    ),
+    "user_page": (
+        "SELECT * FROM {table} WHERE user_id = :user_id "
+        "ORDER BY created_at DESC, id DESC LIMIT 100"
+    ),
+    "category_last_7d": (
+        "SELECT * FROM {table} WHERE category = :category AND created_at >= :since "
+        "ORDER BY created_at DESC, id DESC LIMIT 100"
+    ),
+    "date_range_count_30d": "SELECT count(*) FROM {table} WHERE created_at >= :since_30d",
+    "keyset_deep_page": (
+        "SELECT * FROM {table} WHERE created_at <= :cursor_at AND (created_at, id) < (:cursor_at, :cursor_id) "
+        "ORDER BY created_at DESC, id DESC LIMIT 100"
+    ),
+}
+
+
+def generate_rows(count: int, users: int, days: int, seed: int) -> list:
+    """Synthetic audit events spread over the last `days` days, oldest first"""
+    rng = random.Random(seed)
+    start = datetime.utcnow() - timedelta(days=days)
+    step = timedelta(days=days) / count
+    rows = []
+    for i in range(count):
+        category = rng.choice(CATEGORIES)
+        rows.append({
+            "user_id": rng.randint(1, users) if rng.random() > 0.05 else None,
+            "category": category,
+            "action_details": f"Synthetic {category} event {i}",
+            "table_name": rng.choice(["users", "document_uploads", "templates", "system"]),
+            "record_id": rng.randint(1, 100000),
+            "ip_address": f"10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            "user_agent": "audit-index-benchmark/1.0",
+            "created_at": start + step * i,
+        })
+    return rows
+
+
+def create_table(conn, variant: str) -> str:
+    table = f"{SCHEMA}.audit_logs_{variant}"
+    conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    conn.execute(text(f"""
+        CREATE TABLE {table} (
+            id SERIAL,
+            user_id INTEGER,
+            category VARCHAR(100) NOT NULL,
+            action_details VARCHAR(500),
+            table_name VARCHAR(100) NOT NULL,
+            record_id INTEGER,
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(500),
+            created_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (id, created_at)
+        )
+    """))
+    for statement in INDEX_SETS[variant]:
+        conn.execute(text(statement.format(table=table)))
+    return table
+
+
+def benchmark_inserts(engine, table: str, rows: list, batch_size: int) -> dict:
+    insert_sql = text(f"""
+        INSERT INTO {table} (user_id, category, action_details, table_name, record_id, ip_address, user_agent, created_at)
+        VALUES (:user_id, :category, :action_details, :table_name, :record_id, :ip_address, :user_agent, :created_at)
+    """)
+    batch_times = []
+    started = time.perf_counter()
+    for offset in range(0, len(rows), batch_size):
+        batch_started = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(insert_sql, rows[offset:offset + batch_size])
+        batch_times.append(time.perf_counter() - batch_started)
+    elapsed = time.perf_counter() - started
+
+    with engine.begin() as conn:
+        conn.execute(text(f"ANALYZE {table}"))
+        index_bytes = conn.execute(text(f"SELECT pg_indexes_size('{table}')")).scalar()
+
+    return {
+        "rows": len(rows),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(len(rows) / elapsed, 1),
+        "batch_p50_ms": round(statistics.median(batch_times) * 1000, 2),
+        "batch_p95_ms": round(percentile(batch_times, 95) * 1000, 2),
+        "index_size_mb": round(index_bytes / (1024 * 1024), 2),
+    }
+
+
+def benchmark_queries(engine, table: str, params: dict, repeats: int) -> dict:
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            statement = text(sql.format(table=table))
+            # Warm the cache once so both variants are measured hot
+            conn.execute(statement, params).fetchall()
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                conn.execute(statement, params).fetchall()
+                timings.append(time.perf_counter() - started)
+            results[name] = {
+                "p50_ms": round(statistics.median(timings) * 1000, 3),
+                "p95_ms": round(percentile(timings, 95) * 1000, 3),
+            }
+    return results
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark audit_logs index strategies")
+    parser.add_argument("--database-url", default=os.environ.get("BENCHMARK_DATABASE_URL"),
+                        help="Disposable PostgreSQL database (default: $BENCHMARK_DATABASE_URL)")
+    parser.add_argument("--rows", type=int, default=200000, help="Rows inserted per variant")
+    parser.add_argument("--users", type=int, default=200, help="Distinct user ids")
+    parser.add_argument("--days", type=int, default=180, help="Time span covered by the rows")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per bulk insert")
+    parser.add_argument("--repeats", type=int, default=50, help="Runs per query")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema afterwards")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or BENCHMARK_DATABASE_URL is required")
+
+    engine = create_engine(args.database_url)
+    rows = generate_rows(args.rows, args.users, args.days, args.seed)
+    newest = rows[-1]["created_at"]
+    params = {
+        "category": "data_access",
+        "user_id": 7,
+        "since": newest - timedelta(days=7),
+        "since_30d": newest - timedelta(days=30),
+        # Cursor roughly half way through the table
+        "cursor_at": rows[len(rows) // 2]["created_at"],
+        "cursor_id": len(rows) // 2,
+    }
+
+    report = {"rows": args.rows, "batch_size": args.batch_size, "variants": {}}
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}"))
+
+        for variant in INDEX_SETS:
+            with engine.begin() as conn:
+                table = create_table(conn, variant)
+            print(f"[{variant}] inserting {args.rows} rows...")
+            inserts = benchmark_inserts(engine, table, rows, args.batch_size)
+            print(f"[{variant}] querying...")
+            queries = benchmark_queries(engine, table, params, args.repeats)
+            report["variants"][variant] = {"inserts": inserts, "queries": queries}
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+    print()
+    print(f"{'metric':<32}" + "".join(f"{variant:>18}" for variant in INDEX_SETS))
+    for metric in ("rows_per_second", "batch_p95_ms", "index_size_mb"):
+        print(f"{'insert ' + metric:<32}" + "".join(
+            f"{report['variants'][variant]['inserts'][metric]:>18}" for variant in INDEX_SETS
+        ))
+    for query in QUERIES:
+        print(f"{query + ' p50_ms':<32}" + "".join(
+            f"{report['variants'][variant]['queries'][query]['p50_ms']:>18}" for variant in INDEX_SETS
+        ))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
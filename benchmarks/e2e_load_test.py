@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test: analyze -> Celery pipeline -> generate
+
+Drives document groups through the real API and worker on one box and reports
+throughput, queue wait and p50/p95/p99 per endpoint for a mix of group sizes.
+
+With --spawn it starts local stand-ins and the application itself:
+  - moto's S3 server (pip install "moto[server]"), or use --s3-endpoint for MinIO
+  - benchmarks/fake_model_servers.py for Mistral OCR and OpenAI, with configurable latency
+  - uvicorn main:app and celery_worker.py, pointed at the stand-ins through
+    AWS_ENDPOINT_URL, MISTRAL_SERVER_URL and OPENAI_BASE_URL
+Redis and Postgres are taken from the environment (REDIS_URL, CELERY_BROKER_URL,
+POSTGRESQL_DB) and must be local, migrated (alembic upgrade head) and hold the test user.
+Without --spawn it only drives an already running deployment.
+
+Queue wait is the time from the analyze response to the worker's first
+"processing_documents" status, as seen through /agent/stream-status (which polls once per
+second, so queue wait has about one second of resolution).
+
+Usage:
+    python benchmarks/e2e_load_test.py --spawn --email load@test.com --password secret \\
+        --groups 40 --concurrency 8 --mix 1:0.5,3:0.3,8:0.2 --template-id 1 \\
+        --upload-template templates/purewick.pdf=pdf_templates/Purewick_Resupply_Agreement_OHS.pdf
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import signal
+import argparse
+import threading
+import subprocess
+import statistics
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PDF = os.path.join(ROOT_PATH, "ABN - Medicare Intake Form (1).pdf")
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pick(pct):
+        return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+    return {
+        "count": len(ordered),
+        "p50_s": round(statistics.median(ordered), 3),
+        "p95_s": round(pick(95), 3),
+        "p99_s": round(pick(99), 3),
+        "max_s": round(ordered[-1], 3),
+    }
+
+
+def parse_mix(value: str) -> list:
+    """"1:0.5,3:0.3,8:0.2" -> [(1, 0.5), (3, 0.3), (8, 0.2)]"""
+    mix = []
+    for part in value.split(","):
+        size, _, weight = part.partition(":")
+        size = int(size)
+        if not 1 <= size <= 8:
+            raise argparse.ArgumentTypeError("group sizes must be between 1 and 8 documents")
+        mix.append((size, float(weight or 1)))
+    return mix
+
+
+class ApiClient:
+    def __init__(self, base_url: str, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = None
+
+    def _request(self, method: str, path: str, body: bytes = None, content_type: str = None, timeout: float = None):
+        headers = {}
+        if content_type:
+            headers["Content-Type"] = content_type
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(f"{self.base_url}{path}", data=body, headers=headers, method=method)
+        return urllib.request.urlopen(request, timeout=timeout or self.timeout)
+
+    def call_json(self, method: str, path: str, payload=None, body: bytes = None, content_type: str = "application/json") -> tuple:
+        """Return (latency_seconds, status_code, parsed_body)"""
+        if payload is not None:
+            body = json.dumps(payload).encode()
+        started = time.perf_counter()
+        try:
+            with self._request(method, path, body, content_type) as response:
+                data = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            data, status = e.read(), e.code
+        except Exception as e:
+            return time.perf_counter() - started, 0, {"error": str(e)}
+        latency = time.perf_counter() - started
+        try:
+            return latency, status, json.loads(data or b"null")
+        except ValueError:
+            return latency, status, None
+
+    def login(self, email: str, password: str) -> None:
+        _, status, body = self.call_json("POST", "/auth/login", {"email": email, "password": password})
+        if status != 200:
+            raise SystemExit(f"Login failed ({status}): {body}")
+        self.token = body["access_token"]
+
+    def stream_status(self, task_id: str, timeout: float):
+        """Yield (seconds_since_call, status) for each status event until completed or failed"""
+        started = time.perf_counter()
+        with self._request("GET", f"/agent/stream-status/{task_id}", timeout=timeout) as response:
+            for raw in response:
+                line = raw.decode().strip()
+                if not line.startswith("data:"):
+                    continue
+                status = json.loads(line[5:])
+                yield time.perf_counter() - started, status
+                if status.get("error") or status.get("stage") in ("completed", "failed"):
+                    return
+
+
+def multipart_body(pdf_bytes: bytes, count: int) -> tuple:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for i in range(count):
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"files\"; filename=\"load_test_{i + 1}.pdf\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n".encode() + pdf_bytes + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def run_group(client: ApiClient, pdf_bytes: bytes, size: int, template_ids: list, group_timeout: float) -> dict:
+    result = {"group_size": size, "ok": False}
+    body, content_type = multipart_body(pdf_bytes, size)
+    group_started = time.perf_counter()
+
+    latency, status, response = client.call_json("POST", "/agent/analyze-document", body=body, content_type=content_type)
+    result["analyze_seconds"] = latency
+    if status != 200:
+        result["error"] = f"analyze {status}: {response}"
+        return result
+    group_id = response["group_id"]
+
+    final = {}
+    try:
+        for elapsed, event in client.stream_status(response["task_id"], group_timeout):
+            if event.get("stage") not in (None, "starting") and "queue_wait_seconds" not in result:
+                result["queue_wait_seconds"] = elapsed
+            final = event
+    except Exception as e:
+        result["error"] = f"stream: {e}"
+        return result
+
+    result["processing_seconds"] = time.perf_counter() - group_started - latency
+    if final.get("stage") != "completed":
+        result["error"] = f"pipeline: {final.get('message') or final.get('error')}"
+        return result
+
+    if template_ids:
+        latency, status, response = client.call_json(
+            "POST", "/templates/generate-document/", {"group_id": group_id, "template_ids": template_ids}
+        )
+        result["generate_seconds"] = latency
+        if status != 200:
+            result["error"] = f"generate {status}: {response}"
+            return result
+
+    result["end_to_end_seconds"] = time.perf_counter() - group_started
+    result["ok"] = True
+    return result
+
+
+def wait_for(url: str, timeout: float, name: str) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except urllib.error.HTTPError:
+            return  # Listening, even if this path is not served
+        except Exception:
+            time.sleep(0.5)
+    raise SystemExit(f"{name} did not come up at {url} within {timeout}s")
+
+
+def spawn_stack(args) -> list:
+    """Start S3 and model stand-ins plus the API and worker; returns the processes"""
+    processes = []
+    log_dir = os.path.join(ROOT_PATH, "benchmarks", "results", "e2e_logs")
+    os.makedirs(log_dir, exist_ok=True)
+
+    def start(name, command, env=None):
+        log = open(os.path.join(log_dir, f"{name}.log"), "w")
+        processes.append(subprocess.Popen(command, cwd=ROOT_PATH, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True))
+
+    s3_endpoint = args.s3_endpoint
+    if not s3_endpoint:
+        start("s3", ["moto_server", "-H", "127.0.0.1", "-p", str(args.s3_port)])
+        s3_endpoint = f"http://127.0.0.1:{args.s3_port}"
+    wait_for(s3_endpoint, 30, "S3 stand-in")
+
+    start("models", [
+        sys.executable, "benchmarks/fake_model_servers.py", "--port", str(args.model_port),
+        "--ocr-seconds-per-page", str(args.ocr_seconds_per_page), "--llm-seconds", str(args.llm_seconds),
+        "--jitter", str(args.jitter), "--error-rate", str(args.model_error_rate),
+    ])
+    model_url = f"http://127.0.0.1:{args.model_port}"
+    wait_for(model_url, 30, "fake model servers")
+
+    env = dict(os.environ)
+    env.update({
+        "AWS_ENDPOINT_URL": s3_endpoint,
+        "AWS_ACCESS_KEY_ID": env.get("AWS_ACCESS_KEY_ID") or "testing",
+        "AWS_SECRET_ACCESS_KEY": env.get("AWS_SECRET_ACCESS_KEY") or "testing",
+        "AWS_REGION": env.get("AWS_REGION") or "us-east-1",
+        "AWS_BUCKET_NAME": args.bucket,
+        "MISTRAL_SERVER_URL": model_url,
+        "MISTRAL_API_KEY": "load-test",
+        "OPENAI_BASE_URL": f"{model_url}/v1",
+        "OPENAI_API_KEY": "load-test",
+    })
+
+    import boto3
+    s3 = boto3.client("s3", endpoint_url=s3_endpoint, aws_access_key_id=env["AWS_ACCESS_KEY_ID"],
+                      aws_secret_access_key=env["AWS_SECRET_ACCESS_KEY"], region_name=env["AWS_REGION"])
+    try:
+        s3.create_bucket(Bucket=args.bucket)
+    except s3.exceptions.BucketAlreadyOwnedByYou:
+        pass
+    for mapping in args.upload_template:
+        key, _, path = mapping.partition("=")
+        s3.upload_file(os.path.join(ROOT_PATH, path), args.bucket, key)
+
+    start("api", [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.api_port), "--workers", str(args.api_workers)], env)
+    start("worker", [sys.executable, "celery_worker.py"], env)
+    wait_for(f"http://127.0.0.1:{args.api_port}/health", 60, "API")
+    print(f"Stack started; logs in {log_dir}", flush=True)
+    return processes
+
+
+def stop_stack(processes: list) -> None:
+    for process in reversed(processes):
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    for process in processes:
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+def summarize(results: list, elapsed: float) -> dict:
+    ok = [r for r in results if r["ok"]]
+    documents = sum(r["group_size"] for r in ok)
+
+    def stats(key, rows):
+        return percentiles([r[key] for r in rows if key in r])
+
+    by_size = {}
+    for size in sorted({r["group_size"] for r in results}):
+        rows = [r for r in results if r["group_size"] == size]
+        by_size[str(size)] = {
+            "groups": len(rows),
+            "failed": sum(1 for r in rows if not r["ok"]),
+            "queue_wait": stats("queue_wait_seconds", rows),
+            "processing": stats("processing_seconds", rows),
+            "end_to_end": stats("end_to_end_seconds", rows),
+        }
+
+    return {
+        "elapsed_seconds": round(elapsed, 1),
+        "groups": len(results),
+        "groups_failed": len(results) - len(ok),
+        "throughput": {
+            "groups_per_minute": round(len(ok) / elapsed * 60, 2),
+            "documents_per_minute": round(documents / elapsed * 60, 2),
+        },
+        "endpoints": {
+            "POST /agent/analyze-document": stats("analyze_seconds", results),
+            "POST /templates/generate-document/": stats("generate_seconds", results),
+        },
+        "queue_wait": stats("queue_wait_seconds", results),
+        "processing": stats("processing_seconds", results),
+        "end_to_end": stats("end_to_end_seconds", ok),
+        "by_group_size": by_size,
+        "errors": sorted({r["error"] for r in results if "error" in r})[:20],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test of analyze -> Celery -> generate")
+    parser.add_argument("--base-url", help="API to drive (default: the spawned API)")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--groups", type=int, default=20, help="Document groups to submit")
+    parser.add_argument("--concurrency", type=int, default=4, help="Groups in flight at once")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("1:0.5,3:0.3,8:0.2"), help="size:weight,... group size mix")
+    parser.add_argument("--pdf", default=DEFAULT_PDF, help="PDF uploaded for every document")
+    parser.add_argument("--template-id", type=int, action="append", default=[], help="Template to generate per group (repeatable)")
+    parser.add_argument("--group-timeout", type=float, default=1800, help="Seconds to wait for a group to finish")
+    parser.add_argument("--request-timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+
+    spawn = parser.add_argument_group("local stack (--spawn)")
+    spawn.add_argument("--spawn", action="store_true", help="Start S3 and model stand-ins, the API and the worker")
+    spawn.add_argument("--s3-endpoint", help="Existing S3-compatible endpoint (e.g. MinIO) instead of starting moto")
+    spawn.add_argument("--s3-port", type=int, default=5000)
+    spawn.add_argument("--bucket", default="parachute-load-test")
+    spawn.add_argument("--upload-template", action="append", default=[], metavar="S3_KEY=PATH", help="Template PDF to put in the bucket")
+    spawn.add_argument("--model-port", type=int, default=8100)
+    spawn.add_argument("--ocr-seconds-per-page", type=float, default=1.0)
+    spawn.add_argument("--llm-seconds", type=float, default=15.0)
+    spawn.add_argument("--jitter", type=float, default=0.3)
+    spawn.add_argument("--model-error-rate", type=float, default=0.0)
+    spawn.add_argument("--api-port", type=int, default=8000)
+    spawn.add_argument("--api-workers", type=int, default=1)
+    args = parser.parse_args()
+
+    processes = spawn_stack(args) if args.spawn else []
+    try:
+        client = ApiClient(args.base_url or f"http://127.0.0.1:{args.api_port}", args.request_timeout)
+        client.login(args.email, args.password)
+        with open(args.pdf, "rb") as f:
+            pdf_bytes = f.read()
+
+        rng = random.Random(args.seed)
+        sizes = rng.choices([size for size, _ in args.mix], weights=[weight for _, weight in args.mix], k=args.groups)
+
+        results = []
+        lock = threading.Lock()
+
+        def submit(size):
+            result = run_group(client, pdf_bytes, size, args.template_id, args.group_timeout)
+            with lock:
+                results.append(result)
+                done = len(results)
+            state = "ok" if result["ok"] else f"FAILED ({result.get('error')})"
+            print(f"[{done}/{args.groups}] group of {size}: {result.get('end_to_end_seconds', 0):.1f}s {state}", flush=True)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(submit, sizes))
+        report = summarize(results, time.perf_counter() - started)
+        report["config"] = {
+            "groups": args.groups, "concurrency": args.concurrency, "mix": args.mix,
+            "ocr_seconds_per_page": args.ocr_seconds_per_page, "llm_seconds": args.llm_seconds,
+        }
+    finally:
+        stop_stack(processes)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Fake Mistral OCR and OpenAI servers for load tests
+
+Serves the two model APIs the pipeline calls, with configurable latency, so the full
+analyze -> Celery -> generate flow can run offline:
+
+    POST /v1/ocr               Mistral OCR (point MISTRAL_SERVER_URL here)
+    POST /v1/chat/completions  OpenAI chat completions (point OPENAI_BASE_URL at .../v1)
+
+OCR latency is per page (pages are counted in the uploaded PDF); completion latency is
+fixed per call. Both get uniform jitter. The extraction returned is the realistic
+`results` payload from pdf.py.
+
+Usage:
+    python benchmarks/fake_model_servers.py --port 8100 --ocr-seconds-per-page 1.5 --llm-seconds 20
+"""
+
+import os
+import re
+import ast
+import json
+import time
+import base64
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_extraction_payload() -> str:
+    """The `results` dict literal from pdf.py, read without importing PyMuPDF"""
+    with open(os.path.join(ROOT_PATH, "pdf.py")) as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "results" for t in node.targets):
+            return json.dumps(ast.literal_eval(node.value))
+    return json.dumps({"patient_information": {}})
+
+
+def count_pdf_pages(document_url: str) -> int:
+    if not document_url.startswith("data:application/pdf;base64,"):
+        return 1
+    pdf = base64.b64decode(document_url.split(",", 1)[1])
+    return max(1, len(re.findall(rb"/Type\s*/Page(?!s)", pdf)))
+
+
+def make_handler(args, extraction: str):
+    def delay(seconds: float) -> None:
+        time.sleep(max(0.0, seconds * random.uniform(1 - args.jitter, 1 + args.jitter)))
+
+    class ModelHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, payload: dict, status: int = 200) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if random.random() < args.error_rate:
+                self._send_json({"error": {"message": "Injected failure", "type": "server_error"}}, 500)
+                return
+
+            if self.path.endswith("/ocr"):
+                pages = count_pdf_pages(request.get("document", {}).get("document_url", ""))
+                delay(args.ocr_seconds_per_page * pages)
+                self._send_json({
+                    "model": request.get("model", "mistral-ocr-latest"),
+                    "pages": [
+                        {
+                            "index": i,
+                            "markdown": f"# Page {i + 1}\n\nPatient: Jane Doe\nDOB: 01/01/1950\nICD-10: E11.9\nHCPCS: A4239\n",
+                            "images": [],
+                            "dimensions": {"dpi": 200, "height": 2200, "width": 1700}
+                        }
+                        for i in range(pages)
+                    ],
+                    "usage_info": {"pages_processed": pages, "doc_size_bytes": None}
+                })
+            elif self.path.endswith("/chat/completions"):
+                delay(args.llm_seconds)
+                prompt_chars = sum(len(str(m.get("content", ""))) for m in request.get("messages", []))
+                self._send_json({
+                    "id": f"chatcmpl-{random.getrandbits(64):x}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "gpt-4.1"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": extraction}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(extraction) // 4, "total_tokens": (prompt_chars + len(extraction)) // 4}
+                })
+            else:
+                self._send_json({"error": {"message": f"Unknown path {self.path}"}}, 404)
+
+        def log_message(self, format, *args):
+            return
+
+    return ModelHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Mistral OCR and OpenAI servers with configurable latency")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ocr-seconds-per-page", type=float, default=1.0)
+    parser.add_argument("--llm-seconds", type=float, default=15.0)
+    parser.add_argument("--jitter", type=float, default=0.3, help="Uniform latency jitter as a fraction (0.3 = +/-30%%)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with HTTP 500")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args, load_extraction_payload()))
+    print(f"Fake model servers listening on http://{args.host}:{args.port} (OCR {args.ocr_seconds_per_page}s/page, LLM {args.llm_seconds}s)", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Import-time and cold-start profile
+
+Imports an entry point in a fresh interpreter with `python -X importtime` and reports
+the wall time to import it plus the slowest top-level packages (cumulative, so a
+package's figure includes everything it imported). Run it before and after moving an
+import to see what a deploy or autoscaled worker actually pays at startup.
+
+Usage:
+    python benchmarks/import_profile.py                      # main and celery_worker
+    python benchmarks/import_profile.py --module main --top 30
+    python benchmarks/import_profile.py --runs 5 --output import_profile.json
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def profile_import(module: str) -> dict:
+    """Import a module in a child interpreter and parse its -X importtime output"""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - started)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_PATH, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        error_lines = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"Importing {module} failed:\n" + "\n".join(error_lines[-20:]))
+
+    packages = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, name = match.groups()
+        top_level = name.split(".")[0]
+        entry = packages.setdefault(top_level, {"self_ms": 0.0, "cumulative_ms": 0.0, "modules": 0})
+        entry["self_ms"] += int(self_us) / 1000
+        entry["modules"] += 1
+        # Only the outermost import of a package counts towards its cumulative time
+        if name == top_level:
+            entry["cumulative_ms"] = max(entry["cumulative_ms"], int(cumulative_us) / 1000)
+
+    return {"wall_seconds": float(result.stdout.strip().splitlines()[-1]), "packages": packages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Break down the import time of the API and worker entry points")
+    parser.add_argument("--module", action="append", help="Module to import (repeatable, default: main and celery_worker)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module; the median wall time is reported")
+    parser.add_argument("--top", type=int, default=20, help="Number of packages to list")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    report = {}
+    for module in args.module or ["main", "celery_worker"]:
+        runs = [profile_import(module) for _ in range(args.runs)]
+        # Package breakdown from the run closest to the median
+        wall_times = [run["wall_seconds"] for run in runs]
+        median = statistics.median(wall_times)
+        representative = min(runs, key=lambda run: abs(run["wall_seconds"] - median))
+        top = sorted(
+            representative["packages"].items(), key=lambda item: item[1]["cumulative_ms"], reverse=True
+        )[:args.top]
+
+        report[module] = {
+            "wall_seconds_median": round(median, 3),
+            "wall_seconds_runs": [round(t, 3) for t in wall_times],
+            "modules_imported": sum(p["modules"] for p in representative["packages"].values()),
+            "top_packages": [
+                {"package": name, "cumulative_ms": round(p["cumulative_ms"], 1), "self_ms": round(p["self_ms"], 1), "modules": p["modules"]}
+                for name, p in top
+            ],
+        }
+
+        print(f"\n{module}: {median:.3f}s median over {args.runs} runs, {report[module]['modules_imported']} modules")
+        print(f"  {'package':<28}{'cumulative ms':>15}{'self ms':>12}{'modules':>9}")
+        for entry in report[module]["top_packages"]:
+            print(f"  {entry['package']:<28}{entry['cumulative_ms']:>15.1f}{entry['self_ms']:>12.1f}{entry['modules']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
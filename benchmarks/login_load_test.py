@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Login burst load test
+
+Fires a burst of concurrent POST /auth/login requests (shift-start pattern) while a
+probe keeps calling a non-auth endpoint at a fixed rate, then reports p50/p95/p99 for
+both. With bcrypt on the event loop the probe latency tracks the login latency; with
+bcrypt on the password hashing pool the probe stays flat.
+
+Uses only the standard library so it can run from any machine that reaches the API.
+
+Usage:
+    python benchmarks/login_load_test.py --base-url http://localhost:8000 \\
+        --email user@company.com --password secret --logins 200 --concurrency 50
+"""
+
+import json
+import time
+import argparse
+import threading
+import statistics
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def timed_request(url: str, data: bytes = None, timeout: float = 60.0) -> tuple:
+    """Return (latency_seconds, status_code)"""
+    headers = {"Content-Type": "application/json"} if data is not None else {}
+    request = urllib.request.Request(url, data=data, headers=headers, method="POST" if data is not None else "GET")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return time.perf_counter() - started, status
+
+
+def percentiles(latencies: list) -> dict:
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+
+    def pick(pct):
+        return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+    return {
+        "count": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "p95_ms": round(pick(95) * 1000, 1),
+        "p99_ms": round(pick(99) * 1000, 1),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure login and non-auth latency under a login burst")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True, help="Existing user email")
+    parser.add_argument("--password", required=True, help="Password for --email")
+    parser.add_argument("--logins", type=int, default=200, help="Total login requests")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent login requests")
+    parser.add_argument("--probe-path", default="/health", help="Non-auth endpoint sampled during the burst")
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="Seconds between probe requests")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    login_url = f"{base_url}/auth/login"
+    probe_url = f"{base_url}{args.probe_path}"
+    login_body = json.dumps({"email": args.email, "password": args.password}).encode()
+
+    # Baseline probe latency with no load
+    baseline = [timed_request(probe_url)[0] for _ in range(20)]
+
+    probe_latencies = []
+    stop_probe = threading.Event()
+
+    def probe():
+        while not stop_probe.is_set():
+            latency, _ = timed_request(probe_url)
+            probe_latencies.append(latency)
+            stop_probe.wait(args.probe_interval)
+
+    probe_thread = threading.Thread(target=probe, daemon=True)
+    probe_thread.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(lambda _: timed_request(login_url, login_body), range(args.logins)))
+    elapsed = time.perf_counter() - started
+
+    stop_probe.set()
+    probe_thread.join()
+
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    report = {
+        "logins": args.logins,
+        "concurrency": args.concurrency,
+        "elapsed_seconds": round(elapsed, 2),
+        "logins_per_second": round(args.logins / elapsed, 1),
+        "login_status_codes": statuses,
+        "login_latency": percentiles([latency for latency, status in results if status == 200]),
+        "probe_baseline_latency": percentiles(baseline),
+        "probe_latency_during_burst": percentiles(probe_latencies),
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
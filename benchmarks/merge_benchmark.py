@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+JSON merge benchmark
+
+Builds synthetic document groups (50 documents by default) whose extractions carry long,
+heavily overlapping ICD-10, HCPCS, phone and item lists, and times
+LLMService.merge_json_responses with the hash-indexed list merge against the previous
+nested-loop merge. Also checks that both produce the same items.
+
+Usage:
+    python benchmarks/merge_benchmark.py
+    python benchmarks/merge_benchmark.py --documents 50 --codes 400 --repeat 5
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.openai_service import LLMService
+
+
+def legacy_merge_complex_lists(self, base_list, new_list, path=""):
+    """The nested-loop merge replaced by the hash index, kept for comparison"""
+    merged = base_list.copy()
+    for new_item in new_list:
+        if not isinstance(new_item, dict):
+            merged.append(new_item)
+            continue
+        found_match = False
+        for i, base_item in enumerate(merged):
+            if not isinstance(base_item, dict):
+                continue
+            is_match = False
+            if "code" in new_item and "code" in base_item:
+                is_match = base_item.get("code") == new_item.get("code")
+            elif "value" in new_item and "value" in base_item:
+                is_match = base_item.get("value") == new_item.get("value")
+            if is_match:
+                if new_item.get("confidence", 0.0) > base_item.get("confidence", 0.0):
+                    merged[i] = new_item
+                found_match = True
+                break
+        if not found_match:
+            merged.append(new_item)
+    return merged
+
+
+def legacy_merge_lists(self, base_list, new_list, path=""):
+    if not base_list:
+        return new_list
+    if not new_list:
+        return base_list
+    if isinstance(base_list[0], (str, int, float)) and isinstance(new_list[0], (str, int, float)):
+        return list(set(base_list + new_list))
+    if isinstance(base_list[0], dict) and isinstance(new_list[0], dict):
+        return legacy_merge_complex_lists(self, base_list, new_list, path)
+    return base_list + new_list
+
+
+def field(value, rng):
+    return {"value": value, "confidence": round(rng.uniform(0.5, 1.0), 2)}
+
+
+def synthetic_document(rng: random.Random, codes: int) -> dict:
+    """One extraction: each list draws from a shared pool, so documents overlap heavily"""
+    icd10_pool = [f"E{n // 10}.{n % 10}" for n in range(100, 100 + codes * 2)]
+    hcpcs_pool = [f"A{4000 + n}" for n in range(codes * 2)]
+    return {
+        "patient_information": {
+            "full_name": field(rng.choice(["Jane Doe", "JANE DOE", None]), rng),
+            "date_of_birth": field("1950-01-01", rng),
+            "phone_numbers": [field(f"(555) 010-{n:04d}", rng) for n in rng.sample(range(codes), codes // 10 or 1)],
+        },
+        "clinical_information": {
+            "icd10_codes": [
+                {"code": code, "description": f"Diagnosis {code}", "confidence": round(rng.uniform(0.5, 1.0), 2)}
+                for code in rng.sample(icd10_pool, codes)
+            ],
+            "diabetic": field(rng.choice([True, False, None]), rng),
+        },
+        "orders": {
+            "hcpcs_codes": [
+                {"code": code, "description": f"Supply {code}", "confidence": round(rng.uniform(0.5, 1.0), 2)}
+                for code in rng.sample(hcpcs_pool, codes)
+            ],
+            "items": [field(f"Item {n}", rng) for n in rng.sample(range(codes * 2), codes)],
+        },
+        "pages_checked": rng.sample(range(1, 200), 20),
+    }
+
+
+def time_merge(service: LLMService, documents: list, repeat: int) -> tuple:
+    durations = []
+    merged = None
+    for _ in range(repeat):
+        payload = [json.dumps(doc) for doc in documents]
+        started = time.perf_counter()
+        merged = service.merge_json_responses(payload)
+        durations.append(time.perf_counter() - started)
+    return durations, json.loads(merged)
+
+
+def list_items(merged: dict, *path) -> set:
+    node = merged
+    for key in path:
+        node = node[key]
+    return {json.dumps(item, sort_keys=True) for item in node}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark merge_json_responses list merging")
+    parser.add_argument("--documents", type=int, default=50, help="Documents per group")
+    parser.add_argument("--codes", type=int, default=200, help="ICD-10 / HCPCS codes per document")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed merges per implementation")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rng = random.Random(args.seed)
+    documents = [synthetic_document(rng, args.codes) for _ in range(args.documents)]
+
+    # Merging needs no OpenAI client
+    service = LLMService.__new__(LLMService)
+    service.logger = logging.getLogger("merge_benchmark")
+
+    hashed_durations, hashed = time_merge(service, documents, args.repeat)
+
+    legacy = LLMService.__new__(LLMService)
+    legacy.logger = service.logger
+    legacy._merge_lists = legacy_merge_lists.__get__(legacy)
+    legacy_durations, legacy_merged = time_merge(legacy, documents, args.repeat)
+
+    same_items = all(
+        list_items(hashed, *path) == list_items(legacy_merged, *path)
+        for path in [
+            ("clinical_information", "icd10_codes"),
+            ("orders", "hcpcs_codes"),
+            ("orders", "items"),
+            ("patient_information", "phone_numbers"),
+        ]
+    )
+
+    hashed_median = statistics.median(hashed_durations)
+    legacy_median = statistics.median(legacy_durations)
+    print(json.dumps({
+        "documents": args.documents,
+        "codes_per_document": args.codes,
+        "merged_icd10_codes": len(hashed["clinical_information"]["icd10_codes"]),
+        "merged_hcpcs_codes": len(hashed["orders"]["hcpcs_codes"]),
+        "nested_loop_median_seconds": round(legacy_median, 4),
+        "hash_index_median_seconds": round(hashed_median, 4),
+        "speedup": round(legacy_median / hashed_median, 1) if hashed_median else None,
+        "same_items": same_items,
+        "pages_checked_order_stable": hashed["pages_checked"][:20] == documents[0]["pages_checked"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+PDF fill and flatten benchmark
+
+Times every PdfProcessor.fill_* function and _convert_to_non_editable at several
+rasterization DPIs, using the forms shipped in the repo and the realistic extraction
+payload in pdf.py. Each case runs in its own interpreter so peak RSS (ru_maxrss) is
+per case, and the results are written to JSON together with the git commit so runs
+can be compared between commits.
+
+Usage:
+    python benchmarks/pdf_fill_benchmark.py
+    python benchmarks/pdf_fill_benchmark.py --dpi 100 --dpi 150 --iterations 10 --output before.json
+    python benchmarks/pdf_fill_benchmark.py --case fill_patient_notes=path/to/Patient_Notes.pdf
+    python benchmarks/pdf_fill_benchmark.py --compare before.json after.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, UTC
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+INTAKE_FORM = "ABN - Medicare Intake Form (1).pdf"
+
+# Input form for each case; the blank originals of most templates live in S3, so the
+# filled copies in the repo stand in for them (pass --case name=path to use the originals)
+DEFAULT_CASES = {
+    "fill_purewick_resupply_agreement": "pdf_templates/Purewick_Resupply_Agreement_OHS.pdf",
+    "fill_patient_financial_responsibilty_template": INTAKE_FORM,
+    "fill_cgm_resupply_agreement_form": INTAKE_FORM,
+    "fill_patient_intake_form": "filled_patient_intake_form.pdf",
+    "fill_non_medicare_dme_intake_form": INTAKE_FORM,
+    "fill_comprehensive_pdf_template": INTAKE_FORM,
+    "fill_patient_authorization_form": "filled_patient_authorization_form.pdf",
+    "fill_patient_notes": "filled_patient_notes.pdf",
+    "fill_patient_service_agreement": "filled_patient_service_agreement.pdf",
+    "_convert_to_non_editable": INTAKE_FORM,
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_PATH, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(function_name: str, input_path: str, dpi: int, iterations: int) -> dict:
+    """Run one case in this process (called in the child interpreter)"""
+    # _convert_to_non_editable reads its default DPI from settings, so set it before config loads
+    os.environ["PDF_FLATTEN_DPI"] = str(dpi)
+    sys.path.insert(0, ROOT_PATH)
+
+    import fitz
+    from pdf import results as extracted_data
+    from services.pdf_service import PdfProcessor
+
+    # Skip __init__: filling never touches the Mistral client
+    processor = PdfProcessor.__new__(PdfProcessor)
+    function = getattr(processor, function_name)
+
+    with fitz.open(input_path) as doc:
+        pages = len(doc)
+        widgets = sum(len(list(page.widgets() or [])) for page in doc)
+
+    work_dir = tempfile.mkdtemp(prefix="pdf_fill_benchmark_")
+    output_path = os.path.join(work_dir, "output.pdf")
+    baseline_rss = peak_rss_mb()
+    durations = []
+    try:
+        # One warm-up call so font and library initialization is not timed
+        for i in range(iterations + 1):
+            started = time.perf_counter()
+            if function_name == "_convert_to_non_editable":
+                function(input_path, output_path, dpi)
+            else:
+                function(input_path, extracted_data, output_path)
+            if i > 0:
+                durations.append(time.perf_counter() - started)
+        output_bytes = os.path.getsize(output_path) if os.path.exists(output_path) else None
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "function": function_name,
+        "input": os.path.relpath(input_path, ROOT_PATH),
+        "input_pages": pages,
+        "input_widgets": widgets,
+        "dpi": dpi,
+        "iterations": iterations,
+        "mean_seconds": round(statistics.mean(durations), 4),
+        "p50_seconds": round(statistics.median(durations), 4),
+        "max_seconds": round(max(durations), 4),
+        "documents_per_second": round(1 / statistics.mean(durations), 2),
+        "pages_per_second": round(pages / statistics.mean(durations), 2),
+        "input_bytes": os.path.getsize(input_path),
+        "output_bytes": output_bytes,
+        "peak_rss_mb": peak_rss_mb(),
+        "baseline_rss_mb": baseline_rss,
+    }
+
+
+def run_case_in_subprocess(function_name: str, input_path: str, dpi: int, iterations: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run-case", json.dumps([function_name, input_path, dpi, iterations])],
+        cwd=ROOT_PATH, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return {"function": function_name, "input": input_path, "dpi": dpi, "error": result.stderr.strip().splitlines()[-1:]}
+    # The fill functions print progress; the result is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    def keyed(report):
+        return {(r["function"], r["dpi"]): r for r in report["results"] if "error" not in r}
+
+    before_results, after_results = keyed(before), keyed(after)
+    print(f"{before['git_commit']} -> {after['git_commit']}")
+    print(f"{'function':<48}{'dpi':>5}{'mean s':>18}{'peak RSS MB':>20}{'output KB':>20}")
+    for key in sorted(before_results.keys() & after_results.keys()):
+        b, a = before_results[key], after_results[key]
+        print(
+            f"{key[0]:<48}{key[1]:>5}"
+            f"{b['mean_seconds']:>8.3f} -> {a['mean_seconds']:<6.3f}"
+            f"{b['peak_rss_mb']:>9.1f} -> {a['peak_rss_mb']:<7.1f}"
+            f"{(b['output_bytes'] or 0) / 1024:>9.0f} -> {(a['output_bytes'] or 0) / 1024:<7.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF template filling and flattening")
+    parser.add_argument("--dpi", type=int, action="append", help="Flatten DPI (repeatable, default: 72, 100, 150, 200)")
+    parser.add_argument("--iterations", type=int, default=5, help="Timed runs per case")
+    parser.add_argument("--case", action="append", default=[], help="function=path to override an input form, or just function to limit the run")
+    parser.add_argument("--output", default=None, help="Result file (default: benchmarks/results/pdf_fill_<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(*json.loads(args.run_case))))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    cases = dict(DEFAULT_CASES)
+    selected = []
+    for case in args.case:
+        name, _, path = case.partition("=")
+        if name not in DEFAULT_CASES:
+            parser.error(f"Unknown case {name}; choose from {', '.join(DEFAULT_CASES)}")
+        if path:
+            cases[name] = path
+        selected.append(name)
+    if selected:
+        cases = {name: cases[name] for name in selected}
+
+    commit = git_commit()
+    results = []
+    for dpi in args.dpi or [72, 100, 150, 200]:
+        for function_name, input_path in cases.items():
+            result = run_case_in_subprocess(function_name, os.path.join(ROOT_PATH, input_path), dpi, args.iterations)
+            results.append(result)
+            if "error" in result:
+                print(f"{function_name:<48} dpi {dpi:>3}  FAILED: {result['error']}")
+            else:
+                print(
+                    f"{function_name:<48} dpi {dpi:>3}  {result['mean_seconds']:.3f}s  "
+                    f"{result['pages_per_second']:>7.1f} pages/s  {result['peak_rss_mb']:>7.1f} MB peak  "
+                    f"{(result['output_bytes'] or 0) / 1024:>8.0f} KB out"
+                )
+
+    report = {
+        "git_commit": commit,
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "results": results,
+    }
+    output = args.output or os.path.join(ROOT_PATH, "benchmarks", "results", f"pdf_fill_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@ sys.path.append(project_root)
 # Import the celery app from the services module
 from services.celery_service import celery_app
 from services.redis_service import RedisService
+from services.metrics_service import pipeline_metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -56,6 +57,17 @@ if __name__ == "__main__":
         sys.exit(1)
     
     logger.info("Starting Celery worker with Redis connection verified")
+
+    # The heavy clients are imported lazily everywhere else; load them once in the parent
+    # so every prefork child (including ones recycled by --max-tasks-per-child) inherits them
+    preload_started = time.perf_counter()
+    import services.aws_service  # noqa: F401
+    import services.openai_service  # noqa: F401
+    import services.pdf_service  # noqa: F401
+    logger.info(f"Preloaded processing modules in {time.perf_counter() - preload_started:.2f}s")
+
+    # Per-stage latency histograms aggregated across all worker processes
+    pipeline_metrics.start_http_server()
     
     # Start the Celery worker with optimized settings for PDF processing
     celery_app.worker_main([
@@ -68,6 +80,7 @@ if __name__ == "__main__":
         '--time-limit=1800',  # 30 minutes time limit for PDF processing
         '--soft-time-limit=1500',  # 25 minutes soft time limit
         '--queues=default',  # Process tasks from the default queue
+        '--beat',  # Embedded scheduler for periodic tasks (audit log partition maintenance)
         '--without-gossip',  # Disable gossip to reduce network overhead
         '--without-mingle',  # Disable mingle to reduce startup time
         '--without-heartbeat',  # Disable heartbeat to reduce network traffic
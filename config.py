@@ -1,7 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
-import random
-from rich import print
+from typing import Dict, List
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -26,25 +24,131 @@ class Settings(BaseSettings):
     jwt_secret_key: str = ""
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 30
+
+    # Password hashing: bcrypt cost factor for new hashes, hashing threads and queued jobs before 503
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
     
-    # OpenAI settings
+    # OpenAI settings; openai_base_url points the client at another endpoint (e.g. a load-test stand-in)
     openai_api_key: str = ""
+    openai_base_url: str = ""
+
+    # LLM extraction: "single" asks for the whole schema in one call, "sectioned" extracts each
+    # top-level section with its own call, up to llm_section_concurrency at a time
+    llm_extraction_mode: str = "single"
+    llm_section_concurrency: int = 10
+
+    # Structured output: extraction responses are constrained to the JSON schema of the extraction
+    # models and validated locally; a section that fails is re-requested up to llm_repair_attempts times.
+    # Off by default until strict schemas are validated against the API; local validation applies either way
+    llm_structured_output: bool = False
+    llm_repair_attempts: int = 1
 
     # PostgreSQL settings
     postgresql_db: str = ""
 
-    # Mistral API key
+    # Mistral API key; mistral_server_url overrides the API endpoint
     mistral_api_key: str = ""
+    mistral_server_url: str = ""
 
     # AWS credentials
     aws_access_key_id: str = ""
     aws_secret_access_key: str = ""
     aws_region: str = ""
     aws_bucket_name:str = ""
+    # S3-compatible endpoint (moto, MinIO) instead of AWS, e.g. http://localhost:5000
+    aws_endpoint_url: str = ""
 
     # Optional Fernet encryption key (urlsafe base64-encoded 32-byte key). If set, used for file encryption/decryption across hosts
     encryption_key: str = ""
-    
+
+    # Database pool instrumentation: log checkouts that wait and connections held longer than these
+    db_pool_checkout_warn_seconds: float = 0.5
+    db_connection_hold_warn_seconds: float = 5.0
+
+    # Maximum number of concurrent S3 uploads per /agent/analyze-document request
+    s3_upload_concurrency: int = 8
+
+    # Audit log write-behind buffer: "memory", "redis" (shared, at-least-once) or "sync"
+    audit_log_backend: str = "memory"
+    audit_log_batch_size: int = 500
+    audit_log_flush_interval_seconds: float = 2.0
+    audit_log_buffer_max_size: int = 10000
+    # Redis backend: times the database may reject a batch (DataError/IntegrityError) before it is
+    # moved to the audit_logs:dead_letter list; connection errors are retried without a limit
+    audit_log_max_flush_attempts: int = 5
+    # Longest wait between flush retries while the database is failing
+    audit_log_max_backoff_seconds: float = 60.0
+
+    # Audit log listing totals: "exact", "auto" (exact up to the limit, estimated beyond), "estimated" or "none"
+    audit_log_count_mode: str = "auto"
+    audit_log_exact_count_limit: int = 10000
+    # Deepest row offset page-number pagination may reach; past it clients must follow next_cursor
+    audit_log_max_page_offset: int = 1000
+
+    # Monthly audit_logs partitions: created ahead of time, old ones detached instead of deleted.
+    # Retention action is "archive" (move to the audit_archive schema), "detach" or "drop".
+    audit_log_partition_months_ahead: int = 3
+    audit_log_retention_months: int = 72
+    audit_log_retention_action: str = "archive"
+
+    # Authenticated user principal cache (in-process LRU backed by Redis); 0 disables it
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_max_entries: int = 1024
+
+    # Native text fast path: pages whose embedded text layer has at least native_text_min_chars characters,
+    # at least native_text_min_quality readable characters and images over at most
+    # native_text_max_image_coverage of the page are read with PyMuPDF instead of Mistral OCR
+    native_text_enabled: bool = True
+    native_text_min_chars: int = 100
+    native_text_min_quality: float = 0.9
+    native_text_max_image_coverage: float = 0.5
+
+    # Chunked Mistral OCR: PDFs longer than ocr_chunk_min_pages are split into ocr_chunk_pages-page
+    # ranges that are OCRed concurrently and retried independently; ocr_chunk_pages = 0 disables it
+    ocr_chunk_pages: int = 10
+    ocr_chunk_min_pages: int = 20
+    ocr_chunk_concurrency: int = 4
+    ocr_chunk_retries: int = 2
+    ocr_chunk_retry_backoff_seconds: float = 1.0
+
+    # OCR page dedupe: pages to OCR are fingerprinted from a low-resolution rendering, so identical
+    # pages (fax cover sheets, disclaimers) are OCRed once per document group and reused from Redis.
+    # Documents of a group are processed concurrently, so each page is claimed before OCR and the
+    # other documents wait up to ocr_page_claim_wait_seconds for it before OCRing it themselves
+    ocr_page_dedupe_enabled: bool = True
+    ocr_page_fingerprint_dpi: int = 36
+    ocr_page_cache_ttl_seconds: int = 3600
+    ocr_page_claim_wait_seconds: int = 120
+
+    # Fax cover sheets and disclaimer-only pages with fewer content characters than this
+    # are left out of the LLM prompt; 0 keeps every page
+    ocr_boilerplate_max_content_chars: int = 150
+
+    # Resolution at which generated PDFs are rasterized to make them non-editable
+    pdf_flatten_dpi: int = 150
+
+    # HTTP request timing: Server-Timing headers, per-route latency histograms (/metrics) and the
+    # slow-request log; a route template in slow_request_route_thresholds overrides the default
+    request_timing_enabled: bool = True
+    slow_request_threshold_seconds: float = 2.0
+    slow_request_route_thresholds: Dict[str, float] = {
+        "/agent/analyze-document": 10.0,
+        "/templates/generate-document/": 15.0
+    }
+    slow_request_log_size: int = 200
+
+    # Distributed tracing exporter: "none", "log", "jsonl" (written to tracing_jsonl_path)
+    # or a "module:ClassName" path to a class with an export(span) method
+    tracing_exporter: str = "none"
+    tracing_jsonl_path: str = "traces.jsonl"
+
+    # Per-stage pipeline latency histograms, served by the Celery worker in Prometheus format
+    pipeline_metrics_enabled: bool = True
+    pipeline_metrics_host: str = "127.0.0.1"
+    pipeline_metrics_port: int = 9540
+
     # Redis settings for Celery
     redis_url: str = "redis://localhost:6379/0"
     
@@ -74,7 +178,3 @@ class Settings(BaseSettings):
 # Create settings instance
 settings = Settings()
 
-
-if __name__ == "__main__":
-    for i in range(10):
-        print(settings.get_random_voice())
\ No newline at end of file
@@ -1,7 +1,11 @@
 import sys
 import os
+import time
 import logging
 
+# Startup timing reported by /health
+_process_started = time.perf_counter()
+
 # Configure logging to show in terminal
 logging.basicConfig(
     level=logging.INFO,
@@ -14,17 +18,51 @@ logging.basicConfig(
 # Add project root to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routers.auth import router as auth_router
 from routers.admin import router as admin_router
 from routers.agent import router as agent_router
 from routers.templates import router as templates_router
+from services.audit_service import audit_log_writer
+from services.principal_cache import principal_cache
+from models.database_models import User, get_pool_status
+from services.auth_service import get_current_admin_user
+from services.container import get_container
+from services.request_timing import ServerTimingMiddleware, request_metrics
+from services.tracing_service import TracingMiddleware
+
+_import_seconds = time.perf_counter() - _process_started
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    lifespan_started = time.perf_counter()
+    # Services are built on first use, so a missing dependency only fails the endpoints that need it
+    app.state.services = get_container()
+    # Both connect to Redis from their own threads, so a slow or missing Redis doesn't hold up startup
+    audit_log_writer.start()
+    principal_cache.start()
+    app.state.startup_timings = {
+        "import_seconds": round(_import_seconds, 3),
+        "lifespan_seconds": round(time.perf_counter() - lifespan_started, 3),
+        "total_seconds": round(time.perf_counter() - _process_started, 3)
+    }
+    logger.info(f"Startup completed: {app.state.startup_timings}")
+    yield
+    principal_cache.stop()
+    # Flush buffered audit events before the process exits
+    audit_log_writer.stop()
+
 
 app = FastAPI(
     title="Parachute Portal API",
     description="API for Parachute Portal application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware configuration
@@ -34,15 +72,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Server-Timing headers, per-route latency histograms and the slow-request log
+app.add_middleware(ServerTimingMiddleware)
+
+# Request spans continuing an incoming W3C traceparent (exporter set by TRACING_EXPORTER)
+app.add_middleware(TracingMiddleware)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Parachute Portal API"}
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "startup": getattr(app.state, "startup_timings", None),
+        "services": get_container().status()
+    }
+
+@app.get("/health/db-pool")
+async def db_pool_health(current_user: User = Depends(get_current_admin_user)):
+    """Connection pool occupancy, checkout wait and connection hold times (admin only)"""
+    return get_pool_status()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(current_user: User = Depends(get_current_admin_user)):
+    """Per-route request latency histograms (this process) in Prometheus format (admin only)"""
+    return request_metrics.render_prometheus()
+
+@app.get("/health/slow-requests")
+async def slow_requests(current_user: User = Depends(get_current_admin_user)):
+    """Most recent requests slower than their slow_request threshold (admin only; paths can carry document IDs)"""
+    return list(request_metrics.slow_requests)
 
 # Include routers
 app.include_router(auth_router)
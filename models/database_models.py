@@ -1,19 +1,90 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, Text, Boolean, DateTime, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import QueuePool
 from datetime import datetime, UTC
 import os
 import sys
+import time
+import logging
+import threading
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import settings
+from services.request_timing import record_timing
+
+logger = logging.getLogger(__name__)
 
 # Database configuration
 DATABASE_URL = settings.postgresql_db
 
+
+class PoolStats:
+    """Running totals of connection pool checkout waits and connection hold times"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.slow_checkouts = 0
+        self.checkins = 0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.long_holds = 0
+
+    def record_checkout_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_total += seconds
+            self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+            if seconds >= settings.db_pool_checkout_warn_seconds:
+                self.slow_checkouts += 1
+
+    def record_hold(self, seconds: float) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.hold_total += seconds
+            self.hold_max = max(self.hold_max, seconds)
+            if seconds >= settings.db_connection_hold_warn_seconds:
+                self.long_holds += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_wait_avg_ms": round(self.checkout_wait_total / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 2),
+                "slow_checkouts": self.slow_checkouts,
+                "checkins": self.checkins,
+                "hold_avg_ms": round(self.hold_total / self.checkins * 1000, 2) if self.checkins else 0.0,
+                "hold_max_ms": round(self.hold_max * 1000, 2),
+                "long_holds": self.long_holds,
+            }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that measures how long callers wait for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            pool_stats.record_checkout_wait(waited)
+            if waited >= settings.db_pool_checkout_warn_seconds:
+                logger.warning(f"Waited {waited * 1000:.0f} ms for a database connection ({self.status()})")
+
+
 # Create engine with connection pool management for Neon serverless
 engine = create_engine(
     DATABASE_URL, 
     echo=False,
+    poolclass=InstrumentedQueuePool,
     pool_pre_ping=True,          # Ensures dead connections are removed before use
     pool_recycle=1800,           # Recycles connections older than 30 minutes
     pool_size=5,                 # Number of connections to maintain in pool
@@ -24,6 +95,45 @@ engine = create_engine(
     }
 )
 
+
+
+@event.listens_for(engine, "checkout")
+def _record_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+
+
+@event.listens_for(engine, "checkin")
+def _record_checkin(dbapi_connection, connection_record):
+    checked_out_at = connection_record.info.pop("checked_out_at", None)
+    if checked_out_at is None:
+        return
+    held = time.perf_counter() - checked_out_at
+    pool_stats.record_hold(held)
+    if held >= settings.db_connection_hold_warn_seconds:
+        logger.warning(f"Database connection held for {held:.2f}s before being returned to the pool")
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    record_timing("db", time.perf_counter() - context._query_started)
+
+
+def get_pool_status() -> dict:
+    """Current pool occupancy plus checkout and hold time totals"""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checked_in": pool.checkedin(),
+        **pool_stats.snapshot(),
+    }
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -158,7 +268,12 @@ class Templates(Base):
 
 
 class AuditLog(Base):
-    """Enhanced audit trail for HIPAA compliance and security monitoring"""
+    """
+    Enhanced audit trail for HIPAA compliance and security monitoring.
+
+    Range-partitioned by month on created_at (see DatabaseService.ensure_audit_log_partitions),
+    so created_at is part of the primary key.
+    """
     __tablename__ = "audit_logs"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -167,6 +282,11 @@ class AuditLog(Base):
     user_id = Column(Integer, ForeignKey('users.id'), nullable=True)
     category = Column(String(100), nullable=False)  
     action_details = Column(String(500), nullable=True)
+    # Full-text search vector over action_details, maintained by Postgres
+    action_details_tsv = Column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(action_details, ''))", persisted=True)
+    )
 
     # Database record that gets affected or added
     table_name = Column(String(100), nullable=False)
@@ -177,25 +297,57 @@ class AuditLog(Base):
     user_agent = Column(String(500), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    created_at = Column(DateTime, primary_key=True, nullable=False, default=lambda: datetime.now(UTC))
     
     # Relationships
     user = relationship("User", back_populates="audit_logs")
     
     # Performance Indexes
     __table_args__ = (
-        Index('idx_audit_logs_user_id', 'user_id'),
-        Index('idx_audit_logs_category', 'category'),
-        Index('idx_audit_logs_created_at', 'created_at'),
-        Index('idx_audit_logs_table_name', 'table_name'),
-        Index('idx_audit_logs_record_id', 'record_id'),
-        Index('idx_audit_logs_ip_address', 'ip_address'),
+        # Aligned with the filters in DatabaseService._query_audit_logs (newest first, id tie-breaker)
+        Index('idx_audit_logs_category_created_at', 'category', 'created_at', 'id'),
+        Index('idx_audit_logs_user_id_created_at', 'user_id', 'created_at', 'id'),
+        Index('idx_audit_logs_created_at_id', 'created_at', 'id'),
+        Index('idx_audit_logs_created_at_brin', 'created_at', postgresql_using='brin'),
+        Index('idx_audit_logs_action_details_tsv', 'action_details_tsv', postgresql_using='gin'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
 
+class LazySession:
+    """
+    Session proxy that only creates the Session on first use.
+
+    Requests served from Redis never touch the database and never build a Session. Call
+    release() before slow work (S3, LLM, PDF rendering) to end the transaction and return
+    the connection to the pool; the session stays usable and checks out a new connection
+    on its next query. Objects loaded before release() are detached but keep their loaded
+    attributes.
+    """
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory or SessionLocal
+        self._session = None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = self._session_factory()
+        return getattr(self._session, name)
+
+    def release(self) -> None:
+        """Roll back any open transaction and return its connection to the pool"""
+        if self._session is not None:
+            self._session.close()
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
 # Database dependency
 def get_db():
-    """Database dependency for FastAPI"""
-    db = SessionLocal()
+    """Database dependency for FastAPI (lazy, see LazySession)"""
+    db = LazySession()
     try:
         yield db
     finally:
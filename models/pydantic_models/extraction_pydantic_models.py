@@ -0,0 +1,225 @@
+from pydantic import BaseModel, ConfigDict, Field, StrictBool, StrictInt, create_model
+from typing import Dict, List, Optional, Type, Union
+from functools import lru_cache
+
+# Typed model of MEDICAL_DOC_SCHEMA (prompt_registry/document_extraction_prompt.py), used to
+# request structured output and to validate each extracted section locally.
+# Missing fields fall back to null / 0.0 confidence and unknown keys are kept.
+
+class ExtractionModel(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+# Strict bool/int first so integers (quantities, zip codes) aren't coerced to floats like 30.0
+ExtractedValue = Optional[Union[StrictBool, StrictInt, float, str]]
+
+# Field models
+class ConfidenceField(ExtractionModel):
+    value: ExtractedValue = None
+    confidence: float = Field(0.0, ge=0.0, le=1.0)
+
+class ContactField(ConfidenceField):
+    original_text: Optional[str] = None
+
+class CostField(ConfidenceField):
+    currency: Optional[str] = "USD"
+
+class CodeField(ExtractionModel):
+    code: Optional[str] = None
+    confidence: float = Field(0.0, ge=0.0, le=1.0)
+
+class DiagnosisCodeField(CodeField):
+    description: Optional[str] = None
+
+class Address(ExtractionModel):
+    street: ConfidenceField = ConfidenceField()
+    city: ConfidenceField = ConfidenceField()
+    state: ConfidenceField = ConfidenceField()
+    zip: ConfidenceField = ConfidenceField()
+
+class EmergencyContact(ExtractionModel):
+    name: ConfidenceField = ConfidenceField()
+    relation: ConfidenceField = ConfidenceField()
+    phone: ContactField = ContactField()
+
+class Guarantor(ExtractionModel):
+    name: ConfidenceField = ConfidenceField()
+    relation: ConfidenceField = ConfidenceField()
+    contact: ContactField = ContactField()
+
+# Section models
+class PatientInformation(ExtractionModel):
+    full_name: ConfidenceField = ConfidenceField()
+    date_of_birth: ConfidenceField = ConfidenceField()
+    gender: ConfidenceField = ConfidenceField()
+    address: Address = Address()
+    phone_numbers: List[ContactField] = []
+    email: ConfidenceField = ConfidenceField()
+    emergency_contact: EmergencyContact = EmergencyContact()
+    copy_of_id_present: ConfidenceField = ConfidenceField()
+
+class InsuranceBilling(ExtractionModel):
+    primary_payer: ConfidenceField = ConfidenceField()
+    mbi_or_medicaid_id: ConfidenceField = ConfidenceField()
+    policy_member_id: ConfidenceField = ConfidenceField()
+    group_number: ConfidenceField = ConfidenceField()
+    bin_pcn: ConfidenceField = ConfidenceField()
+    secondary_insurance: ConfidenceField = ConfidenceField()
+    workers_comp_claim: ConfidenceField = ConfidenceField()
+    guarantor: Guarantor = Guarantor()
+
+class ProviderPrescriber(ExtractionModel):
+    provider_full_name: ConfidenceField = ConfidenceField()
+    npi_number: ConfidenceField = ConfidenceField()
+    dea_number: ConfidenceField = ConfidenceField()
+    specialty: ConfidenceField = ConfidenceField()
+    clinic_facility_name: ConfidenceField = ConfidenceField()
+    clinic_address: Address = Address()
+    clinic_phone: ContactField = ContactField()
+    clinic_fax: ContactField = ContactField()
+    signature_date_signed: ConfidenceField = ConfidenceField()
+    signature_present: ConfidenceField = ConfidenceField()
+    pecos_enrollment_present: ConfidenceField = ConfidenceField()
+
+class ClinicalDocumentation(ExtractionModel):
+    icd10_codes: List[DiagnosisCodeField] = []
+    medical_necessity_summary: ConfidenceField = ConfidenceField()
+    onset_or_injury_date: ConfidenceField = ConfidenceField()
+    prior_treatments: ConfidenceField = ConfidenceField()
+    face_to_face_documentation_present: ConfidenceField = ConfidenceField()
+
+class OrdersDmeDetails(ExtractionModel):
+    hcpcs_codes: List[CodeField] = []
+    item_descriptions: List[ConfidenceField] = []
+    quantity_ordered: ConfidenceField = ConfidenceField()
+    frequency_replacement: ConfidenceField = ConfidenceField()
+    length_of_need: ConfidenceField = ConfidenceField()
+    supply_start_date: ConfidenceField = ConfidenceField()
+    place_of_service: ConfidenceField = ConfidenceField()
+    serial_lot_number: ConfidenceField = ConfidenceField()
+
+class PatientFinancials(ExtractionModel):
+    abn_or_notice_present: ConfidenceField = ConfidenceField()
+    estimated_cost: CostField = CostField()
+    patient_choice_option: ConfidenceField = ConfidenceField()
+    aob_signed_dated: ConfidenceField = ConfidenceField()
+    supplier_standards_ack_signed: ConfidenceField = ConfidenceField()
+    hipaa_acknowledgement_present: ConfidenceField = ConfidenceField()
+
+class DeliveryProof(ExtractionModel):
+    proof_of_delivery_signed: ConfidenceField = ConfidenceField()
+    pod_signed_date: ConfidenceField = ConfidenceField()
+    pod_address: ConfidenceField = ConfidenceField()
+    pod_item_list: ConfidenceField = ConfidenceField()
+    courier_documentation_present: ConfidenceField = ConfidenceField()
+    tracking_number: ConfidenceField = ConfidenceField()
+
+class AdministrativeTracking(ExtractionModel):
+    internal_case_id: ConfidenceField = ConfidenceField()
+    referral_source: ConfidenceField = ConfidenceField()
+    prior_authorization_number: ConfidenceField = ConfidenceField()
+    recertification_documentation_present: ConfidenceField = ConfidenceField()
+    replacement_vs_new_notes: ConfidenceField = ConfidenceField()
+
+class DmeFileChecklist(ExtractionModel):
+    """Checklist of one payer's DME file; the schema spells out the Medicare one and uses the same style for the others"""
+    patient_demographics_with_mbi: ConfidenceField = ConfidenceField()
+    medicare_card_copy_present: ConfidenceField = ConfidenceField()
+    ordering_provider_info: ConfidenceField = ConfidenceField()
+    dwo_signed_dated: ConfidenceField = ConfidenceField()
+    face_to_face_note_present: ConfidenceField = ConfidenceField()
+    icd10_linked_to_hcpcs: ConfidenceField = ConfidenceField()
+    hcpcs_present: ConfidenceField = ConfidenceField()
+    abn_signed_dated: ConfidenceField = ConfidenceField()
+    aob_signed_dated: ConfidenceField = ConfidenceField()
+    supplier_standards_ack_signed: ConfidenceField = ConfidenceField()
+    pod_signed_date_present: ConfidenceField = ConfidenceField()
+    serial_lot_number_logged: ConfidenceField = ConfidenceField()
+    prior_auth_approval_present: ConfidenceField = ConfidenceField()
+
+class ComplianceChecklists(ExtractionModel):
+    medicare_dme_file: DmeFileChecklist = DmeFileChecklist()
+    medicaid_dme_file: DmeFileChecklist = DmeFileChecklist()
+    commercial_dme_file: DmeFileChecklist = DmeFileChecklist()
+    workerscomp_dme_file: DmeFileChecklist = DmeFileChecklist()
+
+class ExtractionMeta(ExtractionModel):
+    document_type_guess: ConfidenceField = ConfidenceField()
+    pages_checked: List[int] = []
+    extraction_confidence: float = Field(0.0, ge=0.0, le=1.0)
+    notes: Optional[str] = None
+
+# Model of each top-level section, in schema order
+MEDICAL_DOC_SECTION_MODELS: Dict[str, Type[ExtractionModel]] = {
+    "patient_information": PatientInformation,
+    "insurance_billing": InsuranceBilling,
+    "provider_prescriber": ProviderPrescriber,
+    "clinical_documentation": ClinicalDocumentation,
+    "orders_dme_details": OrdersDmeDetails,
+    "patient_financials": PatientFinancials,
+    "delivery_proof": DeliveryProof,
+    "administrative_tracking": AdministrativeTracking,
+    "compliance_checklists": ComplianceChecklists,
+    "meta": ExtractionMeta,
+}
+
+MedicalDocumentExtraction = create_model(
+    "MedicalDocumentExtraction",
+    __base__=ExtractionModel,
+    **{section: (model, model()) for section, model in MEDICAL_DOC_SECTION_MODELS.items()}
+)
+
+
+@lru_cache(maxsize=None)
+def section_response_model(section: str) -> Type[ExtractionModel]:
+    """Model of a response holding a single section under its top-level key"""
+    model = MEDICAL_DOC_SECTION_MODELS[section]
+    return create_model(f"{model.__name__}Response", __base__=ExtractionModel, **{section: (model, ...)})
+
+
+@lru_cache(maxsize=None)
+def strict_json_schema(model: Type[BaseModel]) -> dict:
+    """
+    JSON schema of a model for OpenAI strict structured output: every property required and
+    no additional properties. Nested models are inlined instead of referenced through $defs
+    ($ref/allOf wrappers with sibling keywords are rejected in strict mode). Defaults and bounds
+    are dropped; they are applied when validating locally.
+    """
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+
+    def inline(node):
+        if isinstance(node, list):
+            return [inline(child) for child in node]
+        if not isinstance(node, dict):
+            return node
+        node = dict(node)
+        # pydantic wraps a referenced model in allOf when the field has a description
+        wrapped = node.get("allOf")
+        if isinstance(wrapped, list) and len(wrapped) == 1:
+            del node["allOf"]
+            node = {**wrapped[0], **node}
+        ref = node.pop("$ref", None)
+        if ref is not None:
+            return inline({**definitions[ref.rsplit("/", 1)[-1]], **node})
+        return {key: inline(child) for key, child in node.items()}
+
+    schema = inline(schema)
+
+    def tighten(node):
+        if isinstance(node, dict):
+            for keyword in ("default", "minimum", "maximum"):
+                node.pop(keyword, None)
+            if isinstance(node.get("properties"), dict):
+                node["required"] = list(node["properties"])
+                node["additionalProperties"] = False
+                for child in node["properties"].values():
+                    tighten(child)
+            for key, child in node.items():
+                if key != "properties":
+                    tighten(child)
+        elif isinstance(node, list):
+            for child in node:
+                tighten(child)
+
+    tighten(schema)
+    return schema
@@ -15,11 +15,8 @@ Rules:
 - Do NOT include any explanation, markdown, or extra text before or after the JSON.
 """
 
-# To avoid KeyError with .format(), use a placeholder for the schema and inject it at runtime.
-MEDICAL_DOC_SCHEMA = """
-GOAL:
-From the OCR content, extract every field described in the Medical Extraction / Compliance checklist (patient demographics, insurance/billing, provider/prescriber, clinical documentation, DME/orders, financials, delivery/proof, administrative/tracking, and Medicare/Medicaid/Commercial/WorkersComp checklist items). Produce a single JSON object that exactly follows the schema below.
-
+# The schema is assembled from parts so that each top-level section can also be requested on its own
+_SCHEMA_OUTPUT_RULES = """
 OUTPUT RULES (MUST FOLLOW EXACTLY):
 1. Output ONLY valid JSON (no additional text). Keys must appear exactly as in the schema. Use `null` when a value is not present.
 2. Dates MUST be normalized to ISO 8601 date only: YYYY-MM-DD. If you can only extract a partial date (month/year) use YYYY-MM-00. If no date, null.
@@ -30,12 +27,12 @@ OUTPUT RULES (MUST FOLLOW EXACTLY):
 7. If a field is present in multiple places (e.g., provider appears on page 1 and page 3), provide a single value and assign confidence reflecting overall certainty.
 8. For checklist items (e.g., ABN signed & dated) return a boolean presence field with accompanying confidence.
 9. Return `extraction_confidence` top-level (0.0-1.0) — your best estimate for completeness/accuracy of the extracted JSON.
-10. If a value is ambiguous (multiple candidate values), include `candidates` for that field with each candidate's value, confidence, and a short `reason` for selection. Populate primary field with best choice.
-
-SCHEMA (output JSON must match this structure; replace evidence arrays with confidence):
+10. If a value is ambiguous (multiple candidate values), populate the field with the best choice and lower its confidence to reflect the ambiguity. Do not add keys that are not in the schema.
+"""
 
-{
-  "patient_information": {
+# Schema of each top-level section, in output order
+MEDICAL_DOC_SECTIONS = {
+    "patient_information": """{
     "full_name": { "value": null, "confidence": 0.0 },
     "date_of_birth": { "value": null, "confidence": 0.0 },
     "gender": { "value": null, "confidence": 0.0 },
@@ -53,9 +50,8 @@ SCHEMA (output JSON must match this structure; replace evidence arrays with conf
       "phone": { "value": null, "original_text": null, "confidence": 0.0 }
     },
     "copy_of_id_present": { "value": null, "confidence": 0.0 }
-  },
-
-  "insurance_billing": {
+  }""",
+    "insurance_billing": """{
     "primary_payer": { "value": null, "confidence": 0.0 },
     "mbi_or_medicaid_id": { "value": null, "confidence": 0.0 },
     "policy_member_id": { "value": null, "confidence": 0.0 },
@@ -68,9 +64,8 @@ SCHEMA (output JSON must match this structure; replace evidence arrays with conf
       "relation": { "value": null, "confidence": 0.0 },
       "contact": { "value": null, "original_text": null, "confidence": 0.0 }
     }
-  },
-
-  "provider_prescriber": {
+  }""",
+    "provider_prescriber": """{
     "provider_full_name": { "value": null, "confidence": 0.0 },
     "npi_number": { "value": null, "confidence": 0.0 },
     "dea_number": { "value": null, "confidence": 0.0 },
@@ -87,17 +82,15 @@ SCHEMA (output JSON must match this structure; replace evidence arrays with conf
     "signature_date_signed": { "value": null, "confidence": 0.0 },
     "signature_present": { "value": null, "confidence": 0.0 },
     "pecos_enrollment_present": { "value": null, "confidence": 0.0 }
-  },
-
-  "clinical_documentation": {
+  }""",
+    "clinical_documentation": """{
     "icd10_codes": [ { "code": null, "description": null, "confidence": 0.0 } ],
     "medical_necessity_summary": { "value": null, "confidence": 0.0 },
     "onset_or_injury_date": { "value": null, "confidence": 0.0 },
     "prior_treatments": { "value": null, "confidence": 0.0 },
     "face_to_face_documentation_present": { "value": null, "confidence": 0.0 }
-  },
-
-  "orders_dme_details": {
+  }""",
+    "orders_dme_details": """{
     "hcpcs_codes": [ { "code": null, "confidence": 0.0 } ],
     "item_descriptions": [ { "value": null, "confidence": 0.0 } ],
     "quantity_ordered": { "value": null, "confidence": 0.0 },
@@ -106,35 +99,31 @@ SCHEMA (output JSON must match this structure; replace evidence arrays with conf
     "supply_start_date": { "value": null, "confidence": 0.0 },
     "place_of_service": { "value": null, "confidence": 0.0 },
     "serial_lot_number": { "value": null, "confidence": 0.0 }
-  },
-
-  "patient_financials": {
+  }""",
+    "patient_financials": """{
     "abn_or_notice_present": { "value": null, "confidence": 0.0 },
     "estimated_cost": { "value": null, "currency": "USD", "confidence": 0.0 },
     "patient_choice_option": { "value": null, "confidence": 0.0 },
     "aob_signed_dated": { "value": null, "confidence": 0.0 },
     "supplier_standards_ack_signed": { "value": null, "confidence": 0.0 },
     "hipaa_acknowledgement_present": { "value": null, "confidence": 0.0 }
-  },
-
-  "delivery_proof": {
+  }""",
+    "delivery_proof": """{
     "proof_of_delivery_signed": { "value": null, "confidence": 0.0 },
     "pod_signed_date": { "value": null, "confidence": 0.0 },
     "pod_address": { "value": null, "confidence": 0.0 },
     "pod_item_list": { "value": null, "confidence": 0.0 },
     "courier_documentation_present": { "value": null, "confidence": 0.0 },
     "tracking_number": { "value": null, "confidence": 0.0 }
-  },
-
-  "administrative_tracking": {
+  }""",
+    "administrative_tracking": """{
     "internal_case_id": { "value": null, "confidence": 0.0 },
     "referral_source": { "value": null, "confidence": 0.0 },
     "prior_authorization_number": { "value": null, "confidence": 0.0 },
     "recertification_documentation_present": { "value": null, "confidence": 0.0 },
     "replacement_vs_new_notes": { "value": null, "confidence": 0.0 }
-  },
-
-  "compliance_checklists": {
+  }""",
+    "compliance_checklists": """{
     "medicare_dme_file": {
        "patient_demographics_with_mbi": { "value": null, "confidence": 0.0 },
        "medicare_card_copy_present": { "value": null, "confidence": 0.0 },
@@ -153,16 +142,16 @@ SCHEMA (output JSON must match this structure; replace evidence arrays with conf
     "medicaid_dme_file": { /* same style booleans/confidence as needed */ },
     "commercial_dme_file": { /* same style booleans/confidence as needed */ },
     "workerscomp_dme_file": { /* same style booleans/confidence as needed */ }
-  },
-
-  "meta": {
+  }""",
+    "meta": """{
     "document_type_guess": { "value": null, "confidence": 0.0 },
     "pages_checked": [1,2],
     "extraction_confidence": 0.0,
     "notes": null
-  }
+  }""",
 }
 
+_SCHEMA_GUIDELINES = """
 FINAL:
 - Produce ONLY the JSON object (matching schema). Do not return any commentary.
 - If no fields could be extracted at all, return the schema with all values null and confidence 0.0.
@@ -171,13 +160,45 @@ EXTRACTION GUIDELINES / TIPS:
 - Use headings and neighboring text to decide scope (e.g., "Patient:", "DOB:", "Policy #", "NPI", "HCPCS", "ICD-10").
 - Validate IDs (NPI=10 digits, ICD10 pattern, HCPCS pattern, MBI length ~11) but include value anyway if pattern fails; assign confidence appropriately.
 - For signatures and checkboxes, assign confidence to reflect certainty of presence.
-- For ambiguous or multiple candidates, populate `candidates` with value, confidence, and reason.
+- For ambiguous or multiple candidates, keep the best one and lower its confidence.
 """
 
+# To avoid KeyError with .format(), use a placeholder for the schema and inject it at runtime.
+MEDICAL_DOC_SCHEMA = (
+    "\nGOAL:\n"
+    "From the OCR content, extract every field described in the Medical Extraction / Compliance checklist (patient demographics, insurance/billing, provider/prescriber, clinical documentation, DME/orders, financials, delivery/proof, administrative/tracking, and Medicare/Medicaid/Commercial/WorkersComp checklist items). Produce a single JSON object that exactly follows the schema below.\n\n"
+    + _SCHEMA_OUTPUT_RULES.lstrip("\n")
+    + "\nSCHEMA (output JSON must match this structure; replace evidence arrays with confidence):\n\n{\n"
+    + ",\n\n".join(f'  "{name}": {schema}' for name, schema in MEDICAL_DOC_SECTIONS.items())
+    + "\n}\n"
+    + _SCHEMA_GUIDELINES
+)
+
+
+def medical_doc_section_schema(section: str) -> str:
+    """Schema prompt asking for a single top-level section of MEDICAL_DOC_SCHEMA"""
+    return (
+        "\nGOAL:\n"
+        f"From the OCR content, extract only the \"{section}\" section of the Medical Extraction / Compliance checklist. "
+        f"Produce a single JSON object whose only top-level key is \"{section}\" and that exactly follows the schema below.\n\n"
+        + _SCHEMA_OUTPUT_RULES.lstrip("\n")
+        + f"\nSCHEMA (output JSON must match this structure):\n\n{{\n  \"{section}\": {MEDICAL_DOC_SECTIONS[section]}\n}}\n"
+        + _SCHEMA_GUIDELINES
+    )
+
+
 human_prompt_doc_extraction = (
     "Here is the OCR Markdown content:\n"
     "{markdown_content}\n\n"
     "Now extract the information into this schema. "
     "Return ONLY valid JSON, with no extra text or formatting:\n"
     "{schema}\n"
-)
\ No newline at end of file
+)
+
+human_prompt_doc_section_extraction = (
+    "Here is the OCR Markdown content:\n"
+    "{markdown_content}\n\n"
+    "Now extract only the \"{section}\" section into this schema. "
+    "Return ONLY valid JSON, with no extra text or formatting:\n"
+    "{schema}\n"
+)
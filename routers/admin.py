@@ -15,7 +15,9 @@ from models.pydantic_models.admin_pydantic_models import (
     AddAllowedEmailResponse
 )
 from services.auth_service import get_current_admin_user
-from services.db_service import DatabaseService
+from services.db_service import DatabaseService, AUDIT_LOG_COUNT_MODES
+from services.principal_cache import principal_cache
+from services.audit_service import audit_log_writer
 from datetime import UTC
 
 
@@ -32,23 +34,63 @@ async def get_audit_logs(
     user_id: Optional[int] = None,
     date_range: Optional[str] = None,
     user_type: Optional[str] = None,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    count_mode: Optional[str] = None,
     current_user: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Get audit logs with comprehensive filtering and pagination (admin only)"""
+    """
+    Get audit logs with comprehensive filtering and pagination (admin only).
+
+    Every response carries pagination.next_cursor; pass it back as `cursor` to get the next page.
+    `page` is deprecated: it pages with OFFSET and is rejected with 400 past
+    settings.audit_log_max_page_offset rows.
+    """
+    if count_mode and count_mode not in AUDIT_LOG_COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"count_mode must be one of: {', '.join(AUDIT_LOG_COUNT_MODES)}")
+    if not cursor:
+        try:
+            DatabaseService.audit_log_page_offset(page, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     # Log admin audit log access
     DatabaseService.create_audit_log(
         db=db,
         user_id=current_user.id,
         category="system_admin",
-        action_details=f"Admin {current_user.email} accessed audit logs with filters: category='{category}', user_id={user_id}, date_range='{date_range}', user_type='{user_type}', limit={limit}, page={page}",
+        action_details=f"Admin {current_user.email} accessed audit logs with filters: category='{category}', user_id={user_id}, date_range='{date_range}', user_type='{user_type}', search='{search}', limit={limit}, page={page}",
         request=request
     )
     
     return DatabaseService.get_audit_logs_enhanced_filter(
-        db, category, user_id, date_range, user_type, limit, page
+        db, category, user_id, date_range, user_type, limit, page, cursor, count_mode, search
+    )
+
+@router.post("/audit-logs/replay-dead-letters")
+async def replay_audit_log_dead_letters(
+    request: Request,
+    limit: Optional[int] = None,
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Move audit log events the buffer dead-lettered back into it for another write attempt (admin only)"""
+    try:
+        replayed = audit_log_writer.replay_dead_letters(limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    DatabaseService.create_audit_log(
+        db=db,
+        user_id=current_user.id,
+        category="system_admin",
+        action_details=f"Admin {current_user.email} replayed {replayed} dead-lettered audit log events",
+        request=request
     )
 
+    return {"replayed": replayed}
+
 @router.get("/users", response_model=List[UserListResponse])
 async def get_all_users(
     request: Request,
@@ -112,6 +154,7 @@ async def deactivate_user(
         user.is_active = False
         user.updated_at = datetime.now(UTC)
         db.commit()
+        principal_cache.invalidate(user.email)
         
         # Log admin action
         DatabaseService.create_audit_log(
@@ -172,6 +215,7 @@ async def reactivate_user(
         user.is_active = True
         user.updated_at = datetime.now(UTC)
         db.commit()
+        principal_cache.invalidate(user.email)
         
         # Log admin action
         DatabaseService.create_audit_log(
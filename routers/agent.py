@@ -9,7 +9,6 @@ from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
 from datetime import datetime, UTC
-from pydantic import BaseModel
 import asyncio
 from sqlalchemy import func, distinct
 
@@ -20,24 +19,14 @@ if ROOT_PATH not in sys.path:
 
 from models.database_models import User, get_db, DocumentUpload
 from services.auth_service import get_current_active_user
-from services.openai_service import LLMService
 from config import settings
-from langchain_core.messages import SystemMessage, HumanMessage
-from prompt_registry import *
 from services.aws_service import FileHandler
-from services.celery_service import celery_app, multi_pdf_processing_task
-from services.redis_service import RedisService
-from services.pdf_service import PdfProcessor
+from services.celery_service import celery_app, process_document_task, record_group_document_result
 from services.db_service import DatabaseService
+from services.container import get_file_handler, get_redis_service
+from services.tracing_service import store_group_traceparent
 
 logger = logging.getLogger(__name__)
-redis_service = RedisService()
-
-try:
-    pdf_processor_instance = PdfProcessor()
-except ImportError as e:
-    logger.warning(f"Could not import PdfProcessor: {e}")
-    pdf_processor_instance = None
 logger.setLevel(logging.INFO)
 if not logger.hasHandlers():
     handler = logging.StreamHandler()
@@ -47,12 +36,6 @@ if not logger.hasHandlers():
 
 router = APIRouter(prefix="/agent", tags=["Mental Health Agent"])
 
-# Initialize file handler
-file_handler = FileHandler()    
-
-# Initialize services
-llm_service = LLMService()
-
 @router.get("/health/celery")
 async def check_celery_health():
     """Check if Celery is properly configured and connected"""
@@ -65,9 +48,10 @@ async def check_celery_health():
         registered_tasks = list(celery_app.tasks.keys())
         logger.info(f"Registered Celery tasks: {registered_tasks}")
         
-        # Check if our specific task is registered
-        if 'multi_pdf_processing' not in registered_tasks:
-            return {"status": "error", "message": "multi_pdf_processing task not registered"}
+        # Check if our pipeline tasks are registered
+        for task_name in ['process_document', 'merge_group_results']:
+            if task_name not in registered_tasks:
+                return {"status": "error", "message": f"{task_name} task not registered"}
         
         # Try to inspect the worker
         try:
@@ -104,6 +88,8 @@ async def analyze_medical_doc(
     files: list[UploadFile] = File(...),   
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
+    file_handler: FileHandler = Depends(get_file_handler),
+    redis_service = Depends(get_redis_service),
     request: Request = None
 ):
     """
@@ -146,85 +132,119 @@ async def analyze_medical_doc(
                 'size': file_size
             })
 
-        # Upload all files to S3 and create database records
-        uploaded_documents = []
-        s3_results = []
-        
-        for i, file_data in enumerate(validated_files):
-            file = file_data['file']
-            file_size = file_data['size']
-            
-            logger.info(f"Uploading file {i+1}/{len(validated_files)}: {file.filename} to S3")
-            s3_result = file_handler.save_pdf_to_s3(file)
-            
-            if not s3_result["success"]:
-                logger.error(f"Failed to upload PDF to S3 for file {file.filename}")
-                raise HTTPException(status_code=500, detail=f"Failed to upload PDF to S3: {file.filename}")
-
-            logger.info(f"File {file.filename} uploaded to S3 at {s3_result['s3_key']}")
-
-            # Save the document upload to the database
-            document_upload = DocumentUpload(
+        # Pre-assign S3 keys so every DocumentUpload row can be written in a single
+        # transaction before the uploads start
+        file_ids = [str(uuid.uuid4()) for _ in validated_files]
+        uploaded_documents = [
+            DocumentUpload(
                 user_id=current_user.id,
-                document_group_id=group_id, 
-                original_filename=s3_result["original_filename"],
-                s3_file_path=s3_result["s3_key"],
-                file_size=file_size,
+                document_group_id=group_id,
+                original_filename=file_data['file'].filename,
+                s3_file_path=FileHandler.build_upload_s3_key(file_id),
+                file_size=file_data['size'],
                 extraction_status="pending"  # Initial status
             )
-            db.add(document_upload)
-            db.commit()
-            db.refresh(document_upload)
-            
-            uploaded_documents.append(document_upload)
-            s3_results.append(s3_result)
-            
-            logger.info(f"Document upload record created for user {current_user.id}, file {s3_result['original_filename']} with ID {document_upload.id}")
+            for file_data, file_id in zip(validated_files, file_ids)
+        ]
+        db.add_all(uploaded_documents)
+        db.flush()  # Batched INSERT ... RETURNING id for all rows
+
+        # Capture the response fields before commit expires the instances,
+        # otherwise every attribute access would trigger a refresh SELECT
+        document_summaries = [
+            {
+                "document_id": doc.id,
+                "original_filename": doc.original_filename,
+                "file_size": doc.file_size
+            }
+            for doc in uploaded_documents
+        ]
+        document_ids = [doc["document_id"] for doc in document_summaries]
+        db.commit()
+
+        logger.info(f"Document upload records created for user {current_user.id}: {document_ids}")
 
         # Generate unique task ID for Redis tracking
         task_id = f"multi_pdf_processing_{group_id}_{str(uuid.uuid4())[:8]}"
-        
-        # Delegate multi-document processing to Celery task
+        total_documents = len(validated_files)
+
+        # Later work on this group (document generation) joins the upload's trace
+        store_group_traceparent(redis_service, group_id)
+
+        redis_service.update_task_progress(
+            task_id=task_id,
+            stage="starting",
+            progress=0,
+            message=f"Initializing multi-document processing for {total_documents} documents",
+            data={"document_ids": document_ids, "user_id": current_user.id, "group_id": group_id}
+        )
+
+        # Upload all files to S3 concurrently and queue each document's pipeline task
+        # as soon as its own upload lands. save_pdf_to_s3 is blocking (encryption + boto3),
+        # so each upload runs in a worker thread, bounded by a semaphore. The last
+        # document to finish processing triggers the group merge (see record_group_document_result).
         logger.info(f"Delegating multi-document processing to Celery for group {group_id} with task_id {task_id}")
-        try:
-            # Create list of document IDs and S3 keys for the task
-            document_ids = [doc.id for doc in uploaded_documents]
-            s3_keys = [result["s3_key"] for result in s3_results]
-            
-            logger.info(f"Task parameters - document_ids: {document_ids}, s3_keys: {s3_keys}, user_id: {current_user.id}, task_id: {task_id}, group_id: {group_id}")
-            
-            # Check if Celery app is properly configured
-            if not celery_app:
-                raise Exception("Celery app is not properly initialized")
-            
-            # Check if the task is properly registered
-            if not hasattr(multi_pdf_processing_task, 'apply_async'):
-                raise Exception("multi_pdf_processing_task is not properly registered as a Celery task")
-            
-            task = multi_pdf_processing_task.apply_async(
-                args=[document_ids, s3_keys, current_user.id, task_id, group_id],
-                task_id=task_id
-            )
-            logger.info(f"Multi-document processing task queued successfully with task ID: {task.id}")
-            
-            # Verify task was queued
-            if not task.id:
-                raise Exception("Task was not queued - no task ID returned")
-                
-        except Exception as e:
-            logger.error(f"Failed to queue multi-document processing task: {e}")
-            logger.error(f"Task delegation error details: {type(e).__name__}: {str(e)}")
-            import traceback
-            logger.error(f"Full traceback: {traceback.format_exc()}")
-            
-            # Update all document statuses to failed
-            for doc in uploaded_documents:
-                doc.extraction_status = "failed"
-                doc.processing_error = f"Failed to queue processing task: {str(e)}"
+        upload_semaphore = asyncio.Semaphore(max(1, settings.s3_upload_concurrency))
+
+        async def upload_and_dispatch(i: int, file: UploadFile) -> Optional[Exception]:
+            try:
+                async with upload_semaphore:
+                    logger.info(f"Uploading file {i+1}/{total_documents}: {file.filename} to S3")
+                    s3_result = await asyncio.to_thread(file_handler.save_pdf_to_s3, file, file_ids[i])
+
+                if not s3_result["success"]:
+                    raise Exception(f"Failed to upload PDF to S3: {file.filename}")
+
+                logger.info(f"File {file.filename} uploaded to S3 at {s3_result['s3_key']}")
+
+                task = process_document_task.apply_async(
+                    args=[document_ids[i], s3_result["s3_key"], current_user.id, task_id, group_id, i, total_documents],
+                    task_id=f"{task_id}_doc_{i}"
+                )
+                logger.info(f"Processing task queued for document {document_ids[i]} with task ID: {task.id}")
+                return None
+
+            except Exception as e:
+                logger.error(f"Failed to upload or queue document {i+1}/{total_documents} ({file.filename}): {type(e).__name__}: {str(e)}")
+                return e
+
+        errors = await asyncio.gather(*[
+            upload_and_dispatch(i, file_data['file']) for i, file_data in enumerate(validated_files)
+        ])
+
+        failed = [(i, e) for i, e in enumerate(errors) if e is not None]
+        if failed:
+            for i, e in failed:
+                uploaded_documents[i].extraction_status = "failed"
+                uploaded_documents[i].processing_error = f"Failed to upload or queue processing task: {str(e)}"
             db.commit()
-            raise HTTPException(status_code=500, detail=f"Failed to queue multi-document processing task: {str(e)}")
 
-        logger.info(f"Multi-document upload initiated successfully for user {current_user.id}, {len(files)} files")
+        failed_files = [
+            {
+                "document_id": document_ids[i],
+                "original_filename": validated_files[i]['file'].filename,
+                "error": f"Failed to upload or queue processing task: {str(e)}"
+            }
+            for i, e in failed
+        ]
+        if len(failed) == total_documents:
+            # Nothing was queued, so the group barrier is left alone and no merge runs
+            redis_service.update_task_progress(
+                task_id=task_id,
+                stage="failed",
+                progress=0,
+                message=f"Failed to upload or queue processing for all {total_documents} documents"
+            )
+            raise HTTPException(status_code=500, detail=f"Failed to upload or queue processing for: {[f['original_filename'] for f in failed_files]}")
+
+        # Documents that never reached the pipeline still report to the group
+        # barrier, so the documents already queued can be merged
+        for i, _ in failed:
+            record_group_document_result(task_id, group_id, current_user.id, i, total_documents, None, redis_service)
+
+        # Some documents are already queued, so the client still gets the task to follow
+        queued_documents = total_documents - len(failed)
+        logger.info(f"Multi-document upload initiated for user {current_user.id}: {queued_documents}/{total_documents} files queued")
         
         # Create audit log for document analysis initiation
         DatabaseService.create_audit_log(
@@ -236,24 +256,25 @@ async def analyze_medical_doc(
             request=request
         )
         
+        if failed_files:
+            message = f"{queued_documents} of {total_documents} PDF(s) uploaded and processing started, {len(failed_files)} failed"
+        else:
+            message = f"{len(files)} PDF(s) uploaded successfully and processing started"
+
         return {
-            "message": f"{len(files)} PDF(s) uploaded successfully and processing started",
+            "message": message,
             "group_id": group_id,
-            "total_documents": len(uploaded_documents),
-            "documents": [
-                {
-                    "document_id": doc.id,
-                    "original_filename": doc.original_filename,
-                    "file_size": doc.file_size
-                }
-                for i, doc in enumerate(uploaded_documents)
-            ],
+            "total_documents": len(document_summaries),
+            "documents": document_summaries,
+            "failed_files": failed_files,
             "processing_status": "pending",
             "task_id": task_id,
             "stream_url": f"/agent/stream-status/{task_id}",
             "status_url": f"/agent/task-status/{task_id}"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing PDFs for user {getattr(current_user, 'id', 'unknown')}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing PDFs: {str(e)}")
@@ -265,6 +286,7 @@ async def get_user_document_groups(
     page_size: int = Query(10, ge=1, le=50, description="Number of items per page (max 50)"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
+    redis_service = Depends(get_redis_service),
     request: Request = None
 ):
     """
@@ -556,14 +578,13 @@ async def get_merged_json_result(
         raise HTTPException(status_code=500, detail=f"Error retrieving merged JSON result: {str(e)}")
 
 @router.get("/stream-status/{task_id}")
-async def stream_processing_status(task_id: str, request: Request = None):
+async def stream_processing_status(task_id: str, request: Request = None, redis_service = Depends(get_redis_service)):
     """SSE endpoint to stream processing status from Redis"""
     
     # Log stream status access (no audit log needed for anonymous streaming)
     logger.info(f"Stream status accessed for task: {task_id}")
     
     async def event_generator():
-        redis_service = RedisService()
         last_progress = -1
         last_stage = None
         retry_count = 0
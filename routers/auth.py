@@ -5,7 +5,7 @@ from datetime import timedelta, datetime, UTC
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # Add project root to sys.path for absolute imports
 ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -15,12 +15,13 @@ if ROOT_PATH not in sys.path:
 from models.database_models import User, AllowedEmail, get_db
 from models.pydantic_models.auth_pydantic_models import (UserCreate, UserResponse, UserUpdate, Token, SignupResponse, UserLogin)
 from services.auth_service import (
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
     create_access_token,
     get_current_active_user
 )
-from services.db_service import DatabaseService
+from services.db_service import DatabaseService, AUDIT_LOG_COUNT_MODES
+from services.principal_cache import principal_cache
 from config import settings
 logger = logging.getLogger(__name__)
 
@@ -43,7 +44,6 @@ async def signup(user: UserCreate, request: Request, db: Session = Depends(get_d
             category="authentication",
             action_details=f"Signup attempt failed for email {user.email} - not in allowed list",
             resource_type="allowed_emails",
-            resource_id=allowed_email.id,
             request=request
         )
         raise HTTPException(
@@ -92,7 +92,7 @@ async def signup(user: UserCreate, request: Request, db: Session = Depends(get_d
         last_name=user.last_name,
         username=user.username,
         email=user.email,
-        hashed_password=get_password_hash(user.password)
+        hashed_password=await get_password_hash_async(user.password)
     )
 
     try:
@@ -179,7 +179,9 @@ async def login(
     """Login user and return JWT token"""
     # Find user by email
     user = db.query(User).filter(User.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    # Nothing else needs the connection; don't hold it while bcrypt runs
+    db.release()
+    if not user or not await verify_password_async(credentials.password, user.hashed_password):
         # Log failed login attempt
         DatabaseService.create_audit_log(
             db=db,
@@ -187,7 +189,7 @@ async def login(
             category="authentication",
             action_details=f"Failed login attempt for email {credentials.email} - incorrect credentials",
             resource_type="users",
-            resource_id=user.id,
+            resource_id=user.id if user else None,
             request=request
         )
         
@@ -263,24 +265,33 @@ async def update_user_info(
     db: Session = Depends(get_db)
 ):
     """Update current user information"""
+    # current_user may come from the principal cache (detached), so modify the stored row
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    previous_email = user.email
+
     # Track what fields are being updated
     updated_fields = []
     
     if user_update.first_name is not None:
-        current_user.first_name = user_update.first_name
+        user.first_name = user_update.first_name
         updated_fields.append("first_name")
     if user_update.last_name is not None:
-        current_user.last_name = user_update.last_name
+        user.last_name = user_update.last_name
         updated_fields.append("last_name")
     if user_update.username is not None:
-        current_user.username = user_update.username
+        user.username = user_update.username
         updated_fields.append("username")
         
     if user_update.email is not None:
         # Check if email is already taken
         if (db.query(User)
             .filter(User.email == user_update.email)
-            .filter(User.id != current_user.id)
+            .filter(User.id != user.id)
             .first()):
             
             # Log failed update attempt
@@ -298,15 +309,18 @@ async def update_user_info(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-        current_user.email = user_update.email
+        user.email = user_update.email
         updated_fields.append("email")
     if user_update.password is not None:
-        current_user.hashed_password = get_password_hash(user_update.password)
+        user.hashed_password = await get_password_hash_async(user_update.password)
         updated_fields.append("password")
     
     try:
         db.commit()
-        db.refresh(current_user)
+        db.refresh(user)
+        principal_cache.invalidate(previous_email)
+        if user.email != previous_email:
+            principal_cache.invalidate(user.email)
         
         # Log successful update
         if updated_fields:
@@ -314,13 +328,13 @@ async def update_user_info(
                 db=db,
                 user_id=current_user.id,
                 category="user_management",
-                action_details=f"User {current_user.email} updated fields: {', '.join(updated_fields)}",
+                action_details=f"User {user.email} updated fields: {', '.join(updated_fields)}",
                 resource_type="users",
                 resource_id=current_user.id,
                 request=request
             )
         
-        return current_user
+        return user
     except IntegrityError:
         db.rollback()
         
@@ -328,7 +342,6 @@ async def update_user_info(
         DatabaseService.create_audit_log(
             db=db,
             user_id=current_user.id,
-            action="user_update_failed",
             category="user_management",
             action_details=f"User {current_user.email} failed to update profile - integrity error",
             request=request
@@ -344,15 +357,19 @@ async def update_user_info(
 async def get_user_audit_logs(
     request: Request,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count_mode: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get current user's audit logs"""
+    """Get current user's audit logs, newest first; pass pagination.next_cursor back as `cursor` for the next page"""
+    if count_mode and count_mode not in AUDIT_LOG_COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"count_mode must be one of: {', '.join(AUDIT_LOG_COUNT_MODES)}")
+
     # Log audit log access
     DatabaseService.create_audit_log(
         db=db,
         user_id=current_user.id,
-        action="audit_logs_accessed",
         category="data_access",
         action_details=f"User {current_user.email} accessed their audit logs",
         resource_type="users",
@@ -360,6 +377,6 @@ async def get_user_audit_logs(
         request=request
     )
     
-    return DatabaseService.get_user_audit_logs(db, current_user.id, limit)
+    return DatabaseService.get_user_audit_logs(db, current_user.id, limit, cursor, count_mode)
 
  
\ No newline at end of file
@@ -3,7 +3,6 @@ import os
 import json
 import logging
 from typing import List
-from rich import print
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
@@ -17,11 +16,10 @@ if ROOT_PATH not in sys.path:
 from models.database_models import User, get_db, DocumentUpload, Templates, GeneratedDocument
 from models.pydantic_models.document_pydantic_models import GenerateDocumentRequest
 from services.auth_service import get_current_active_user
-from services.openai_service import LLMService
-from services.pdf_service import PdfProcessor
-from services.aws_service import file_handler
-from services.redis_service import RedisService
 from services.db_service import DatabaseService
+from services.container import get_file_handler, get_llm_service, get_pdf_processor, get_redis_service
+from services.request_timing import timed
+from services.tracing_service import tracer, get_group_traceparent
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -32,15 +30,13 @@ if not logger.hasHandlers():
     logger.addHandler(handler)
 
 router = APIRouter(prefix="/templates", tags=["Templates"])
-openai_service = LLMService()
-pdf_processor = PdfProcessor()
-redis_service = RedisService()
 
 
 @router.get("/")
 async def get_templates(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
+    redis_service = Depends(get_redis_service),
     request: Request = None
 ):
     """
@@ -108,6 +104,9 @@ async def generate_document(
     request: GenerateDocumentRequest,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
+    openai_service = Depends(get_llm_service),
+    pdf_processor = Depends(get_pdf_processor),
+    redis_service = Depends(get_redis_service),
     http_request: Request = None
 ):
     """
@@ -163,7 +162,6 @@ async def generate_document(
         # Get the merged JSON using merge_json_responses from openai_service
         json_result = openai_service.merge_json_responses(doc_jsons)
         json_result = json.loads(json_result)
-        print(json_result)
 
         # Fetch templates from database and then using the s3 paths to get PDFs from the s3 bucket
         templates = db.query(Templates).filter(
@@ -183,9 +181,20 @@ async def generate_document(
             )
         
         logger.info(f"Processing {len(valid_templates)} valid PDF templates out of {len(templates)} requested")
+
+        # Return the connection to the pool before the S3 downloads, PDF filling and uploads;
+        # fill_pdf_templates checks one out again only to record each generated document
+        db.release()
         
-        # Initialize PDF processor and fill PDFs using PyMuPDF
-        generated_documents = pdf_processor.fill_pdf_templates(json_result, group_id, valid_templates, db)
+        # Initialize PDF processor and fill PDFs using PyMuPDF, traced as part of the group's
+        # upload trace so one trace covers upload, extraction and document generation
+        request_traceparent = tracer.current_traceparent()
+        with tracer.span(
+            "generate_document",
+            {"group_id": group_id, "template_count": len(valid_templates), "http.traceparent": request_traceparent},
+            get_group_traceparent(redis_service, group_id)
+        ):
+            generated_documents = pdf_processor.fill_pdf_templates(json_result, group_id, valid_templates, db)
 
         # Prepare response with S3 file information
         pdf_files = []
@@ -230,6 +239,7 @@ async def download_document(
     file_id: str,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db),
+    file_handler = Depends(get_file_handler),
     request: Request = None
 ):
     """
@@ -245,7 +255,6 @@ async def download_document(
     """
     try:
         from models.database_models import GeneratedDocument
-        from services.aws_service import file_handler
         
         # Find the generated document by file_id (extracted from s3_key)
         generated_doc = db.query(GeneratedDocument).filter(
@@ -263,6 +272,9 @@ async def download_document(
         
         if not documents:
             raise HTTPException(status_code=404, detail="Document group not found or access denied")
+
+        # Don't hold a database connection during the S3 download
+        db.release()
         
         # Download file from S3
         try:
@@ -272,11 +284,12 @@ async def download_document(
                 temp_path = temp_file.name
             
             # Download from S3
-            file_handler.s3_client.download_file(
-                file_handler.bucket_name,
-                generated_doc.s3_path,
-                temp_path
-            )
+            with timed("s3"):
+                file_handler.s3_client.download_file(
+                    file_handler.bucket_name,
+                    generated_doc.s3_path,
+                    temp_path
+                )
             
             # Return the file as a streaming response
             def iterfile():
@@ -324,7 +337,8 @@ async def download_document(
 async def preview_document(
     file_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    file_handler = Depends(get_file_handler)
 ):
     """
     Preview a generated PDF file from S3 in the browser.
@@ -339,7 +353,6 @@ async def preview_document(
     """
     try:
         from models.database_models import GeneratedDocument
-        from services.aws_service import file_handler
         
         # Find the generated document by file_id (extracted from s3_key)
         generated_doc = db.query(GeneratedDocument).filter(
@@ -357,6 +370,9 @@ async def preview_document(
         
         if not documents:
             raise HTTPException(status_code=404, detail="Document group not found or access denied")
+
+        # Don't hold a database connection during the S3 download
+        db.release()
         
         # Download file from S3
         try:
@@ -366,11 +382,12 @@ async def preview_document(
                 temp_path = temp_file.name
             
             # Download from S3
-            file_handler.s3_client.download_file(
-                file_handler.bucket_name,
-                generated_doc.s3_path,
-                temp_path
-            )
+            with timed("s3"):
+                file_handler.s3_client.download_file(
+                    file_handler.bucket_name,
+                    generated_doc.s3_path,
+                    temp_path
+                )
             
             # Return the file as a streaming response for inline preview
             def iterfile():
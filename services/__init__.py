@@ -1,6 +1,29 @@
-from .auth_service import *
-from .redis_service import *
-from .openai_service import *
-from .aws_service import *
-from .pdf_service import *
-from .db_service import *
+import importlib
+
+# Public names resolved on first access, so importing one service module (or the package)
+# does not pull in boto3, mistralai, langchain and PyMuPDF through the others
+_LAZY_EXPORTS = {
+    "get_current_user": "auth_service",
+    "get_current_active_user": "auth_service",
+    "get_current_admin_user": "auth_service",
+    "verify_password": "auth_service",
+    "get_password_hash": "auth_service",
+    "create_access_token": "auth_service",
+    "RedisService": "redis_service",
+    "LLMService": "openai_service",
+    "FileHandler": "aws_service",
+    "PdfProcessor": "pdf_service",
+    "DatabaseService": "db_service",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = list(_LAZY_EXPORTS)
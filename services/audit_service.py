@@ -0,0 +1,294 @@
+import json
+import uuid
+import queue
+import logging
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from config import settings
+from models.database_models import AuditLog, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Insert failures caused by the events themselves; retrying them never succeeds
+DATA_ERRORS = (DataError, IntegrityError)
+
+
+class AuditLogWriter:
+    """
+    Write-behind buffer for audit log events.
+
+    Request handlers enqueue plain dicts and return immediately; a background thread
+    writes them to the audit_logs table in bulk inserts.
+
+    Backends (settings.audit_log_backend):
+    - "memory": in-process queue, flushed every audit_log_flush_interval_seconds or when
+      audit_log_batch_size events are waiting, and drained completely on shutdown.
+    - "redis": events are pushed to a Redis list shared by all API processes. A flush moves a
+      batch to a processing list before inserting and deletes it only after the commit, so
+      events survive a crash mid-flush (at-least-once delivery). Events that can't be decoded,
+      and batches the database rejects audit_log_max_flush_attempts times (DataError,
+      IntegrityError), are moved to a dead-letter list so later events aren't stuck behind them;
+      replay_dead_letters() puts them back. Connection errors keep the batch and back off.
+    - "sync": no buffering, every event is committed by the caller (previous behaviour).
+    """
+
+    PENDING_KEY = "audit_logs:pending"
+    PROCESSING_KEY = "audit_logs:processing"
+    FLUSH_LOCK_KEY = "audit_logs:flush_lock"
+    ATTEMPTS_KEY = "audit_logs:processing_attempts"
+    DEAD_LETTER_KEY = "audit_logs:dead_letter"
+
+    # Delete the flush lock only if this flusher still holds it
+    RELEASE_LOCK_SCRIPT = """
+    if redis.call("get", KEYS[1]) == ARGV[1] then
+        return redis.call("del", KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self):
+        self.backend = settings.audit_log_backend
+        self.batch_size = settings.audit_log_batch_size
+        self.flush_interval = settings.audit_log_flush_interval_seconds
+        self._queue = queue.Queue(maxsize=settings.audit_log_buffer_max_size)
+        self._redis_client = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the background writer thread (Redis is connected on first use, not here)"""
+        if self.backend == "sync" or self.is_running:
+            return
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+        logger.info(f"Audit log writer started ({self.backend} backend, batch size {self.batch_size}, flush interval {self.flush_interval}s)")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the writer and flush every buffered event"""
+        if not self.is_running:
+            return
+
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(timeout=timeout)
+
+        # Drain whatever is left in this process; if the database is down, the events
+        # stay in Redis for the next process (in-memory events are lost)
+        try:
+            while self.flush() > 0:
+                pass
+        except Exception as e:
+            logger.error(f"Could not drain audit log buffer on shutdown: {e}")
+        logger.info("Audit log writer stopped")
+
+    def enqueue(self, event: Dict[str, Any]) -> bool:
+        """
+        Buffer an audit event (AuditLog column values).
+
+        Returns:
+            True if buffered, False if the caller should write it synchronously
+        """
+        if not self.is_running:
+            return False
+
+        self._connect()
+        try:
+            if self._redis_client is not None:
+                self._redis_client.lpush(self.PENDING_KEY, json.dumps(event, default=str))
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            logger.warning("Audit log buffer is full, writing event synchronously")
+            self._wakeup.set()
+            return False
+        except Exception as e:
+            logger.error(f"Error buffering audit log event: {e}")
+            return False
+
+        if self._redis_client is None and self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """Write one batch of buffered events. Returns the number of events written."""
+        self._connect()
+        with self._flush_lock:
+            if self._redis_client is not None:
+                return self._flush_redis()
+            return self._flush_memory()
+
+    def replay_dead_letters(self, limit: Optional[int] = None) -> int:
+        """
+        Move dead-lettered events back into the pending list (Redis backend).
+
+        Returns:
+            Number of events moved
+        """
+        self._connect()
+        if self._redis_client is None:
+            raise RuntimeError("Audit log dead letters are only kept by the redis backend")
+
+        moved = 0
+        while limit is None or moved < limit:
+            if self._redis_client.rpoplpush(self.DEAD_LETTER_KEY, self.PENDING_KEY) is None:
+                break
+            moved += 1
+        if moved:
+            logger.info(f"Replayed {moved} dead-lettered audit log events")
+            self._wakeup.set()
+        return moved
+
+    def _connect(self) -> None:
+        """Resolve the Redis backend on first use, falling back to memory if Redis is down"""
+        if self.backend != "redis" or self._redis_client is not None:
+            return
+
+        with self._connect_lock:
+            if self.backend != "redis" or self._redis_client is not None:
+                return
+            from services.container import get_container
+            redis_service = get_container().redis_service
+            if redis_service.is_connected():
+                self._redis_client = redis_service.redis_client
+            else:
+                logger.warning("Redis not connected, audit logs will be buffered in memory")
+                self.backend = "memory"
+
+    def _run(self) -> None:
+        # Connect from this thread so the first request usually finds the backend resolved
+        self._connect()
+        failures = 0
+        while not self._stopping.is_set():
+            if failures:
+                # Back off while the database is unreachable instead of retrying every interval
+                self._stopping.wait(min(self.flush_interval * 2 ** min(failures, 10), settings.audit_log_max_backoff_seconds))
+            else:
+                self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            try:
+                # Keep flushing while full batches are waiting
+                while self.flush() >= self.batch_size:
+                    pass
+                failures = 0
+            except Exception as e:
+                failures += 1
+                logger.error(f"Audit log writer flush failed ({failures} in a row): {e}")
+
+    def _flush_memory(self) -> int:
+        events = []
+        while len(events) < self.batch_size:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if not events:
+            return 0
+
+        try:
+            self._insert(events)
+        except Exception:
+            # Put the batch back so the next flush retries it
+            for event in events:
+                try:
+                    self._queue.put_nowait(event)
+                except queue.Full:
+                    logger.error(f"Audit log buffer full, dropping event: {event.get('category')}")
+            raise
+        return len(events)
+
+    def _flush_redis(self) -> int:
+        client = self._redis_client
+
+        # Only one process flushes at a time; the lock expires if its holder dies, and the
+        # token keeps a flusher that outlived it from releasing another process's lock
+        token = uuid.uuid4().hex
+        if not client.set(self.FLUSH_LOCK_KEY, token, nx=True, px=int(max(self.flush_interval, 1) * 10000)):
+            return 0
+
+        try:
+            # Events left in the processing list by an interrupted flush are written first
+            raw_events = client.lrange(self.PROCESSING_KEY, 0, -1)
+            if not raw_events:
+                pipe = client.pipeline(transaction=False)
+                for _ in range(self.batch_size):
+                    pipe.rpoplpush(self.PENDING_KEY, self.PROCESSING_KEY)
+                raw_events = [raw for raw in pipe.execute() if raw is not None]
+
+            if not raw_events:
+                return 0
+
+            events, decoded, undecodable = [], [], []
+            for raw in raw_events:
+                try:
+                    events.append(self._decode(raw))
+                    decoded.append(raw)
+                except (ValueError, TypeError):
+                    undecodable.append(raw)
+            if undecodable:
+                self._dead_letter(undecodable, "could not be decoded")
+            if not events:
+                return 0
+
+            try:
+                self._insert(events)
+            except DATA_ERRORS:
+                attempts = client.incr(self.ATTEMPTS_KEY)
+                if attempts < settings.audit_log_max_flush_attempts:
+                    raise
+                self._dead_letter(decoded, f"rejected by the database {attempts} times")
+                client.delete(self.ATTEMPTS_KEY)
+                return 0
+
+            pipe = client.pipeline(transaction=True)
+            pipe.delete(self.PROCESSING_KEY)
+            pipe.delete(self.ATTEMPTS_KEY)
+            pipe.execute()
+            return len(events)
+        finally:
+            client.eval(self.RELEASE_LOCK_SCRIPT, 1, self.FLUSH_LOCK_KEY, token)
+
+    @staticmethod
+    def _decode(raw: str) -> Dict[str, Any]:
+        event = json.loads(raw)
+        if event.get("created_at"):
+            event["created_at"] = datetime.fromisoformat(event["created_at"])
+        return event
+
+    def _dead_letter(self, raw_events: List[str], reason: str) -> None:
+        """Move events out of the processing list into the dead-letter list"""
+        pipe = self._redis_client.pipeline(transaction=True)
+        pipe.rpush(self.DEAD_LETTER_KEY, *raw_events)
+        for raw in raw_events:
+            pipe.lrem(self.PROCESSING_KEY, 1, raw)
+        pipe.execute()
+        logger.error(f"Moved {len(raw_events)} audit log events to {self.DEAD_LETTER_KEY}: {reason}")
+
+    def _insert(self, events: List[Dict[str, Any]]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditLog), events)
+            db.commit()
+            logger.info(f"Flushed {len(events)} audit log events")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error writing {len(events)} audit log events: {e}")
+            raise
+        finally:
+            db.close()
+
+
+# Global instance, started and stopped by the application lifespan
+audit_log_writer = AuditLogWriter()
@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, UTC
 from typing import Optional
 from jose import JWTError, jwt
@@ -9,9 +11,16 @@ from fastapi.security import HTTPBearer
 from config import settings
 from models.database_models import User, get_db
 from models.pydantic_models.auth_pydantic_models import TokenData
+from services.principal_cache import principal_cache, principal_from_user, user_from_principal
+from services.request_timing import timed
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+# bcrypt takes hundreds of milliseconds per call; run it on a dedicated, bounded pool so it
+# never blocks the event loop and a burst of logins cannot queue without limit
+_password_executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="password-hash")
+_pending_password_jobs = 0
 
 # HTTP Bearer scheme for token
 security = HTTPBearer()
@@ -24,6 +33,31 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+async def _run_password_job(func, *args):
+    global _pending_password_jobs
+    if _pending_password_jobs >= settings.password_hash_max_pending:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    _pending_password_jobs += 1
+    try:
+        loop = asyncio.get_running_loop()
+        with timed("auth"):
+            return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _pending_password_jobs -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash on the password hashing pool"""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash on the password hashing pool"""
+    return await _run_password_job(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token
     We will first check if the expires_delta value is provided or not.
@@ -44,6 +78,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     )
     return encoded_jwt
 
+def get_user_principal(db: Session, email: str) -> Optional[User]:
+    """
+    Resolve the user for a JWT subject, from the principal cache when possible.
+
+    Cached users are detached from the session (and carry no password hash); load the
+    user from the database before modifying it.
+    """
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return user_from_principal(principal)
+
+    user = db.query(User).filter(User.email == email).first()
+    if user is not None:
+        principal_cache.set(email, principal_from_user(user))
+    return user
+
 async def get_current_user(
     token: HTTPBearer = Depends(security),
     db: Session = Depends(get_db)
@@ -55,20 +105,21 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(
-            token.credentials, 
-            settings.jwt_secret_key, 
-            algorithms=[settings.jwt_algorithm]
-        )
-        email: str = payload.get("sub")
-        if email is None:
+    with timed("auth"):
+        try:
+            payload = jwt.decode(
+                token.credentials, 
+                settings.jwt_secret_key, 
+                algorithms=[settings.jwt_algorithm]
+            )
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+            token_data = TokenData(email=email)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == token_data.email).first()
+        
+        user = get_user_principal(db, token_data.email)
     if user is None:
         raise credentials_exception
     return user
@@ -96,7 +147,7 @@ async def get_current_user_from_token(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = get_user_principal(db, token_data.email)
     if user is None:
         raise credentials_exception
     return user
@@ -1,4 +1,3 @@
-import boto3
 import uuid
 import logging
 import tempfile
@@ -8,6 +7,9 @@ from fastapi import UploadFile, HTTPException
 from fastapi.responses import FileResponse
 from config import settings
 from cryptography.fernet import Fernet
+from services.metrics_service import pipeline_metrics
+from services.request_timing import timed
+from services.tracing_service import traced
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,8 @@ class FileHandler:
     """Service for handling PDF uploads and S3 operations with HIPAA compliance"""
     
     def __init__(self):
+        # boto3 is slow to import; only processes that touch S3 pay for it
+        import boto3
         from botocore.config import Config
         
         # Configure S3 client with proper timeout settings
@@ -29,6 +33,7 @@ class FileHandler:
             aws_access_key_id=settings.aws_access_key_id,
             aws_secret_access_key=settings.aws_secret_access_key,
             region_name=settings.aws_region,
+            endpoint_url=settings.aws_endpoint_url or None,
             config=config
         )
         self.bucket_name = settings.aws_bucket_name
@@ -76,14 +81,20 @@ class FileHandler:
     def decrypt_data(self, encrypted_data: bytes) -> bytes:
         return self.cipher_suite.decrypt(encrypted_data)
 
+    @staticmethod
+    def build_upload_s3_key(file_id: str) -> str:
+        """S3 key under which save_pdf_to_s3 stores an uploaded PDF"""
+        file_extension = ".pdf"
+        return f"medical_pdf_uploads/{file_id}{file_extension}"
+
+    @traced("s3.upload_document")
     def save_pdf_to_s3(self, file: UploadFile, file_id: str = None) -> dict:
         """Save uploaded PDF file to S3 with encryption"""
         try:
             if not file_id:
                 file_id = str(uuid.uuid4())
 
-            file_extension = ".pdf"
-            s3_key = f"medical_pdf_uploads/{file_id}{file_extension}"
+            s3_key = self.build_upload_s3_key(file_id)
 
             logger.info(f"Uploading PDF: {file.filename} -> S3 key: {s3_key}")
 
@@ -108,7 +119,7 @@ class FileHandler:
                 temp_path = temp_file.name
 
             # Upload encrypted file to S3
-            with open(temp_path, "rb") as encrypted_file:
+            with open(temp_path, "rb") as encrypted_file, timed("s3"):
                 self.s3_client.upload_fileobj(
                     encrypted_file,
                     self.bucket_name,
@@ -140,6 +151,7 @@ class FileHandler:
             logger.error(f"Error uploading PDF to S3: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to upload PDF: {str(e)}")
 
+    @traced("s3.load_document")
     def load_pdf_from_s3(self, s3_key: str) -> str:
         """
         Download and decrypt PDF file from S3.
@@ -151,19 +163,21 @@ class FileHandler:
             with tempfile.NamedTemporaryFile(delete=False, suffix=".enc") as tmp_download_file:
                 tmp_download_path = tmp_download_file.name
 
-            self.s3_client.download_file(self.bucket_name, s3_key, tmp_download_path)
+            with pipeline_metrics.time_stage("s3_download"), timed("s3"):
+                self.s3_client.download_file(self.bucket_name, s3_key, tmp_download_path)
 
-            with open(tmp_download_path, "rb") as f:
-                encrypted_content = f.read()
+                with open(tmp_download_path, "rb") as f:
+                    encrypted_content = f.read()
 
-            # Try decrypting
-            decrypted_content = self.decrypt_data(encrypted_content)
+            with pipeline_metrics.time_stage("decrypt"):
+                # Try decrypting
+                decrypted_content = self.decrypt_data(encrypted_content)
 
-            # Save decrypted content as PDF temp file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_decrypted_file:
-                tmp_decrypted_file.write(decrypted_content)
-                tmp_decrypted_file.flush()
-                decrypted_path = tmp_decrypted_file.name
+                # Save decrypted content as PDF temp file
+                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_decrypted_file:
+                    tmp_decrypted_file.write(decrypted_content)
+                    tmp_decrypted_file.flush()
+                    decrypted_path = tmp_decrypted_file.name
 
             return decrypted_path
 
@@ -178,6 +192,7 @@ class FileHandler:
                 except Exception as e:
                     logger.warning(f"Failed to cleanup temp file {tmp_download_path}: {e}")
 
+    @traced("s3.load_markdown")
     def load_markdown_from_s3(self, s3_url: str) -> str:
         """
         Load markdown content from S3 URL.
@@ -211,8 +226,9 @@ class FileHandler:
             logger.info(f"Loading markdown from S3: bucket={bucket_name}, key={s3_key}")
             
             # Download the markdown file from S3
-            response = self.s3_client.get_object(Bucket=bucket_name, Key=s3_key)
-            markdown_content = response['Body'].read().decode('utf-8')
+            with timed("s3"):
+                response = self.s3_client.get_object(Bucket=bucket_name, Key=s3_key)
+                markdown_content = response['Body'].read().decode('utf-8')
             
             logger.info(f"Successfully loaded markdown from S3: {len(markdown_content)} characters")
             return markdown_content
@@ -221,6 +237,7 @@ class FileHandler:
             logger.error(f"Error loading markdown from S3 URL {s3_url}: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to load markdown from S3: {str(e)}")
 
+    @traced("s3.download_template")
     def download_pdf_template_from_s3(self, s3_path: str) -> str:
         """
         Download a PDF template from S3 (unencrypted).
@@ -258,11 +275,12 @@ class FileHandler:
                 temp_path = temp_file.name
             
             # Download PDF template from S3 (unencrypted)
-            self.s3_client.download_file(
-                self.bucket_name,
-                s3_key,
-                temp_path
-            )
+            with timed("s3"):
+                self.s3_client.download_file(
+                    self.bucket_name,
+                    s3_key,
+                    temp_path
+                )
             
             logger.info(f"Successfully downloaded PDF template to: {temp_path}")
             return temp_path
@@ -271,6 +289,7 @@ class FileHandler:
             logger.error(f"Error downloading PDF template from S3: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to download PDF template from S3: {str(e)}")
 
+    @traced("s3.upload_generated_document")
     def upload_generated_pdf_to_s3(self, local_pdf_path: str, group_id: str, template_name: str) -> dict:
         """
         Upload a generated PDF file to S3 in the generated_documents folder.
@@ -297,7 +316,7 @@ class FileHandler:
             logger.info(f"Uploading generated PDF to S3: {local_pdf_path} -> {s3_key}")
             
             # Upload file to S3
-            with open(local_pdf_path, 'rb') as pdf_file:
+            with open(local_pdf_path, 'rb') as pdf_file, timed("s3"):
                 self.s3_client.upload_fileobj(
                     pdf_file,
                     self.bucket_name,
@@ -331,5 +350,9 @@ class FileHandler:
             raise HTTPException(status_code=500, detail=f"Failed to upload generated PDF to S3: {str(e)}")
 
 
-# Global instance
-file_handler = FileHandler()
+def __getattr__(name):
+    # Backwards compatible `file_handler` global, now the lazily built container instance
+    if name == "file_handler":
+        from services.container import get_container
+        return get_container().file_handler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,9 +1,12 @@
 import logging
-import requests
 import sys
 import os
 from celery import Celery
+from celery.signals import before_task_publish, task_prerun, task_postrun, task_failure
 from config import settings
+from services.metrics_service import pipeline_metrics
+from services.tracing_service import tracer, TRACEPARENT_HEADER
+from services.ocr_text_service import ocr_pages_markdown, normalize_ocr_markdown, count_tokens
 
 # Add the backend directory to the Python path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -88,6 +91,17 @@ celery_app.conf.update(
     # Task routing configuration
     task_routes={
         'multi_pdf_processing': {'queue': 'default'},
+        'process_document': {'queue': 'default'},
+        'merge_group_results': {'queue': 'default'},
+        'maintain_audit_log_partitions': {'queue': 'default'},
+    },
+
+    # Periodic tasks (run by the beat scheduler embedded in celery_worker.py)
+    beat_schedule={
+        'maintain-audit-log-partitions': {
+            'task': 'maintain_audit_log_partitions',
+            'schedule': 24 * 60 * 60,  # Daily
+        },
     },
     
     # Result backend settings
@@ -97,339 +111,488 @@ celery_app.conf.update(
 )
 
 
-@celery_app.task(bind=True, name='multi_pdf_processing')
-def multi_pdf_processing_task(self, document_ids: list, s3_keys: list, user_id: int, task_id: str = None, group_id: str = None):
+# Trace propagation: tasks published inside a span carry its traceparent as a message
+# header, and the worker runs each task in a span continuing that trace
+_task_spans = {}
+
+
+@before_task_publish.connect
+def _inject_traceparent(headers=None, **kwargs):
+    traceparent = tracer.current_traceparent()
+    if traceparent and headers is not None:
+        headers.setdefault(TRACEPARENT_HEADER, traceparent)
+
+
+@task_prerun.connect
+def _start_task_span(task_id=None, task=None, **kwargs):
+    if not tracer.enabled:
+        return
+    request = task.request
+    traceparent = getattr(request, TRACEPARENT_HEADER, None) or (getattr(request, "headers", None) or {}).get(TRACEPARENT_HEADER)
+    span = tracer.start_span(f"task {task.name}", {"celery.task_id": task_id}, traceparent)
+    _task_spans[task_id] = (span, tracer.activate(span))
+
+
+@task_failure.connect
+def _record_task_failure(task_id=None, exception=None, **kwargs):
+    span, _ = _task_spans.get(task_id, (None, None))
+    if span is not None and exception is not None:
+        span.record_error(exception)
+
+
+@task_postrun.connect
+def _end_task_span(task_id=None, state=None, **kwargs):
+    span, token = _task_spans.pop(task_id, (None, None))
+    if span is None:
+        return
+    span.set_attribute("celery.state", state)
+    tracer.deactivate(token)
+    tracer.end_span(span)
+
+
+
+
+def _get_worker_services():
     """
-    Celery task to process multiple PDF files asynchronously with Redis status tracking.
-    Processes documents sequentially and combines their text for final analysis.
+    Service container of this worker process; the heavy clients are built on first use
+    and reused by every task the process runs.
     """
-    # Use provided task_id or generate one
-    if not task_id:
-        task_id = self.request.id
-    else:
-        task_id = task_id
-    
+    from services.container import get_container
+    return get_container()
+
+
+def _process_document(db, services, document_id: int, s3_key: str, index: int, total: int, report, group_id: str = None) -> tuple:
+    """
+    Run a single document through S3 load → OCR → LLM → JSON and update its DocumentUpload row.
+
+    Args:
+        report: callable(fraction, message) publishing progress within this document (0.0 - 1.0)
+        group_id: document group, whose documents share OCR results for identical pages
+
+    Returns:
+        (completed, json_response) - json_response is None when the LLM step failed
+    """
+    from models.database_models import DocumentUpload
+    from datetime import datetime, UTC
+    import asyncio
+
+    file_handler = services.file_handler
+    llm_service = services.llm_service
+    pdf_extractor = services.pdf_processor
+
+    json_response = None
     try:
-        logger.info(f"Processing {len(document_ids)} PDF files for group {group_id}, task_id: {task_id}")
-        
-        # Import here to avoid circular imports
-        from models.database_models import get_db, DocumentUpload
-        from services.aws_service import FileHandler
-        from services.openai_service import LLMService
-        from services.redis_service import RedisService
-        from services.pdf_service import PdfProcessor
-        from datetime import datetime, UTC
-        
-        # Initialize services
-        file_handler = FileHandler()
-        llm_service = LLMService()
-        redis_service = RedisService()
-        pdf_extractor = PdfProcessor()
-        
-        # Set initial status in Redis
-        logger.info(f"Setting initial Redis status for multi-document task_id: {task_id}")
+        document = db.query(DocumentUpload).filter(DocumentUpload.id == document_id).first()
+        filename = document.original_filename if document else s3_key
+
+        # Don't hold a pooled connection through S3, OCR and the LLM call
+        db.release()
+
+        # Update Redis status - Starting document X of Y
+        report(0.0, f"Starting document {index+1} of {total}: {filename}")
+
+        # Load PDF from S3 and get decrypted file path
+        logger.info(f"Loading and decrypting PDF {index+1}/{total} from S3: {s3_key}")
+        report(0.1, f"Loading PDF {index+1} of {total} from S3 storage")
+
+        decrypted_pdf_path = file_handler.load_pdf_from_s3(s3_key)
+        logger.info(f"Loaded and decrypted PDF from S3: {decrypted_pdf_path}")
+
+        report(0.2, f"Starting OCR extraction for document {index+1} of {total}")
+
+        # Step 1: Extract text from PDF using Mistral AI (OCR)
+        logger.info(f"Step 1: OCR extraction from PDF {index+1} using PdfProcessor")
+        try:
+            with pipeline_metrics.time_stage("ocr"):
+                ocr_response = pdf_extractor.extract_text_from_pdf(decrypted_pdf_path, group_id)
+
+            # Store the page markdown as is; the LLM gets it normalized (boilerplate pages and
+            # disclaimers removed, whitespace collapsed), since prompt size drives its latency and cost
+            markdown_content = ocr_pages_markdown(ocr_response)
+            llm_content = normalize_ocr_markdown(ocr_response)
+            raw_tokens = count_tokens(markdown_content)
+            prompt_tokens = count_tokens(llm_content)
+            logger.info(
+                f"Successfully extracted OCR text from PDF {index+1}: {len(ocr_response.pages)} pages, "
+                f"{raw_tokens} tokens, {prompt_tokens} after normalization"
+            )
+
+            report(0.5, f"OCR extraction completed for document {index+1} of {total} ({prompt_tokens} tokens)")
+
+        except Exception as e:
+            logger.error(f"Failed to extract OCR text from PDF {index+1}: {str(e)}")
+            markdown_content = f"Error extracting text from {filename}: {str(e)}"
+            llm_content = markdown_content
+
+        # Clean up temporary file
+        try:
+            os.unlink(decrypted_pdf_path)
+        except Exception as e:
+            logger.warning(f"Failed to cleanup temp file {decrypted_pdf_path}: {e}")
+
+        report(0.6, f"Starting AI analysis for document {index+1} of {total}")
+
+        # Step 2: Process OCR text with LLM to get JSON response
+        logger.info(f"Step 2: Processing OCR text with LLM for document {index+1}")
+        try:
+            with pipeline_metrics.time_stage("llm_extraction") as stage:
+                json_response = asyncio.run(llm_service.process_medical_document(llm_content))
+                if not json_response:
+                    stage.outcome = "error"
+            if json_response:
+                logger.info(f"Successfully processed document {index+1} with LLM")
+                report(0.9, f"AI analysis completed for document {index+1} of {total}")
+            else:
+                logger.error(f"LLM processing failed for document {index+1}")
+        except Exception as e:
+            logger.error(f"Error processing document {index+1} with LLM: {str(e)}")
+            json_response = None
+
+        # Update document with extracted text
+        with pipeline_metrics.time_stage("db_write"):
+            document = db.query(DocumentUpload).filter(DocumentUpload.id == document_id).first()
+            if not document:
+                return False, json_response
+
+            document.extracted_text = markdown_content  # Store OCR text
+            document.extraction_status = "completed"
+            document.processing_completed_at = datetime.now(UTC)
+            db.commit()
+
+        logger.info(f"Successfully processed document {index+1}/{total}: {document.original_filename}")
+        report(1.0, f"Document {index+1} of {total} completed successfully: {document.original_filename}")
+        return True, json_response
+
+    except Exception as e:
+        logger.error(f"Error processing document {index+1} ({document_id}): {str(e)}")
+        db.rollback()
+        # Update document status to failed
+        document = db.query(DocumentUpload).filter(DocumentUpload.id == document_id).first()
+        if document:
+            document.extraction_status = "failed"
+            document.processing_error = str(e)
+            document.processing_completed_at = datetime.now(UTC)
+            db.commit()
+        return False, None
+
+
+def _merge_and_store_results(db, llm_service, redis_service, task_id: str, group_id: str, document_ids: list, all_json_responses: list, processed_count: int) -> dict:
+    """Merge the per-document JSON responses, store the result and publish the final status"""
+    from models.database_models import DocumentUpload
+
+    # Update Redis status - Starting merge process
+    redis_service.update_task_progress(
+        task_id=task_id,
+        stage="merging_json_responses",
+        progress=75,
+        message=f"Starting merge process for {processed_count} processed documents"
+    )
+
+    # Step 3: Merge all JSON responses
+    logger.info("Step 3: Merging JSON responses from all documents")
+    try:
+        # Filter out None responses
+        valid_json_responses = [resp for resp in all_json_responses if resp is not None]
+
         redis_service.update_task_progress(
             task_id=task_id,
-            stage="starting",
-            progress=0,
-            message=f"Initializing multi-document processing for {len(document_ids)} documents",
-            data={"document_ids": document_ids, "user_id": user_id, "group_id": group_id}
+            stage="merging_json_responses",
+            progress=80,
+            message=f"Validating {len(valid_json_responses)} JSON responses for merging"
         )
-        
-        # Get database session
-        db = next(get_db())
-        
-        try:
-            # Update all documents status to processing
-            documents = db.query(DocumentUpload).filter(DocumentUpload.id.in_(document_ids)).all()
-            if not documents:
-                logger.error(f"No documents found for IDs {document_ids}")
-                redis_service.update_task_progress(
-                    task_id=task_id,
-                    stage="failed",
-                    progress=0,
-                    message="No documents found in database"
-                )
-                return {"status": "error", "message": "No documents found"}
-            
-            # Update all documents to processing status
-            for doc in documents:
-                doc.processing_started_at = datetime.now(UTC)
-                doc.extraction_status = "processing"
-            db.commit()
-            
-            # Process each document sequentially: OCR → LLM → JSON
-            all_json_responses = []
-            processed_count = 0
-            
-            for i, (document_id, s3_key) in enumerate(zip(document_ids, s3_keys)):
-                try:
-                    # Calculate base progress for this document (70% total for all documents)
-                    base_progress = int((i / len(document_ids)) * 70)
-                    document_progress_range = int(70 / len(document_ids))  # Progress range per document
-                    
-                    # Update Redis status - Starting document X of Y
-                    redis_service.update_task_progress(
-                        task_id=task_id,
-                        stage="processing_documents",
-                        progress=base_progress,
-                        message=f"Starting document {i+1} of {len(document_ids)}: {documents[i].original_filename}"
-                    )
-                    
-                    # Load PDF from S3 and get decrypted file path
-                    logger.info(f"Loading and decrypting PDF {i+1}/{len(document_ids)} from S3: {s3_key}")
-                    
-                    # Update progress - Loading PDF
-                    progress = base_progress + int(document_progress_range * 0.1)  # 10% of document progress
-                    redis_service.update_task_progress(
-                        task_id=task_id,
-                        stage="processing_documents",
-                        progress=progress,
-                        message=f"Loading PDF {i+1} of {len(document_ids)} from S3 storage"
-                    )
-                    
-                    decrypted_pdf_path = file_handler.load_pdf_from_s3(s3_key)
-                    logger.info(f"Loaded and decrypted PDF from S3: {decrypted_pdf_path}")
-                    
-                    # Update progress - Starting OCR
-                    progress = base_progress + int(document_progress_range * 0.2)  # 20% of document progress
-                    redis_service.update_task_progress(
-                        task_id=task_id,
-                        stage="processing_documents",
-                        progress=progress,
-                        message=f"Starting OCR extraction for document {i+1} of {len(document_ids)}"
-                    )
-                    
-                    # Step 1: Extract text from PDF using Mistral AI (OCR)
-                    logger.info(f"Step 1: OCR extraction from PDF {i+1} using PdfProcessor")
-                    try:
-                        ocr_response = pdf_extractor.extract_text_from_pdf(decrypted_pdf_path)
-                        
-                        # Use OCR response directly as markdown content
-                        markdown_content = str(ocr_response)
-                        logger.info(f"Successfully extracted OCR text from PDF {i+1}, length: {len(markdown_content)}")
-                        
-                        # Update progress - OCR completed
-                        progress = base_progress + int(document_progress_range * 0.5)  # 50% of document progress
-                        redis_service.update_task_progress(
-                            task_id=task_id,
-                            stage="processing_documents",
-                            progress=progress,
-                            message=f"OCR extraction completed for document {i+1} of {len(document_ids)} ({len(markdown_content)} characters)"
-                        )
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to extract OCR text from PDF {i+1}: {str(e)}")
-                        markdown_content = f"Error extracting text from {documents[i].original_filename}: {str(e)}"
-                    
-                    # Clean up temporary file
-                    try:
-                        import os
-                        os.unlink(decrypted_pdf_path)
-                    except Exception as e:
-                        logger.warning(f"Failed to cleanup temp file {decrypted_pdf_path}: {e}")
-                    
-                    # Update progress - Starting LLM processing
-                    progress = base_progress + int(document_progress_range * 0.6)  # 60% of document progress
-                    redis_service.update_task_progress(
-                        task_id=task_id,
-                        stage="processing_documents",
-                        progress=progress,
-                        message=f"Starting AI analysis for document {i+1} of {len(document_ids)}"
-                    )
-                    
-                    # Step 2: Process OCR text with LLM to get JSON response
-                    logger.info(f"Step 2: Processing OCR text with LLM for document {i+1}")
-                    try:
-                        import asyncio
-                        json_response = asyncio.run(llm_service.process_medical_document(markdown_content))
-                        if json_response:
-                            logger.info(f"Successfully processed document {i+1} with LLM")
-                            all_json_responses.append(json_response)
-                            
-                            # Update progress - LLM completed
-                            progress = base_progress + int(document_progress_range * 0.9)  # 90% of document progress
-                            redis_service.update_task_progress(
-                                task_id=task_id,
-                                stage="processing_documents",
-                                progress=progress,
-                                message=f"AI analysis completed for document {i+1} of {len(document_ids)}"
-                            )
-                        else:
-                            logger.error(f"LLM processing failed for document {i+1}")
-                            all_json_responses.append(None)
-                    except Exception as e:
-                        logger.error(f"Error processing document {i+1} with LLM: {str(e)}")
-                        all_json_responses.append(None)
-                    
-                    # Update document with extracted text and JSON response
-                    document = db.query(DocumentUpload).filter(DocumentUpload.id == document_id).first()
-                    if document:
-                        document.extracted_text = markdown_content  # Store OCR text
-                        document.extraction_status = "completed"
-                        document.processing_completed_at = datetime.now(UTC)
-                        db.commit()
-                        
-                        processed_count += 1
-                        logger.info(f"Successfully processed document {i+1}/{len(document_ids)}: {document.original_filename}")
-                        
-                        # Update progress - Document completed
-                        progress = base_progress + document_progress_range  # 100% of document progress
-                        redis_service.update_task_progress(
-                            task_id=task_id,
-                            stage="processing_documents",
-                            progress=progress,
-                            message=f"Document {i+1} of {len(document_ids)} completed successfully: {document.original_filename}"
-                        )
-                    
-                except Exception as e:
-                    logger.error(f"Error processing document {i+1} ({document_id}): {str(e)}")
-                    # Update document status to failed
-                    document = db.query(DocumentUpload).filter(DocumentUpload.id == document_id).first()
-                    if document:
-                        document.extraction_status = "failed"
-                        document.processing_error = str(e)
-                        document.processing_completed_at = datetime.now(UTC)
-                        db.commit()
-                    all_json_responses.append(None)
-            
-            # Update Redis status - Starting merge process
+
+        if valid_json_responses:
             redis_service.update_task_progress(
                 task_id=task_id,
                 stage="merging_json_responses",
-                progress=75,
-                message=f"Starting merge process for {processed_count} processed documents"
+                progress=85,
+                message=f"Applying intelligent merge algorithm to combine data from {len(valid_json_responses)} documents"
             )
-            
-            # Step 3: Merge all JSON responses
-            logger.info("Step 3: Merging JSON responses from all documents")
-            try:
-                # Filter out None responses
-                valid_json_responses = [resp for resp in all_json_responses if resp is not None]
-                
+
+            with pipeline_metrics.time_stage("merge") as stage:
+                merged_json = llm_service.merge_json_responses(valid_json_responses)
+                if not merged_json:
+                    stage.outcome = "error"
+            if merged_json:
+                logger.info("Successfully merged JSON responses from all documents")
+                combined_analysis = merged_json
+
                 redis_service.update_task_progress(
                     task_id=task_id,
                     stage="merging_json_responses",
-                    progress=80,
-                    message=f"Validating {len(valid_json_responses)} JSON responses for merging"
+                    progress=90,
+                    message=f"Successfully merged data from {len(valid_json_responses)} documents ({len(merged_json)} characters)"
                 )
-                
-                if valid_json_responses:
-                    redis_service.update_task_progress(
-                        task_id=task_id,
-                        stage="merging_json_responses",
-                        progress=85,
-                        message=f"Applying intelligent merge algorithm to combine data from {len(valid_json_responses)} documents"
-                    )
-                    
-                    merged_json = llm_service.merge_json_responses(valid_json_responses)
-                    if merged_json:
-                        logger.info("Successfully merged JSON responses from all documents")
-                        combined_analysis = merged_json
-                        
-                        redis_service.update_task_progress(
-                            task_id=task_id,
-                            stage="merging_json_responses",
-                            progress=90,
-                            message=f"Successfully merged data from {len(valid_json_responses)} documents ({len(merged_json)} characters)"
-                        )
-                    else:
-                        logger.error("Failed to merge JSON responses")
-                        combined_analysis = "Error: Failed to merge JSON responses from documents"
-                else:
-                    logger.error("No valid JSON responses to merge")
-                    combined_analysis = "Error: No valid JSON responses from any documents"
-                    
-            except Exception as e:
-                logger.error(f"Error merging JSON responses: {str(e)}")
-                combined_analysis = f"Error merging JSON responses: {str(e)}"
-            
-            # Store the merged JSON result in the first document (as a representative)
-            if combined_analysis and processed_count > 0:
-                try:
-                    redis_service.update_task_progress(
-                        task_id=task_id,
-                        stage="saving_results",
-                        progress=95,
-                        message="Saving merged analysis results to database"
-                    )
-                    
-                    # Find the first successfully processed document to store the merged result
-                    first_doc = db.query(DocumentUpload).filter(
-                        DocumentUpload.id.in_(document_ids),
-                        DocumentUpload.extraction_status == "completed"
-                    ).first()
-                    
-                    if first_doc:
-                        # Store the merged JSON in the extracted_text field of the first document
-                        # This will be the combined analysis from all documents
-                        first_doc.extracted_text = combined_analysis
-                        db.commit()
-                        logger.info(f"Stored merged JSON result in document {first_doc.id}")
-                        
-                        redis_service.update_task_progress(
-                            task_id=task_id,
-                            stage="saving_results",
-                            progress=98,
-                            message=f"Successfully saved merged analysis to database (document ID: {first_doc.id})"
-                        )
-                except Exception as e:
-                    logger.error(f"Error storing merged JSON result: {str(e)}")
-            
-            # Update Redis status - Completed
+            else:
+                logger.error("Failed to merge JSON responses")
+                combined_analysis = "Error: Failed to merge JSON responses from documents"
+        else:
+            logger.error("No valid JSON responses to merge")
+            combined_analysis = "Error: No valid JSON responses from any documents"
+
+    except Exception as e:
+        logger.error(f"Error merging JSON responses: {str(e)}")
+        combined_analysis = f"Error merging JSON responses: {str(e)}"
+
+    # Store the merged JSON result in the first document (as a representative)
+    if combined_analysis and processed_count > 0:
+        try:
             redis_service.update_task_progress(
                 task_id=task_id,
-                stage="completed",
-                progress=100,
-                message=f"Successfully processed {processed_count} documents and merged JSON responses",
-                data={
-                    "processed_documents": processed_count,
-                    "total_documents": len(document_ids),
-                    "merged_json_length": len(combined_analysis) if combined_analysis else 0,
-                    "analysis_completed": True,
-                    "merged_json_available": combined_analysis is not None
-                }
+                stage="saving_results",
+                progress=95,
+                message="Saving merged analysis results to database"
             )
-            
-            logger.info(f"Multi-document processing completed successfully for group {group_id}")
-            return {
-                "status": "success",
-                "message": f"Successfully processed {processed_count} documents and merged JSON responses",
-                "processed_documents": processed_count,
-                "total_documents": len(document_ids),
-                "merged_json_length": len(combined_analysis) if combined_analysis else 0,
-                "analysis_completed": True,
-                "merged_json_available": combined_analysis is not None
-            }
-            
+
+            with pipeline_metrics.time_stage("db_write"):
+                # Find the first successfully processed document to store the merged result
+                first_doc = db.query(DocumentUpload).filter(
+                    DocumentUpload.id.in_(document_ids),
+                    DocumentUpload.extraction_status == "completed"
+                ).first()
+
+                if first_doc:
+                    # Store the merged JSON in the extracted_text field of the first document
+                    # This will be the combined analysis from all documents
+                    first_doc.extracted_text = combined_analysis
+                    db.commit()
+
+            if first_doc:
+                logger.info(f"Stored merged JSON result in document {first_doc.id}")
+
+                redis_service.update_task_progress(
+                    task_id=task_id,
+                    stage="saving_results",
+                    progress=98,
+                    message=f"Successfully saved merged analysis to database (document ID: {first_doc.id})"
+                )
         except Exception as e:
-            logger.error(f"Error in multi-document processing: {str(e)}")
-            # Update all documents to failed status
-            for document_id in document_ids:
-                document = db.query(DocumentUpload).filter(DocumentUpload.id == document_id).first()
-                if document:
-                    document.extraction_status = "failed"
-                    document.processing_error = str(e)
-                    document.processing_completed_at = datetime.now(UTC)
+            logger.error(f"Error storing merged JSON result: {str(e)}")
+
+    summary = {
+        "processed_documents": processed_count,
+        "total_documents": len(document_ids),
+        "merged_json_length": len(combined_analysis) if combined_analysis else 0,
+        "analysis_completed": True,
+        "merged_json_available": combined_analysis is not None
+    }
+
+    # Update Redis status - Completed
+    redis_service.update_task_progress(
+        task_id=task_id,
+        stage="completed",
+        progress=100,
+        message=f"Successfully processed {processed_count} documents and merged JSON responses",
+        data=summary
+    )
+
+    logger.info(f"Multi-document processing completed successfully for group {group_id}")
+    return {
+        "status": "success",
+        "message": f"Successfully processed {processed_count} documents and merged JSON responses",
+        **summary
+    }
+
+
+def _mark_documents_failed(db, document_ids: list, error: str) -> None:
+    """Mark every document of a group as failed"""
+    from models.database_models import DocumentUpload
+    from datetime import datetime, UTC
+
+    db.rollback()
+    for document_id in document_ids:
+        document = db.query(DocumentUpload).filter(DocumentUpload.id == document_id).first()
+        if document:
+            document.extraction_status = "failed"
+            document.processing_error = error
+            document.processing_completed_at = datetime.now(UTC)
+    db.commit()
+
+
+@celery_app.task(bind=True, name='multi_pdf_processing')
+def multi_pdf_processing_task(self, document_ids: list, s3_keys: list, user_id: int, task_id: str = None, group_id: str = None):
+    """
+    Deprecated shim, kept only to drain multi_pdf_processing messages queued before the upload
+    endpoint switched to one process_document_task per document. Fans the group out to
+    process_document_task so there is a single pipeline; remove once no such messages remain.
+    """
+    if not task_id:
+        task_id = self.request.id
+
+    total = len(document_ids)
+    logger.info(f"Re-dispatching legacy multi_pdf_processing message for group {group_id} as {total} process_document tasks")
+    for i, (document_id, s3_key) in enumerate(zip(document_ids, s3_keys)):
+        process_document_task.apply_async(
+            args=[document_id, s3_key, user_id, task_id, group_id, i, total],
+            task_id=f"{task_id}_doc_{i}"
+        )
+    return {"status": "dispatched", "task_id": task_id, "documents": total}
+
+
+def record_group_document_result(task_id: str, group_id: str, user_id: int, index: int, total: int, json_response=None, redis_service=None) -> bool:
+    """
+    Group barrier: record the outcome of document `index` and queue the merge once
+    every document of the group has reported. Failed documents report None.
+
+    Returns:
+        True if this call completed the group and queued the merge task
+    """
+
+    redis_service = redis_service or _get_worker_services().redis_service
+    recorded = redis_service.record_group_result(task_id, index, json_response)
+    if recorded is None:
+        logger.error(f"Could not record result of document {index+1}/{total} for group {group_id}")
+        redis_service.update_task_progress(
+            task_id=task_id,
+            stage="failed",
+            progress=0,
+            message=f"Could not record result of document {index+1} of {total}"
+        )
+        return False
+
+    is_new, reported_count = recorded
+    logger.info(f"Group {group_id}: {reported_count}/{total} documents reported (task_id: {task_id})")
+
+    # Only the call that fills the last slot queues the merge, so redelivered
+    # document tasks cannot trigger it twice
+    if is_new and reported_count == total:
+        merge_group_results_task.apply_async(
+            args=[task_id, group_id, user_id, total],
+            task_id=f"{task_id}_merge"
+        )
+        logger.info(f"All {total} documents reported for group {group_id}, merge queued")
+        return True
+    return False
+
+
+@celery_app.task(bind=True, name='process_document')
+def process_document_task(self, document_id: int, s3_key: str, user_id: int, task_id: str, group_id: str, index: int, total: int):
+    """
+    Celery task to process a single document of a group as soon as it lands in S3.
+    Reports to the group barrier when done; the last document queues merge_group_results_task.
+    """
+    json_response = None
+    completed = False
+
+    # Import here to avoid circular imports
+    from models.database_models import get_db, DocumentUpload
+    from datetime import datetime, UTC
+
+    redis_service = _get_worker_services().redis_service
+    db = next(get_db())
+    try:
+        logger.info(f"Processing document {index+1}/{total} (ID {document_id}) for group {group_id}, task_id: {task_id}")
+        services = _get_worker_services()
+
+        document = db.query(DocumentUpload).filter(DocumentUpload.id == document_id).first()
+        if document:
+            document.processing_started_at = datetime.now(UTC)
+            document.extraction_status = "processing"
             db.commit()
-            
+
+        def report(fraction, message):
+            # Documents run concurrently, so progress is based on how many have already reported
+            reported_count = redis_service.get_group_reported_count(task_id)
             redis_service.update_task_progress(
                 task_id=task_id,
-                stage="failed",
-                progress=0,
-                message=f"Multi-document processing failed: {str(e)}"
+                stage="processing_documents",
+                progress=int(((reported_count + fraction) / total) * 70),
+                message=message
             )
-            return {"status": "error", "message": str(e)}
-            
-        finally:
-            db.close()
-            
+
+        completed, json_response = _process_document(db, services, document_id, s3_key, index, total, report, group_id)
+
     except Exception as e:
-        logger.error(f"Error in multi-document processing task: {str(e)}")
+        logger.error(f"Error in document processing task for document {document_id}: {str(e)}")
         import traceback
         logger.error(f"Full traceback: {traceback.format_exc()}")
+        _mark_documents_failed(db, [document_id], str(e))
+
+    finally:
+        db.close()
+
+    record_group_document_result(task_id, group_id, user_id, index, total, json_response, redis_service)
+    return {
+        "status": "success" if completed else "error",
+        "document_id": document_id,
+        "json_available": json_response is not None
+    }
+
+
+@celery_app.task(bind=True, name='merge_group_results')
+def merge_group_results_task(self, task_id: str, group_id: str, user_id: int, total: int):
+    """
+    Celery task that merges the per-document results of a group once the barrier is complete.
+    """
+    # Import here to avoid circular imports
+    from models.database_models import get_db, DocumentUpload
+
+    redis_service = _get_worker_services().redis_service
+    db = next(get_db())
+    document_ids = []
+    try:
+        documents = db.query(DocumentUpload).filter(
+            DocumentUpload.document_group_id == group_id
+        ).order_by(DocumentUpload.id.asc()).all()
+        document_ids = [doc.id for doc in documents]
+        processed_count = len([doc for doc in documents if doc.extraction_status == "completed"])
+
+        # Keep upload order so the first document stays the merge base
+        results = redis_service.get_group_results(task_id)
+        all_json_responses = [results.get(i) for i in range(total)]
+
+        result = _merge_and_store_results(
+            db, _get_worker_services().llm_service, redis_service, task_id, group_id,
+            document_ids, all_json_responses, processed_count
+        )
+        redis_service.delete_group_results(task_id)
+        return result
+
+    except Exception as e:
+        logger.error(f"Error merging results for group {group_id}: {str(e)}")
+        import traceback
+        logger.error(f"Full traceback: {traceback.format_exc()}")
+        _mark_documents_failed(db, document_ids, str(e))
+
+        redis_service.update_task_progress(
+            task_id=task_id,
+            stage="failed",
+            progress=0,
+            message=f"Multi-document processing failed: {str(e)}"
+        )
+        return {"status": "error", "message": str(e)}
+
+    finally:
+        db.close()
+
+
+@celery_app.task(name='maintain_audit_log_partitions')
+def maintain_audit_log_partitions_task():
+    """
+    Celery beat task that creates upcoming audit_logs partitions and detaches expired ones.
+    """
+    # Import here to avoid circular imports
+    from models.database_models import get_db
+    from services.db_service import DatabaseService
+
+    db = next(get_db())
+    try:
+        created = DatabaseService.ensure_audit_log_partitions(db)
+        detached = DatabaseService.apply_audit_log_retention(db)
+        logger.info(f"Audit log partition maintenance: created {created}, detached {detached}")
+        return {"status": "success", "created": created, "detached": detached}
+    except Exception as e:
+        logger.error(f"Error maintaining audit log partitions: {str(e)}")
         return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
 
 
 # Export the Celery app for use in other modules
-__all__ = ['celery_app','multi_pdf_processing_task'] 
+__all__ = [
+    'celery_app',
+    'process_document_task',
+    'merge_group_results_task',
+    'maintain_audit_log_partitions_task',
+    'record_group_document_result'
+]
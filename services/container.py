@@ -0,0 +1,114 @@
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict
+from fastapi import Request
+
+logger = logging.getLogger(__name__)
+
+
+def _build_redis_service():
+    from services.redis_service import RedisService
+    return RedisService()
+
+
+def _build_file_handler():
+    from services.aws_service import FileHandler
+    return FileHandler()
+
+
+def _build_llm_service():
+    from services.openai_service import LLMService
+    return LLMService()
+
+
+def _build_pdf_processor():
+    from services.pdf_service import PdfProcessor
+    return PdfProcessor()
+
+
+class ServiceContainer:
+    """
+    Process-wide service instances.
+
+    Each service is constructed on first use (and its module imported then), so a missing
+    Redis server or Mistral key only affects the endpoints that need it instead of stopping
+    the app from starting. Construction times are recorded for the startup report.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._instances: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    started = time.perf_counter()
+                    instance = factory()
+                    self.timings[name] = round(time.perf_counter() - started, 3)
+                    self._instances[name] = instance
+                    logger.info(f"Initialized {name} in {self.timings[name]}s")
+        return instance
+
+    @property
+    def redis_service(self):
+        return self._get("redis_service", _build_redis_service)
+
+    @property
+    def file_handler(self):
+        return self._get("file_handler", _build_file_handler)
+
+    @property
+    def llm_service(self):
+        return self._get("llm_service", _build_llm_service)
+
+    @property
+    def pdf_processor(self):
+        return self._get("pdf_processor", _build_pdf_processor)
+
+    def status(self) -> Dict[str, Any]:
+        """Which services have been initialized and how long each took"""
+        return {
+            "initialized": sorted(self._instances),
+            "init_seconds": dict(self.timings)
+        }
+
+
+_container = None
+_container_lock = threading.Lock()
+
+
+def get_container() -> ServiceContainer:
+    """The container for this process (API lifespan, Celery worker or script)"""
+    global _container
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                _container = ServiceContainer()
+    return _container
+
+
+# FastAPI dependencies
+
+def get_services(request: Request) -> ServiceContainer:
+    return getattr(request.app.state, "services", None) or get_container()
+
+
+def get_redis_service(request: Request):
+    return get_services(request).redis_service
+
+
+def get_file_handler(request: Request):
+    return get_services(request).file_handler
+
+
+def get_llm_service(request: Request):
+    return get_services(request).llm_service
+
+
+def get_pdf_processor(request: Request):
+    return get_services(request).pdf_processor
@@ -1,14 +1,24 @@
+import re
+import json
+import base64
 import logging
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from datetime import datetime, date, UTC
+from sqlalchemy import desc, func, text, tuple_
+from datetime import datetime, date, timedelta, UTC
 from fastapi import Request
 from models.database_models import AuditLog, User
+from services.audit_service import audit_log_writer
+from config import settings
 from sqlalchemy import or_
 
 logger = logging.getLogger(__name__)
 
+AUDIT_LOG_COUNT_MODES = ("exact", "auto", "estimated", "none")
+
+AUDIT_LOG_PARTITION_PATTERN = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+AUDIT_LOG_ARCHIVE_SCHEMA = "audit_archive"
+
 class DatabaseService:
     """Service class for database operations including audit logging"""
     
@@ -34,8 +44,11 @@ class DatabaseService:
             action_details: Additional details about the action
             request: FastAPI request object to extract IP address and user agent
             
+        When the audit log writer is running the event is buffered and written in bulk by a
+        background thread, so the caller's session is not committed.
+
         Returns:
-            AuditLog object if successful, None if failed
+            AuditLog object if written synchronously, None if buffered or failed
         """
         try:
             # Extract IP address and user agent from request if provided
@@ -51,16 +64,24 @@ class DatabaseService:
                 # Get user agent
                 user_agent = request.headers.get("user-agent")
             
-            # Create audit log entry
-            audit_log = AuditLog(
-                user_id=user_id,
-                category=category,  # Use category field
-                action_details=action_details,
-                table_name=resource_type or "system",  # Use table_name field
-                record_id=resource_id,  # Use record_id field
-                ip_address=ip_address,
-                user_agent=user_agent
-            )
+            event = {
+                "user_id": user_id,
+                "category": category,
+                "action_details": action_details,
+                "table_name": resource_type or "system",
+                "record_id": resource_id,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                # Timestamp the event now, not when the writer flushes it
+                "created_at": datetime.now(UTC)
+            }
+
+            if audit_log_writer.enqueue(event):
+                logger.info(f"Audit log buffered: {category} by user {user_id} from IP {ip_address}")
+                return None
+
+            # Writer not running (scripts, Celery workers) or buffer full: write synchronously
+            audit_log = AuditLog(**event)
             
             db.add(audit_log)
             db.commit()
@@ -74,6 +95,270 @@ class DatabaseService:
             db.rollback()
             return None
     
+    @staticmethod
+    def _resolve_date_range(date_range: str) -> datetime:
+        """Convert a date range filter (e.g., '7d', '1m', '1y') into its start datetime"""
+        # created_at is a naive UTC timestamp; comparing against a naive value keeps the
+        # filter immutable so the planner can prune audit_logs partitions at plan time
+        now = datetime.now(UTC).replace(tzinfo=None)
+
+        range_days = {'7d': 7, '30d': 30, '1m': 30, '3m': 90, '6m': 180, '1y': 365}
+        if date_range in range_days:
+            return now - timedelta(days=range_days[date_range])
+
+        # Try to parse as number of days
+        try:
+            days = int(date_range.replace('d', ''))
+            return now - timedelta(days=days)
+        except ValueError:
+            # Default to 7 days if invalid format
+            return now - timedelta(days=7)
+
+    @staticmethod
+    def encode_audit_cursor(created_at: datetime, log_id: int) -> str:
+        """Encode the (created_at, id) position of an audit log as an opaque cursor"""
+        raw = f"{created_at.isoformat()}|{log_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_audit_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Decode a cursor produced by encode_audit_cursor"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            created_at, log_id = raw.rsplit("|", 1)
+            return datetime.fromisoformat(created_at), int(log_id)
+        except Exception:
+            raise ValueError("Invalid audit log cursor")
+
+    @staticmethod
+    def audit_log_page_offset(page: int, limit: int) -> int:
+        """Row offset of a page number, rejecting pages deeper than settings.audit_log_max_page_offset"""
+        offset = (max(page, 1) - 1) * limit
+        if offset > settings.audit_log_max_page_offset:
+            raise ValueError(
+                f"Page-number pagination is limited to the first {settings.audit_log_max_page_offset} rows; "
+                f"follow pagination.next_cursor for deeper pages"
+            )
+        return offset
+
+    @staticmethod
+    def _query_audit_logs(
+        db: Session,
+        category: Optional[str] = None,
+        user_id: Optional[int] = None,
+        date_range: Optional[str] = None,
+        user_type: Optional[str] = None,
+        limit: int = 100,
+        page: int = 1,
+        cursor: Optional[str] = None,
+        count_mode: Optional[str] = None,
+        search: Optional[str] = None
+    ) -> Tuple[List[Any], Dict[str, Any]]:
+        """
+        Shared query path for every audit log listing.
+
+        User fields come from an outer join on the page query, so a page costs two queries:
+        the rows and the count. Pages are ordered by (created_at, id); passing the previous
+        page's next_cursor seeks straight to the next page instead of using OFFSET. Every page,
+        including the first, returns next_cursor; page numbers are deprecated and rejected
+        once their offset passes settings.audit_log_max_page_offset.
+
+        count_mode controls the total count:
+        - "exact": COUNT(*) over the filtered rows
+        - "auto": exact up to settings.audit_log_exact_count_limit rows, estimated beyond that
+        - "estimated": planner statistics (pg_class for unfiltered listings, EXPLAIN otherwise)
+        - "none": no count, only has_next
+
+        Returns:
+            Tuple of (rows, pagination). Each row exposes the AuditLog as row.AuditLog and the
+            joined user columns first_name, last_name, email, username and is_admin.
+        """
+        count_mode = count_mode or settings.audit_log_count_mode
+
+        conditions = []
+        if category:
+            conditions.append(AuditLog.category == category)
+        if user_id:
+            conditions.append(AuditLog.user_id == user_id)
+        if date_range:
+            conditions.append(AuditLog.created_at >= DatabaseService._resolve_date_range(date_range))
+        if search and search.strip():
+            # Matches whole tokens (emails, group ids, file ids, words) through the GIN index
+            conditions.append(AuditLog.action_details_tsv.op("@@")(
+                func.websearch_to_tsquery("simple", search.strip())
+            ))
+        if user_type:
+            # Maps to the is_admin field of the acting user
+            if user_type.lower() == 'admin':
+                conditions.append(User.is_admin == True)
+            elif user_type.lower() == 'user':
+                conditions.append(User.is_admin == False)
+            else:
+                conditions.append(User.id.isnot(None))
+
+        query = db.query(
+            AuditLog,
+            User.first_name,
+            User.last_name,
+            User.email,
+            User.username,
+            User.is_admin
+        ).outerjoin(User, AuditLog.user_id == User.id).filter(*conditions)
+
+        offset = 0
+        if cursor:
+            cursor_created_at, cursor_id = DatabaseService.decode_audit_cursor(cursor)
+            query = query.filter(
+                # The plain created_at bound lets the planner skip newer partitions
+                AuditLog.created_at <= cursor_created_at,
+                tuple_(AuditLog.created_at, AuditLog.id) < tuple_(cursor_created_at, cursor_id)
+            )
+        else:
+            offset = DatabaseService.audit_log_page_offset(page, limit)
+            query = query.offset(offset)
+
+        # Fetch one extra row to know whether another page exists
+        rows = query.order_by(desc(AuditLog.created_at), desc(AuditLog.id)).limit(limit + 1).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+
+        total_count, count_estimated = DatabaseService._count_audit_logs(
+            db, conditions, bool(user_type), count_mode
+        )
+        if total_count is not None and not cursor:
+            # Statistics can lag behind the table; never report fewer rows than were seen
+            total_count = max(total_count, offset + len(rows) + (1 if has_next else 0))
+
+        next_cursor = None
+        if has_next and rows:
+            last_log = rows[-1].AuditLog
+            next_cursor = DatabaseService.encode_audit_cursor(last_log.created_at, last_log.id)
+
+        pagination = DatabaseService._build_pagination(
+            page,
+            limit,
+            total_count,
+            has_next=has_next,
+            has_prev=bool(cursor) or page > 1,
+            next_cursor=next_cursor,
+            count_estimated=count_estimated
+        )
+        return rows, pagination
+
+    @staticmethod
+    def _count_audit_logs(
+        db: Session,
+        conditions: List[Any],
+        join_users: bool,
+        count_mode: str
+    ) -> Tuple[Optional[int], bool]:
+        """Count the filtered audit logs. Returns (count, is_estimate)."""
+        if count_mode == "none":
+            return None, False
+
+        count_query = db.query(AuditLog.id)
+        if join_users:
+            count_query = count_query.join(User, AuditLog.user_id == User.id)
+        count_query = count_query.filter(*conditions)
+
+        if count_mode == "exact":
+            return count_query.with_entities(func.count(AuditLog.id)).scalar(), False
+
+        if count_mode == "auto" and conditions:
+            # Counting stops after the limit, so this is bounded regardless of table size
+            count_limit = settings.audit_log_exact_count_limit
+            capped_count = db.query(func.count()).select_from(
+                count_query.limit(count_limit + 1).subquery()
+            ).scalar()
+            if capped_count <= count_limit:
+                return capped_count, False
+
+        return DatabaseService._estimate_audit_log_count(db, count_query, bool(conditions)), True
+
+    @staticmethod
+    def _estimate_audit_log_count(db: Session, count_query, has_filters: bool) -> int:
+        """Estimate a row count from planner statistics without scanning the table"""
+        if not has_filters:
+            # Table statistics; a partitioned table's own reltuples covers its partitions once
+            # analyzed, so only the leaf partitions are summed to avoid counting rows twice
+            return int(db.execute(text(
+                "SELECT (CASE WHEN c.relkind = 'p' THEN ("
+                "SELECT COALESCE(SUM(GREATEST(l.reltuples, 0)), 0) FROM pg_inherits i "
+                "JOIN pg_class l ON l.oid = i.inhrelid "
+                "WHERE i.inhparent = c.oid AND l.relkind = 'r'"
+                ") ELSE GREATEST(c.reltuples, 0) END)::bigint "
+                "FROM pg_class c WHERE c.oid = 'audit_logs'::regclass"
+            )).scalar())
+
+        compiled = count_query.statement.compile(dialect=db.get_bind().dialect)
+        plan = db.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def _serialize_audit_log(row, include_is_admin: bool = False) -> Dict[str, Any]:
+        """Build the API representation of a joined audit log row"""
+        log = row.AuditLog
+        log_dict = {
+            "id": log.id,
+            "user": row.first_name,
+            "category": log.category,
+            "action_details": log.action_details,
+            "ip_address": log.ip_address,
+            "user_agent": log.user_agent,
+            "created_at": log.created_at.isoformat()
+        }
+        if include_is_admin:
+            log_dict["is_admin"] = row.is_admin
+        return log_dict
+
+    @staticmethod
+    def _user_info_from_rows(rows: List[Any], user_id: int, include_is_admin: bool = False) -> Optional[Dict[str, Any]]:
+        """Take the filtered user's details from the joined rows instead of querying users again"""
+        if not rows:
+            return None
+        row = rows[0]
+        user_info = {
+            "id": user_id,
+            "email": row.email,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "username": row.username
+        }
+        if include_is_admin:
+            user_info["is_admin"] = row.is_admin
+        return user_info
+
+    @staticmethod
+    def _build_pagination(
+        page: int,
+        limit: int,
+        total_count: Optional[int],
+        has_next: Optional[bool] = None,
+        has_prev: Optional[bool] = None,
+        next_cursor: Optional[str] = None,
+        count_estimated: bool = False
+    ) -> Dict[str, Any]:
+        """Calculate pagination info"""
+        total_pages = (total_count + limit - 1) // limit if total_count is not None else None
+        if has_next is None:
+            has_next = total_pages is not None and page < total_pages
+        if has_prev is None:
+            has_prev = page > 1
+        return {
+            "current_page": page,
+            "total_pages": total_pages,
+            "total_count": total_count,
+            "count_estimated": count_estimated,
+            "limit": limit,
+            "has_next": has_next,
+            "has_prev": has_prev,
+            "next_cursor": next_cursor
+        }
+
     @staticmethod
     def get_all_audit_logs(
         db: Session,
@@ -92,64 +377,18 @@ class DatabaseService:
             Dictionary containing all audit logs with pagination
         """
         try:
-            query = db.query(AuditLog)
-            
-            # Get total count for pagination
-            total_count = query.count()
-            
-            # Apply pagination
-            offset = (page - 1) * limit
-            logs = query.order_by(desc(AuditLog.created_at)).offset(offset).limit(limit).all()
-            
-            # Build response
-            log_list = []
-            for log in logs:
-                # Get user first name if user_id exists
-                user_name = None
-                if log.user_id:
-                    user = db.query(User).filter(User.id == log.user_id).first()
-                    if user:
-                        user_name = user.first_name
-                
-                log_list.append({
-                    "id": log.id,
-                    "user": user_name,
-                    "category": log.category,
-                    "action_details": log.action_details,
-                    "ip_address": log.ip_address,
-                    "user_agent": log.user_agent,
-                    "created_at": log.created_at.isoformat()
-                })
-            
-            # Calculate pagination info
-            total_pages = (total_count + limit - 1) // limit
-            has_next = page < total_pages
-            has_prev = page > 1
+            rows, pagination = DatabaseService._query_audit_logs(db, limit=limit, page=page)
             
             return {
-                "logs": log_list,
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": total_pages,
-                    "total_count": total_count,
-                    "limit": limit,
-                    "has_next": has_next,
-                    "has_prev": has_prev
-                }
+                "logs": [DatabaseService._serialize_audit_log(row) for row in rows],
+                "pagination": pagination
             }
             
         except Exception as e:
             logger.error(f"Error retrieving all audit logs: {e}")
             return {
                 "logs": [],
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": 0,
-                    "total_count": 0,
-                    "limit": limit,
-                    "has_next": False,
-                    "has_prev": False
-                },
+                "pagination": DatabaseService._build_pagination(page, limit, 0),
                 "error": str(e)
             }
 
@@ -173,51 +412,12 @@ class DatabaseService:
             Dictionary containing filtered audit logs with pagination
         """
         try:
-            query = db.query(AuditLog).filter(AuditLog.category == category)
-            
-            # Get total count for pagination
-            total_count = query.count()
-            
-            # Apply pagination
-            offset = (page - 1) * limit
-            logs = query.order_by(desc(AuditLog.created_at)).offset(offset).limit(limit).all()
-            
-            # Build response
-            log_list = []
-            for log in logs:
-                # Get user first name if user_id exists
-                user_name = None
-                if log.user_id:
-                    user = db.query(User).filter(User.id == log.user_id).first()
-                    if user:
-                        user_name = user.first_name
-                
-                log_list.append({
-                    "id": log.id,
-                    "user": user_name,
-                    "category": log.category,
-                    "action_details": log.action_details,
-                    "ip_address": log.ip_address,
-                    "user_agent": log.user_agent,
-                    "created_at": log.created_at.isoformat()
-                })
-            
-            # Calculate pagination info
-            total_pages = (total_count + limit - 1) // limit
-            has_next = page < total_pages
-            has_prev = page > 1
+            rows, pagination = DatabaseService._query_audit_logs(db, category=category, limit=limit, page=page)
             
             return {
                 "category_filter": category,
-                "logs": log_list,
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": total_pages,
-                    "total_count": total_count,
-                    "limit": limit,
-                    "has_next": has_next,
-                    "has_prev": has_prev
-                }
+                "logs": [DatabaseService._serialize_audit_log(row) for row in rows],
+                "pagination": pagination
             }
             
         except Exception as e:
@@ -225,14 +425,7 @@ class DatabaseService:
             return {
                 "category_filter": category,
                 "logs": [],
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": 0,
-                    "total_count": 0,
-                    "limit": limit,
-                    "has_next": False,
-                    "has_prev": False
-                },
+                "pagination": DatabaseService._build_pagination(page, limit, 0),
                 "error": str(e)
             }
 
@@ -256,56 +449,19 @@ class DatabaseService:
             Dictionary containing filtered audit logs with pagination
         """
         try:
-            query = db.query(AuditLog).filter(AuditLog.user_id == user_id)
+            rows, pagination = DatabaseService._query_audit_logs(db, user_id=user_id, limit=limit, page=page)
+            user_info = DatabaseService._user_info_from_rows(rows, user_id)
             
-            # Get total count for pagination
-            total_count = query.count()
-            
-            # Apply pagination
-            offset = (page - 1) * limit
-            logs = query.order_by(desc(AuditLog.created_at)).offset(offset).limit(limit).all()
-            
-            # Get user information
-            user = db.query(User).filter(User.id == user_id).first()
-            user_info = None
-            if user:
-                user_info = {
-                    "id": user.id,
-                    "email": user.email,
-                    "first_name": user.first_name,
-                    "last_name": user.last_name,
-                    "username": user.username
-                }
-            
-            # Build response
             log_list = []
-            for log in logs:
-                log_list.append({
-                    "id": log.id,
-                    "user": user_info,
-                    "category": log.category,
-                    "action_details": log.action_details,
-                    "ip_address": log.ip_address,
-                    "user_agent": log.user_agent,
-                    "created_at": log.created_at.isoformat()
-                })
-            
-            # Calculate pagination info
-            total_pages = (total_count + limit - 1) // limit
-            has_next = page < total_pages
-            has_prev = page > 1
+            for row in rows:
+                log_dict = DatabaseService._serialize_audit_log(row)
+                log_dict["user"] = user_info
+                log_list.append(log_dict)
             
             return {
                 "user_filter": user_info,
                 "logs": log_list,
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": total_pages,
-                    "total_count": total_count,
-                    "limit": limit,
-                    "has_next": has_next,
-                    "has_prev": has_prev
-                }
+                "pagination": pagination
             }
             
         except Exception as e:
@@ -313,14 +469,7 @@ class DatabaseService:
             return {
                 "user_filter": None,
                 "logs": [],
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": 0,
-                    "total_count": 0,
-                    "limit": limit,
-                    "has_next": False,
-                    "has_prev": False
-                },
+                "pagination": DatabaseService._build_pagination(page, limit, 0),
                 "error": str(e)
             }
 
@@ -346,76 +495,18 @@ class DatabaseService:
             Dictionary containing filtered audit logs with pagination
         """
         try:
-            query = db.query(AuditLog)
-            
-            # Apply category filter if specified
-            if category:
-                query = query.filter(AuditLog.category == category)
-            
-            # Apply user filter if specified
-            if user_id:
-                query = query.filter(AuditLog.user_id == user_id)
-            
-            # Get total count for pagination
-            total_count = query.count()
-            
-            # Apply pagination
-            offset = (page - 1) * limit
-            logs = query.order_by(desc(AuditLog.created_at)).offset(offset).limit(limit).all()
-            
-            # Get user information if user_id filter is applied
-            user_info = None
-            if user_id:
-                user = db.query(User).filter(User.id == user_id).first()
-                if user:
-                    user_info = {
-                        "id": user.id,
-                        "email": user.email,
-                        "first_name": user.first_name,
-                        "last_name": user.last_name,
-                        "username": user.username
-                    }
-            
-            # Build response
-            log_list = []
-            for log in logs:
-                # Get user first name for each log entry
-                log_user_name = None
-                if log.user_id:
-                    user = db.query(User).filter(User.id == log.user_id).first()
-                    if user:
-                        log_user_name = user.first_name
-                
-                log_list.append({
-                    "id": log.id,
-                    "user": log_user_name,
-                    "category": log.category,
-                    "action_details": log.action_details,
-                    "ip_address": log.ip_address,
-                    "user_agent": log.user_agent,
-                    "created_at": log.created_at.isoformat()
-                })
-            
-            # Calculate pagination info
-            total_pages = (total_count + limit - 1) // limit
-            has_next = page < total_pages
-            has_prev = page > 1
+            rows, pagination = DatabaseService._query_audit_logs(
+                db, category=category, user_id=user_id, limit=limit, page=page
+            )
             
             return {
                 "filters": {
                     "category": category,
                     "user_id": user_id,
-                    "user_info": user_info
+                    "user_info": DatabaseService._user_info_from_rows(rows, user_id) if user_id else None
                 },
-                "logs": log_list,
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": total_pages,
-                    "total_count": total_count,
-                    "limit": limit,
-                    "has_next": has_next,
-                    "has_prev": has_prev
-                }
+                "logs": [DatabaseService._serialize_audit_log(row) for row in rows],
+                "pagination": pagination
             }
             
         except Exception as e:
@@ -427,14 +518,7 @@ class DatabaseService:
                     "user_info": None
                 },
                 "logs": [],
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": 0,
-                    "total_count": 0,
-                    "limit": limit,
-                    "has_next": False,
-                    "has_prev": False
-                },
+                "pagination": DatabaseService._build_pagination(page, limit, 0),
                 "error": str(e)
             }
 
@@ -446,10 +530,13 @@ class DatabaseService:
         date_range: Optional[str] = None,
         user_type: Optional[str] = None,
         limit: int = 100,
-        page: int = 1
+        page: int = 1,
+        cursor: Optional[str] = None,
+        count_mode: Optional[str] = None,
+        search: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Get audit logs with comprehensive filtering (category + user + date range) and pagination
+        Get audit logs with comprehensive filtering (category + user + date range + search) and pagination
         
         Args:
             db: Database session
@@ -458,107 +545,27 @@ class DatabaseService:
             date_range: Optional date range filter (e.g., '7d', '30d', '1m', '3m', '6m', '1y')
             user_type: Optional user type filter (e.g., 'admin', 'user') - maps to is_admin field
             limit: Maximum number of logs per page
-            page: Page number (1-based)
+            page: Page number (1-based), ignored when cursor is given
+            cursor: next_cursor from the previous page for keyset pagination
+            count_mode: 'exact', 'auto', 'estimated' or 'none' (defaults to settings.audit_log_count_mode)
+            search: Optional full-text search over action details (e.g., an email, group ID or file ID)
             
         Returns:
             Dictionary containing filtered audit logs with pagination
         """
         try:
-            query = db.query(AuditLog)
-            
-            # Apply category filter if specified
-            if category:
-                query = query.filter(AuditLog.category == category)
-            
-            # Apply user filter if specified
-            if user_id:
-                query = query.filter(AuditLog.user_id == user_id)
-            
-            # Apply date range filter if specified
-            if date_range:
-                from datetime import timedelta
-                now = datetime.now(UTC)
-                
-                if date_range == '7d':
-                    start_date = now - timedelta(days=7)
-                elif date_range == '30d':
-                    start_date = now - timedelta(days=30)
-                elif date_range == '1m':
-                    start_date = now - timedelta(days=30)
-                elif date_range == '3m':
-                    start_date = now - timedelta(days=90)
-                elif date_range == '6m':
-                    start_date = now - timedelta(days=180)
-                elif date_range == '1y':
-                    start_date = now - timedelta(days=365)
-                else:
-                    # Try to parse as number of days
-                    try:
-                        days = int(date_range.replace('d', ''))
-                        start_date = now - timedelta(days=days)
-                    except ValueError:
-                        # Default to 7 days if invalid format
-                        start_date = now - timedelta(days=7)
-                
-                query = query.filter(AuditLog.created_at >= start_date)
-            
-            # Apply user type filter if specified (maps to is_admin field)
-            if user_type:
-                # Join with User table to filter by admin status
-                query = query.join(User, AuditLog.user_id == User.id)
-                if user_type.lower() == 'admin':
-                    query = query.filter(User.is_admin == True)
-                elif user_type.lower() == 'user':
-                    query = query.filter(User.is_admin == False)
-            
-            # Get total count for pagination
-            total_count = query.count()
-            
-            # Apply pagination
-            offset = (page - 1) * limit
-            logs = query.order_by(desc(AuditLog.created_at)).offset(offset).limit(limit).all()
-            
-            # Get user information if user_id filter is applied
-            user_info = None
-            if user_id:
-                user = db.query(User).filter(User.id == user_id).first()
-                if user:
-                    user_info = {
-                        "id": user.id,
-                        "email": user.email,
-                        "first_name": user.first_name,
-                        "last_name": user.last_name,
-                        "username": user.username,
-                        "is_admin": user.is_admin
-                    }
-            
-            # Build response
-            log_list = []
-            for log in logs:
-                # Get user first name for each log entry
-                log_user_name = None
-                log_user_is_admin = None
-                if log.user_id:
-                    user = db.query(User).filter(User.id == log.user_id).first()
-                    if user:
-                        log_user_name = user.first_name
-                        log_user_is_admin = user.is_admin
-                
-                log_list.append({
-                    "id": log.id,
-                    "user": log_user_name,
-                    "is_admin": log_user_is_admin,
-                    "category": log.category,
-                    "action_details": log.action_details,
-                    "ip_address": log.ip_address,
-                    "user_agent": log.user_agent,
-                    "created_at": log.created_at.isoformat()
-                })
-            
-            # Calculate pagination info
-            total_pages = (total_count + limit - 1) // limit
-            has_next = page < total_pages
-            has_prev = page > 1
+            rows, pagination = DatabaseService._query_audit_logs(
+                db,
+                category=category,
+                user_id=user_id,
+                date_range=date_range,
+                user_type=user_type,
+                limit=limit,
+                page=page,
+                cursor=cursor,
+                count_mode=count_mode,
+                search=search
+            )
             
             return {
                 "filters": {
@@ -566,17 +573,11 @@ class DatabaseService:
                     "user_id": user_id,
                     "user_type": user_type,
                     "date_range": date_range,
-                    "user_info": user_info
+                    "search": search,
+                    "user_info": DatabaseService._user_info_from_rows(rows, user_id, include_is_admin=True) if user_id else None
                 },
-                "logs": log_list,
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": total_pages,
-                    "total_count": total_count,
-                    "limit": limit,
-                    "has_next": has_next,
-                    "has_prev": has_prev
-                }
+                "logs": [DatabaseService._serialize_audit_log(row, include_is_admin=True) for row in rows],
+                "pagination": pagination
             }
             
         except Exception as e:
@@ -587,16 +588,188 @@ class DatabaseService:
                     "user_id": user_id,
                     "user_type": user_type,
                     "date_range": date_range,
+                    "search": search,
                     "user_info": None
                 },
                 "logs": [],
-                "pagination": {
-                    "current_page": page,
-                    "total_pages": 0,
-                    "total_count": 0,
-                    "limit": limit,
-                    "has_next": False,
-                    "has_prev": False
-                },
+                "pagination": DatabaseService._build_pagination(page, limit, 0),
+                "error": str(e)
+            }
+
+    @staticmethod
+    def get_user_audit_logs(
+        db: Session,
+        user_id: int,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        count_mode: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get a user's own audit logs, newest first, with keyset pagination
+        
+        Args:
+            db: Database session
+            user_id: ID of the user whose logs are returned
+            limit: Maximum number of logs per page
+            cursor: next_cursor from the previous page
+            count_mode: 'exact', 'auto', 'estimated' or 'none' (defaults to settings.audit_log_count_mode)
+            
+        Returns:
+            Dictionary containing the user's audit logs with pagination
+        """
+        try:
+            rows, pagination = DatabaseService._query_audit_logs(
+                db, user_id=user_id, limit=limit, cursor=cursor, count_mode=count_mode
+            )
+            
+            return {
+                "logs": [DatabaseService._serialize_audit_log(row) for row in rows],
+                "pagination": pagination
+            }
+            
+        except Exception as e:
+            logger.error(f"Error retrieving audit logs for user {user_id}: {e}")
+            return {
+                "logs": [],
+                "pagination": DatabaseService._build_pagination(1, limit, 0),
                 "error": str(e)
             }
+
+    @staticmethod
+    def _audit_log_partition_name(year: int, month: int) -> str:
+        return f"audit_logs_y{year:04d}m{month:02d}"
+
+    @staticmethod
+    def _add_months(year: int, month: int, months: int) -> Tuple[int, int]:
+        index = year * 12 + (month - 1) + months
+        return index // 12, index % 12 + 1
+
+    @staticmethod
+    def _list_audit_log_partitions(db: Session) -> Dict[str, Tuple[int, int]]:
+        """Return the attached monthly partitions of audit_logs as {name: (year, month)}"""
+        rows = db.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'audit_logs'::regclass"
+        )).scalars().all()
+
+        partitions = {}
+        for name in rows:
+            match = AUDIT_LOG_PARTITION_PATTERN.match(name)
+            if match:
+                partitions[name] = (int(match.group(1)), int(match.group(2)))
+        return partitions
+
+    @staticmethod
+    def _audit_log_insertable_columns(db: Session) -> List[str]:
+        """audit_logs columns in table order, without generated columns"""
+        rows = db.execute(text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = 'audit_logs' AND is_generated = 'NEVER' "
+            "ORDER BY ordinal_position"
+        )).scalars().all()
+        return list(rows)
+
+    @staticmethod
+    def ensure_audit_log_partitions(db: Session, months_ahead: Optional[int] = None) -> List[str]:
+        """
+        Create the monthly audit_logs partitions from the current month to months_ahead months ahead
+        
+        Rows that already landed in the default partition for a new month are moved into it
+        when the partition is created.
+        
+        Returns:
+            Names of the partitions that were created
+        """
+        if months_ahead is None:
+            months_ahead = settings.audit_log_partition_months_ahead
+
+        existing = DatabaseService._list_audit_log_partitions(db)
+        now = datetime.now(UTC)
+        created = []
+        columns = ", ".join(DatabaseService._audit_log_insertable_columns(db))
+
+        for offset in range(months_ahead + 1):
+            year, month = DatabaseService._add_months(now.year, now.month, offset)
+            name = DatabaseService._audit_log_partition_name(year, month)
+            if name in existing:
+                continue
+
+            next_year, next_month = DatabaseService._add_months(year, month, 1)
+            start = f"{year:04d}-{month:02d}-01"
+            end = f"{next_year:04d}-{next_month:02d}-01"
+
+            try:
+                # The new range must be empty in the default partition before the partition can be
+                # created, so park its rows in a temp table and route them back through the parent.
+                # Generated columns (action_details_tsv) can't be inserted into; they are recomputed.
+                moved = f"{name}_moved"
+                db.execute(text(
+                    f"CREATE TEMP TABLE {moved} ON COMMIT DROP AS "
+                    f"SELECT {columns} FROM audit_logs_default WITH NO DATA"
+                ))
+                db.execute(text(
+                    f"WITH moved AS (DELETE FROM audit_logs_default "
+                    f"WHERE created_at >= '{start}' AND created_at < '{end}' RETURNING {columns}) "
+                    f"INSERT INTO {moved} ({columns}) SELECT {columns} FROM moved"
+                ))
+                db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF audit_logs FOR VALUES FROM ('{start}') TO ('{end}')"
+                ))
+                db.execute(text(f"INSERT INTO audit_logs ({columns}) SELECT {columns} FROM {moved}"))
+                db.commit()
+                created.append(name)
+                logger.info(f"Created audit log partition {name}")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error creating audit log partition {name}: {e}")
+
+        return created
+
+    @staticmethod
+    def apply_audit_log_retention(
+        db: Session,
+        retention_months: Optional[int] = None,
+        action: Optional[str] = None
+    ) -> List[str]:
+        """
+        Detach audit_logs partitions older than the retention window
+        
+        Whole partitions are detached instead of deleting rows, so retention never bloats the
+        table or its indexes.
+        
+        Args:
+            db: Database session
+            retention_months: Months of audit logs to keep attached
+            action: 'archive' (move to the audit_archive schema), 'detach' or 'drop'
+            
+        Returns:
+            Names of the partitions that were detached
+        """
+        if retention_months is None:
+            retention_months = settings.audit_log_retention_months
+        action = action or settings.audit_log_retention_action
+
+        now = datetime.now(UTC)
+        cutoff = DatabaseService._add_months(now.year, now.month, -retention_months)
+        detached = []
+
+        for name, (year, month) in sorted(DatabaseService._list_audit_log_partitions(db).items()):
+            # Only partitions that end before the cutoff month are out of retention
+            if (year, month) >= cutoff:
+                continue
+
+            try:
+                db.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {name}"))
+                if action == "archive":
+                    db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {AUDIT_LOG_ARCHIVE_SCHEMA}"))
+                    db.execute(text(f"ALTER TABLE {name} SET SCHEMA {AUDIT_LOG_ARCHIVE_SCHEMA}"))
+                elif action == "drop":
+                    db.execute(text(f"DROP TABLE {name}"))
+                db.commit()
+                detached.append(name)
+                logger.info(f"Applied audit log retention ({action}) to partition {name}")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error applying audit log retention to partition {name}: {e}")
+
+        return detached
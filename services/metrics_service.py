@@ -0,0 +1,180 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from config import settings
+from services.tracing_service import tracer
+
+logger = logging.getLogger(__name__)
+
+# Stages of the document extraction pipeline
+PIPELINE_STAGES = ("s3_download", "decrypt", "ocr", "llm_extraction", "merge", "db_write")
+
+# Histogram upper bounds in seconds; OCR and LLM calls run from a few seconds to minutes
+PIPELINE_STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+METRIC_NAME = "parachute_pipeline_stage_duration_seconds"
+
+
+class StageTimer:
+    """Handed out by PipelineMetrics.time_stage; set outcome when a stage fails without raising"""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.outcome = "success"
+
+
+class PipelineMetrics:
+    """
+    Per-stage latency histograms for the extraction pipeline.
+
+    Celery runs tasks in prefork children, so observations are aggregated in a Redis hash
+    that every worker process (and the metrics endpoint) shares. When Redis is unavailable
+    they are kept in process memory instead. Rendered in the Prometheus text format.
+    """
+
+    REDIS_KEY = "metrics:pipeline_stage_seconds"
+
+    def __init__(self, buckets: Tuple[float, ...] = PIPELINE_STAGE_BUCKETS):
+        self.buckets = buckets
+        self._local: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def _redis_client(self):
+        from services.container import get_container
+        return get_container().redis_service.redis_client
+
+    def observe(self, stage: str, seconds: float, outcome: str = "success") -> None:
+        """Record one stage duration"""
+        if not settings.pipeline_metrics_enabled:
+            return
+
+        increments = {f"{stage}|{outcome}|count": 1, f"{stage}|{outcome}|sum": seconds}
+        for bound in self.buckets:
+            if seconds <= bound:
+                increments[f"{stage}|{outcome}|bucket|{bound}"] = 1
+        increments[f"{stage}|{outcome}|bucket|+Inf"] = 1
+
+        try:
+            client = self._redis_client
+            if client is not None:
+                pipe = client.pipeline(transaction=False)
+                for field, amount in increments.items():
+                    if isinstance(amount, float):
+                        pipe.hincrbyfloat(self.REDIS_KEY, field, amount)
+                    else:
+                        pipe.hincrby(self.REDIS_KEY, field, amount)
+                pipe.execute()
+                return
+        except Exception as e:
+            logger.warning(f"Could not record pipeline metric in Redis, keeping it in process: {e}")
+
+        with self._lock:
+            for field, amount in increments.items():
+                self._local[field] = self._local.get(field, 0) + amount
+
+    @contextmanager
+    def time_stage(self, stage: str):
+        """
+        Time a block as one stage (and trace it as a pipeline.<stage> span); an exception
+        records outcome="error" and propagates
+        """
+        timer = StageTimer(stage)
+        started = time.perf_counter()
+        with tracer.span(f"pipeline.{stage}") as span:
+            try:
+                yield timer
+            except BaseException:
+                timer.outcome = "error"
+                raise
+            finally:
+                self.observe(stage, time.perf_counter() - started, timer.outcome)
+                if span is not None:
+                    span.set_attribute("outcome", timer.outcome)
+
+    def _snapshot(self) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        try:
+            client = self._redis_client
+            if client is not None:
+                values = {field: float(value) for field, value in client.hgetall(self.REDIS_KEY).items()}
+        except Exception as e:
+            logger.warning(f"Could not read pipeline metrics from Redis: {e}")
+
+        with self._lock:
+            for field, value in self._local.items():
+                values[field] = values.get(field, 0) + value
+        return values
+
+    def render_prometheus(self) -> str:
+        """All stage histograms in the Prometheus text exposition format"""
+        series: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for field, value in self._snapshot().items():
+            stage, outcome, kind, *bound = field.split("|")
+            key = kind if not bound else f"bucket|{bound[0]}"
+            series.setdefault((stage, outcome), {})[key] = value
+
+        lines = [
+            f"# HELP {METRIC_NAME} Duration of each document extraction pipeline stage",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for (stage, outcome), values in sorted(series.items()):
+            labels = f'stage="{stage}",outcome="{outcome}"'
+            # observe() increments every bucket at or above the duration, so counts are cumulative
+            for bound in self.buckets:
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {int(values.get(f"bucket|{bound}", 0))}')
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {int(values.get("bucket|+Inf", 0))}')
+            lines.append(f"{METRIC_NAME}_sum{{{labels}}} {values.get('sum', 0.0)}")
+            lines.append(f"{METRIC_NAME}_count{{{labels}}} {int(values.get('count', 0))}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear all recorded observations"""
+        with self._lock:
+            self._local.clear()
+        try:
+            client = self._redis_client
+            if client is not None:
+                client.delete(self.REDIS_KEY)
+        except Exception as e:
+            logger.error(f"Error resetting pipeline metrics: {e}")
+
+    def start_http_server(self, host: Optional[str] = None, port: Optional[int] = None) -> None:
+        """Serve GET /metrics from a daemon thread"""
+        if self._server is not None or not settings.pipeline_metrics_enabled:
+            return
+
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return
+
+        host = host or settings.pipeline_metrics_host
+        port = port or settings.pipeline_metrics_port
+        try:
+            self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            logger.error(f"Could not start pipeline metrics endpoint on {host}:{port}: {e}")
+            return
+        threading.Thread(target=self._server.serve_forever, name="pipeline-metrics", daemon=True).start()
+        logger.info(f"Pipeline metrics available at http://{host}:{port}/metrics")
+
+
+# Global instance
+pipeline_metrics = PipelineMetrics()
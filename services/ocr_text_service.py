@@ -0,0 +1,98 @@
+import re
+import logging
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Paragraphs of fax cover sheets and confidentiality disclaimers
+BOILERPLATE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in [
+        r"this (fax|facsimile|message|transmission) (may contain|contains) (sensitive|confidential|privileged)",
+        r"if you (have )?received this (fax|facsimile|message|transmission|communication) in error",
+        r"confidentiality notice",
+        r"intended (only )?for the (sole )?use of the (individual|intended recipient|addressee)",
+        r"athenahealth\.com/NotMyFax",
+    ]
+]
+
+# Cover sheet titles and "Label: value" lines, which carry nothing to extract
+_COVER_SHEET_TITLE = re.compile(r"^[\s#*|>_-]*(fax cover sheet|fax cover page|facsimile( cover sheet)?|fax)[\s*|_-]*$", re.IGNORECASE | re.MULTILINE)
+_COVER_SHEET_FIELD = re.compile(
+    r"^[\s#*|>_-]*(to|from|attn|attention|re|subject|date|time|phone|fax|fax number|pages|number of pages|"
+    r"total pages|pages including cover|cc|comments|urgent)\s*[:#]",
+    re.IGNORECASE
+)
+
+# Mistral OCR placeholders for images that were not returned, e.g. ![img-0.jpeg](img-0.jpeg)
+_IMAGE_PLACEHOLDER = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_INLINE_WHITESPACE = re.compile(r"[ \t\u00a0]+")
+
+# tiktoken encoding for count_tokens, loaded on first use (False when tiktoken is unavailable)
+_encoding = None
+
+
+def is_boilerplate_page(markdown: str) -> bool:
+    """True for fax cover sheets and disclaimer-only pages with (almost) no other content"""
+    paragraphs = [paragraph for paragraph in re.split(r"\n\s*\n", markdown) if paragraph.strip()]
+    remaining = [paragraph for paragraph in paragraphs if not any(pattern.search(paragraph) for pattern in BOILERPLATE_PATTERNS)]
+    if len(remaining) == len(paragraphs) and not _COVER_SHEET_TITLE.search(markdown):
+        return False
+
+    content = "\n".join(
+        line
+        for paragraph in remaining
+        for line in paragraph.splitlines()
+        if not _COVER_SHEET_FIELD.match(line) and not _COVER_SHEET_TITLE.match(line)
+    )
+    return len(re.sub(r"[\W_]+", "", content)) < settings.ocr_boilerplate_max_content_chars
+
+
+def ocr_pages_markdown(ocr_response) -> str:
+    """Markdown of every OCR page, in order, under "--- Page N ---" markers"""
+    return "\n\n".join(f"--- Page {page.index + 1} ---\n\n{page.markdown}" for page in ocr_response.pages)
+
+
+def normalize_ocr_markdown(ocr_response) -> str:
+    """
+    Prompt text for the LLM: page markdown under page markers, without boilerplate pages
+    (never all of them), disclaimer paragraphs or image placeholders, and with whitespace collapsed.
+    """
+    pages = list(ocr_response.pages)
+    if settings.ocr_boilerplate_max_content_chars > 0:
+        kept = [page for page in pages if not is_boilerplate_page(page.markdown)]
+        if kept and len(kept) < len(pages):
+            logger.info(f"Dropped {len(pages) - len(kept)} boilerplate pages before extraction: "
+                        f"{sorted({page.index + 1 for page in pages} - {page.index + 1 for page in kept})}")
+            pages = kept
+
+    sections = []
+    for page in pages:
+        paragraphs = []
+        for paragraph in re.split(r"\n\s*\n", _IMAGE_PLACEHOLDER.sub("", page.markdown)):
+            if any(pattern.search(paragraph) for pattern in BOILERPLATE_PATTERNS):
+                continue
+            lines = [_INLINE_WHITESPACE.sub(" ", line).strip() for line in paragraph.splitlines()]
+            paragraph = "\n".join(line for line in lines if line)
+            if paragraph:
+                paragraphs.append(paragraph)
+        sections.append(f"--- Page {page.index + 1} ---\n\n" + "\n\n".join(paragraphs))
+    return "\n\n".join(sections)
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of text for the extraction model (about 4 characters per token without tiktoken)"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            try:
+                _encoding = tiktoken.encoding_for_model("gpt-4.1")
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, estimating token counts from length: {e}")
+            _encoding = False
+    if _encoding is False:
+        return len(text) // 4
+    return len(_encoding.encode(text, disallowed_special=()))
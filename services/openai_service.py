@@ -1,28 +1,47 @@
 from openai import OpenAI
 from config import settings
+from services.tracing_service import traced, tracer
 import os
 import time
 import inspect
-from rich import print
 import json
 import logging
 import traceback
 import asyncio
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
-from prompt_registry.document_extraction_prompt import system_prompt_doc_extraction, human_prompt_doc_extraction, MEDICAL_DOC_SCHEMA
+from pydantic import ValidationError
+from prompt_registry.document_extraction_prompt import (
+    system_prompt_doc_extraction,
+    human_prompt_doc_extraction,
+    human_prompt_doc_section_extraction,
+    medical_doc_section_schema,
+    MEDICAL_DOC_SCHEMA,
+    MEDICAL_DOC_SECTIONS
+)
+from models.pydantic_models.extraction_pydantic_models import (
+    MEDICAL_DOC_SECTION_MODELS,
+    MedicalDocumentExtraction,
+    section_response_model,
+    strict_json_schema
+)
 
 class LLMService:
     def __init__(self):
-        self.openai_client = OpenAI(api_key=settings.openai_api_key)
+        base_url = settings.openai_base_url or None
+        self.openai_client = OpenAI(api_key=settings.openai_api_key, base_url=base_url)
         #self.openai = ChatOpenAI(api_key=settings.openai_api_key, model="gpt-4o-mini", temperature=0.2,timeout=None, max_retries=2)
-        self.openai = ChatOpenAI(api_key=settings.openai_api_key, model="gpt-4.1",timeout=None, max_retries=2)
+        self.openai = ChatOpenAI(api_key=settings.openai_api_key, base_url=base_url, model="gpt-4.1",timeout=None, max_retries=2)
         self.logger = logging.getLogger(__name__)
 
+    @traced("openai.extract_document")
     async def process_medical_document(self, markdown_content: str):
         """
         Processes a medical document and returns a structured JSON of the document.
+        Each section is validated against its extraction model; sections that fail are re-requested on their own.
         """
+        if settings.llm_extraction_mode == "sectioned":
+            return await self.process_medical_document_sectioned(markdown_content)
         try:
             messages = [
                 SystemMessage(system_prompt_doc_extraction),
@@ -33,14 +52,118 @@ class LLMService:
                     )
                 )
             ]
-            response = self.openai.invoke(messages)
+            response = self._structured_llm("medical_document", MedicalDocumentExtraction).invoke(messages)
             response = response.content
-            return response
         except Exception as e:
             self.logger.error(f"Error processing medical document: {str(e)}")
             self.logger.error(f"Full traceback: {traceback.format_exc()}")
             return None
 
+        try:
+            document = json.loads(self._strip_code_fence(response))
+            if not isinstance(document, dict):
+                raise ValueError("response is not a JSON object")
+        except ValueError as e:
+            self.logger.error(f"Extraction response is not valid JSON, re-requesting every section: {e}")
+            document = {}
+
+        sections = {}
+        failing = []
+        for section, model in MEDICAL_DOC_SECTION_MODELS.items():
+            if section not in document:
+                failing.append(section)
+                continue
+            try:
+                sections[section] = model.model_validate(document[section]).model_dump()
+            except ValidationError as e:
+                self.logger.warning(f"Section {section} failed validation ({e.error_count()} errors): {e.errors()[0]['msg']} at {e.errors()[0]['loc']}")
+                failing.append(section)
+
+        if failing:
+            self.logger.warning(f"Re-requesting {len(failing)} of {len(MEDICAL_DOC_SECTIONS)} sections: {failing}")
+            sections.update(await self._extract_sections(markdown_content, failing))
+        if not sections:
+            return None
+        return json.dumps({section: sections[section] for section in MEDICAL_DOC_SECTIONS if section in sections})
+
+    async def process_medical_document_sectioned(self, markdown_content: str):
+        """
+        Extracts each top-level section of MEDICAL_DOC_SCHEMA with its own concurrent call and
+        assembles them into the same JSON document as process_medical_document. Sections that
+        fail are left out; returns None only when every section failed.
+        """
+        document = await self._extract_sections(markdown_content, list(MEDICAL_DOC_SECTIONS))
+        if not document:
+            return None
+        return json.dumps(document)
+
+    async def _extract_sections(self, markdown_content: str, sections: list) -> dict:
+        """Extract sections concurrently; returns section -> validated value for the ones that succeeded"""
+        semaphore = asyncio.Semaphore(max(1, settings.llm_section_concurrency))
+
+        async def extract(section):
+            async with semaphore:
+                return await self._extract_section(markdown_content, section)
+
+        results = await asyncio.gather(*(extract(section) for section in sections))
+        failed = [section for section, result in zip(sections, results) if result is None]
+        if failed:
+            self.logger.error(f"Extraction failed for {len(failed)} of {len(sections)} sections: {failed}")
+        return {section: result for section, result in zip(sections, results) if result is not None}
+
+    async def _extract_section(self, markdown_content: str, section: str):
+        """
+        Extract and validate one top-level section, retrying it up to settings.llm_repair_attempts
+        times; returns the validated value or None on failure
+        """
+        model = MEDICAL_DOC_SECTION_MODELS[section]
+        llm = self._structured_llm(f"{section}_section", section_response_model(section))
+        # The markdown comes first so every section call shares the same cacheable prompt prefix
+        messages = [
+            SystemMessage(system_prompt_doc_extraction),
+            HumanMessage(
+                human_prompt_doc_section_extraction.format(
+                    markdown_content=markdown_content,
+                    section=section,
+                    schema=medical_doc_section_schema(section)
+                )
+            )
+        ]
+
+        attempts = max(0, settings.llm_repair_attempts) + 1
+        for attempt in range(1, attempts + 1):
+            with tracer.span("openai.extract_section", {"section": section, "attempt": attempt}):
+                try:
+                    response = await llm.ainvoke(messages)
+                    parsed = json.loads(self._strip_code_fence(response.content))
+                    # Accept the section's value returned without its top-level key
+                    if isinstance(parsed, dict) and section in parsed:
+                        parsed = parsed[section]
+                    return model.model_validate(parsed).model_dump()
+                except ValidationError as e:
+                    self.logger.warning(f"Section {section} failed validation (attempt {attempt}/{attempts}): {e.errors()[0]['msg']} at {e.errors()[0]['loc']}")
+                except Exception as e:
+                    self.logger.error(f"Error extracting section {section} (attempt {attempt}/{attempts}): {str(e)}")
+        return None
+
+    def _structured_llm(self, name: str, model):
+        """The chat model, constrained to a model's JSON schema when structured output is enabled"""
+        if not settings.llm_structured_output:
+            return self.openai
+        return self.openai.bind(response_format={
+            "type": "json_schema",
+            "json_schema": {"name": name, "schema": strict_json_schema(model), "strict": True}
+        })
+
+    @staticmethod
+    def _strip_code_fence(content: str) -> str:
+        """Remove a ```json ... ``` fence around a JSON response"""
+        content = content.strip()
+        if content.startswith("```"):
+            content = content.split("\n", 1)[1] if "\n" in content else ""
+            content = content.rsplit("```", 1)[0]
+        return content
+
     def merge_json_responses(self, json_responses: list):
         """
         Merges multiple JSON responses from document processing.
@@ -172,16 +295,9 @@ class LLMService:
             if not new_list:
                 return base_list
             
-            # Handle empty lists
-            if len(base_list) == 0:
-                return new_list
-            if len(new_list) == 0:
-                return base_list
-            
-            # For simple lists (like pages_checked), combine and deduplicate
+            # For simple lists (like pages_checked), combine and deduplicate keeping first-seen order
             if isinstance(base_list[0], (str, int, float)) and isinstance(new_list[0], (str, int, float)):
-                combined = list(set(base_list + new_list))
-                return combined
+                return list(dict.fromkeys(base_list + new_list))
             
             # For complex lists (like ICD10 codes, HCPCS codes, phone numbers), merge by confidence
             if isinstance(base_list[0], dict) and isinstance(new_list[0], dict):
@@ -194,51 +310,64 @@ class LLMService:
             self.logger.warning(f"Error merging lists at {path}: {e}")
             return base_list
 
+    @staticmethod
+    def _list_item_key(item):
+        """
+        Identity of a complex list item: its code (ICD10/HCPCS) or else its value (phone
+        numbers, item descriptions), normalized for case and whitespace. None if it has neither.
+        """
+        if "code" in item:
+            field, identity = "code", item.get("code")
+        elif "value" in item:
+            field, identity = "value", item.get("value")
+        else:
+            return None
+
+        if isinstance(identity, str):
+            identity = " ".join(identity.split())
+            identity = identity.upper() if field == "code" else identity.casefold()
+        elif isinstance(identity, (dict, list)):
+            identity = json.dumps(identity, sort_keys=True)
+        return field, identity
+
     def _merge_complex_lists(self, base_list, new_list, path=""):
-        """Merge complex lists (like ICD10 codes, HCPCS codes, phone numbers) based on confidence"""
+        """
+        Merge complex lists (like ICD10 codes, HCPCS codes, phone numbers) based on confidence.
+        Items are matched through a hash index on their identity key, so merging is linear in
+        the list lengths; matched items keep their position and new items are appended in order.
+        """
         try:
             merged = base_list.copy()
+
+            # Identity key -> position in merged (first occurrence wins, as with a linear scan)
+            index = {}
+            for i, item in enumerate(merged):
+                if isinstance(item, dict):
+                    key = self._list_item_key(item)
+                    if key is not None:
+                        index.setdefault(key, i)
             
             for new_item in new_list:
                 if not isinstance(new_item, dict):
                     merged.append(new_item)
                     continue
-                
-                # Check if similar item exists in base list
-                found_match = False
-                for i, base_item in enumerate(merged):
-                    if not isinstance(base_item, dict):
-                        continue
-                    
-                    # Different matching strategies based on the field type
-                    is_match = False
-                    
-                    # For ICD10 codes: match by code
-                    if "code" in new_item and "code" in base_item:
-                        is_match = base_item.get("code") == new_item.get("code")
-                    
-                    # For phone numbers: match by value
-                    elif "value" in new_item and "value" in base_item:
-                        is_match = base_item.get("value") == new_item.get("value")
-                    
-                    # For item descriptions: match by value
-                    elif "value" in new_item and "value" in base_item:
-                        is_match = base_item.get("value") == new_item.get("value")
-                    
-                    if is_match:
-                        # Same item, compare confidence
-                        base_confidence = base_item.get("confidence", 0.0)
-                        new_confidence = new_item.get("confidence", 0.0)
-                        
-                        if new_confidence > base_confidence:
-                            self.logger.debug(f"Replacing item in {path} with higher confidence: {new_confidence} > {base_confidence}")
-                            merged[i] = new_item
-                        found_match = True
-                        break
-                
-                if not found_match:
+
+                key = self._list_item_key(new_item)
+                i = index.get(key) if key is not None else None
+                if i is None:
                     # Add new unique item
+                    if key is not None:
+                        index[key] = len(merged)
                     merged.append(new_item)
+                    continue
+
+                # Same item, compare confidence
+                base_item = merged[i]
+                base_confidence = base_item.get("confidence", 0.0)
+                new_confidence = new_item.get("confidence", 0.0)
+                if new_confidence > base_confidence:
+                    self.logger.debug(f"Replacing item in {path} with higher confidence: {new_confidence} > {base_confidence}")
+                    merged[i] = new_item
             
             return merged
             
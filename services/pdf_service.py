@@ -1,37 +1,66 @@
 import os
+import time
+import uuid
 import base64
-import pypandoc
+import string
+import hashlib
 import fitz  # PyMuPDF
 import tempfile
 import logging
 from datetime import datetime
-from mistralai import Mistral
+from concurrent.futures import ThreadPoolExecutor
 from config import settings
-from services.aws_service import file_handler
+from services.container import get_container
+from services.request_timing import record_timing
+from services.tracing_service import traced, tracer
 from models.database_models import GeneratedDocument
 
 logger = logging.getLogger(__name__)
 
+# Characters besides letters and digits expected in readable native text
+_READABLE_PUNCTUATION = set(string.punctuation + "•–—‘’“”…§°©®±·")
+
 class PdfProcessor:
     def __init__(self):
         # You can set the API key via argument or environment variable
         self.api_key = settings.mistral_api_key
         if not self.api_key:
             raise ValueError("Please set the mistral_api_key environment variable or provide an API key.")
-        self.client = Mistral(api_key=self.api_key)
+        from mistralai import Mistral
+
+        self.client = Mistral(api_key=self.api_key, server_url=settings.mistral_server_url or None)
 
-    def extract_text_from_pdf(self, pdf_path):
+    @traced("mistral.ocr")
+    def extract_text_from_pdf(self, pdf_path, group_id=None):
         """
         Extracts text from a local PDF using Mistral OCR.
         Returns the OCR response (including markdown text).
+
+        Pages whose embedded text layer is usable are read with PyMuPDF, pages already OCRed
+        for the same document group (or repeated in this PDF) are reused, and the rest are
+        OCRed in concurrent page-range chunks. Pages are claimed in Redis before OCR, so a page
+        shared by documents of the group processed at the same time is OCRed by one of them and
+        waited for by the others. All pages come back in order in one response.
         """
-        # Read and Base64-encode the PDF
+        try:
+            doc = fitz.open(pdf_path)
+        except Exception as e:
+            logger.warning(f"Could not open {pdf_path} with PyMuPDF, sending it whole to OCR: {e}")
+            doc = None
+
+        if doc is not None:
+            with doc:
+                return self._extract_pages(doc, pdf_path, group_id)
+
+        # Read the PDF and send it in a single call
         with open(pdf_path, "rb") as f:
             pdf_bytes = f.read()
-        base64_pdf = base64.b64encode(pdf_bytes).decode("utf-8")
+        return self._ocr_pdf_bytes(pdf_bytes)
 
-        # Call OCR on the Base64-encoded PDF
-        ocr_response = self.client.ocr.process(
+    def _ocr_pdf_bytes(self, pdf_bytes):
+        """Call Mistral OCR on a PDF passed as a Base64 data URL"""
+        base64_pdf = base64.b64encode(pdf_bytes).decode("utf-8")
+        return self.client.ocr.process(
             model="mistral-ocr-latest",
             document={
                 "type": "document_url",
@@ -40,7 +69,207 @@ class PdfProcessor:
             include_image_base64=False  # Set to True if you need embedded images
         )
 
-        return ocr_response
+    def _native_text_pages(self, doc):
+        """Page number -> embedded text, for the pages whose text layer can stand in for OCR"""
+        native_pages = {}
+        for page in doc:
+            text = page.get_text("text", sort=True).strip()
+            if self._is_native_text_usable(page, text):
+                native_pages[page.number] = text
+        return native_pages
+
+    @staticmethod
+    def _is_native_text_usable(page, text):
+        """A page skips OCR when it has enough readable text and is not mostly a scanned image"""
+        if len(text) < settings.native_text_min_chars:
+            return False
+
+        # Broken font encodings extract as replacement, private-use or control characters
+        visible = [ch for ch in text if not ch.isspace()]
+        readable = sum(1 for ch in visible if ch.isalnum() or ch in _READABLE_PUNCTUATION)
+        if readable / len(visible) < settings.native_text_min_quality:
+            return False
+
+        # Scans, faxes and handwriting come in as images, possibly over a partial text layer
+        page_area = page.rect.width * page.rect.height
+        image_area = 0.0
+        for image in page.get_image_info():
+            bbox = fitz.Rect(image["bbox"]) & page.rect
+            if not bbox.is_empty:
+                image_area += bbox.width * bbox.height
+        return page_area > 0 and image_area / page_area <= settings.native_text_max_image_coverage
+
+    @staticmethod
+    def _page_fingerprint(page):
+        """Hash of a low-resolution grayscale rendering; equal for identical pages"""
+        pix = page.get_pixmap(dpi=settings.ocr_page_fingerprint_dpi, colorspace=fitz.csGRAY)
+        return hashlib.sha256(f"{pix.width}x{pix.height}:".encode() + pix.samples).hexdigest()
+
+    def _extract_pages(self, doc, pdf_path, group_id=None):
+        """Build the page list from native text, the group's OCR page cache and chunked OCR, in page order"""
+        from mistralai.models import OCRPageDimensions, OCRPageObject, OCRResponse, OCRUsageInfo
+
+        page_count = len(doc)
+        native_pages = self._native_text_pages(doc) if settings.native_text_enabled else {}
+        pending = [number for number in range(page_count) if number not in native_pages]
+
+        # Pages that look the same are OCRed once: reuse the group's cache, leave pages another
+        # document of the group has claimed to it, then OCR the first copy in this PDF
+        fingerprints = {}
+        cached = {}
+        claimed_elsewhere = set()
+        redis_service = None
+        claim_token = uuid.uuid4().hex
+        if settings.ocr_page_dedupe_enabled and pending:
+            fingerprints = {number: self._page_fingerprint(doc[number]) for number in pending}
+            if group_id:
+                redis_service = get_container().redis_service
+                cached = redis_service.get_ocr_pages(group_id, sorted(set(fingerprints.values())))
+                uncached = sorted(set(fingerprints.values()) - set(cached))
+                claimed = redis_service.claim_ocr_pages(group_id, uncached, claim_token, settings.ocr_page_claim_wait_seconds)
+                claimed_elsewhere = set(uncached) - set(claimed)
+        first_copy = {}
+        ocr_page_numbers = []
+        for number in pending:
+            fingerprint = fingerprints.get(number)
+            if fingerprint is None:
+                ocr_page_numbers.append(number)
+            elif fingerprint not in cached and fingerprint not in claimed_elsewhere and fingerprint not in first_copy:
+                first_copy[fingerprint] = number
+                ocr_page_numbers.append(number)
+
+        pages = {
+            number: OCRPageObject(
+                index=number,
+                markdown=text,
+                images=[],
+                dimensions=OCRPageDimensions(dpi=72, height=int(doc[number].rect.height), width=int(doc[number].rect.width))
+            )
+            for number, text in native_pages.items()
+        }
+
+        try:
+            responses = self._ocr_pages(doc, pdf_path, ocr_page_numbers, pages)
+        except Exception:
+            if redis_service is not None:
+                redis_service.release_ocr_page_claims(group_id, list(first_copy), claim_token)
+            raise
+        # Cache before waiting, so two documents waiting on each other's pages both get them
+        self._store_ocr_pages(redis_service, group_id, first_copy, pages)
+
+        if claimed_elsewhere:
+            cached.update(self._wait_for_ocr_pages(redis_service, group_id, claimed_elsewhere))
+            # Pages whose claim holder failed or ran out of time are OCRed here after all
+            late_copy = {}
+            for number in pending:
+                fingerprint = fingerprints[number]
+                if fingerprint in claimed_elsewhere and fingerprint not in cached and fingerprint not in late_copy:
+                    late_copy[fingerprint] = number
+            if late_copy:
+                logger.warning(f"{len(late_copy)} pages of {pdf_path} claimed by another document were not OCRed in time, OCRing them here")
+                responses += self._ocr_pages(doc, pdf_path, sorted(late_copy.values()), pages)
+                self._store_ocr_pages(redis_service, group_id, late_copy, pages)
+                first_copy.update(late_copy)
+                ocr_page_numbers += late_copy.values()
+
+        # Fill in the repeated and cached pages
+        for number, fingerprint in fingerprints.items():
+            if number in pages:
+                continue
+            if fingerprint in cached:
+                pages[number] = OCRPageObject(index=number, markdown=cached[fingerprint], images=[], dimensions=None)
+            elif first_copy[fingerprint] in pages:
+                pages[number] = pages[first_copy[fingerprint]].model_copy(update={"index": number})
+
+        reused = len(pending) - len(ocr_page_numbers)
+        if native_pages or reused:
+            logger.info(f"Pages of {pdf_path}: {len(native_pages)} native text, {reused} reused, {len(ocr_page_numbers)} OCRed")
+        return OCRResponse(
+            pages=[pages[number] for number in sorted(pages)],
+            model=responses[0].model if responses else "pymupdf-text",
+            usage_info=OCRUsageInfo(pages_processed=sum(response.usage_info.pages_processed for response in responses))
+        )
+
+    def _ocr_pages(self, doc, pdf_path, numbers, pages):
+        """OCR the given page numbers in concurrent chunks into `pages`; returns the chunk responses"""
+        if not numbers:
+            return []
+
+        page_count = len(doc)
+        chunk_pages = settings.ocr_chunk_pages
+        if chunk_pages <= 0 or len(numbers) <= max(chunk_pages, settings.ocr_chunk_min_pages):
+            chunk_pages = len(numbers)
+        chunks = [numbers[i:i + chunk_pages] for i in range(0, len(numbers), chunk_pages)]
+        chunk_pdfs = []
+        for chunk in chunks:
+            if len(chunk) == page_count:
+                # Every page needs OCR: send the original file
+                with open(pdf_path, "rb") as f:
+                    chunk_pdfs.append(f.read())
+                continue
+            with fitz.open() as part:
+                for number in chunk:
+                    part.insert_pdf(doc, from_page=number, to_page=number)
+                chunk_pdfs.append(part.tobytes(garbage=3, deflate=True))
+        logger.info(f"OCR of {len(numbers)} of {page_count} pages in {len(chunks)} chunks of up to {chunk_pages} pages")
+
+        # Chunk spans run on pool threads, so hand them the current trace explicitly
+        traceparent = tracer.current_traceparent()
+        workers = max(1, min(settings.ocr_chunk_concurrency, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-chunk") as executor:
+            futures = [
+                executor.submit(self._ocr_chunk, chunk_pdf, f"{chunk[0] + 1}-{chunk[-1] + 1}", traceparent)
+                for chunk_pdf, chunk in zip(chunk_pdfs, chunks)
+            ]
+            responses = [future.result() for future in futures]
+
+        # Chunk page indexes restart at 0; map them back to their place in the document
+        for chunk, response in zip(chunks, responses):
+            for page in response.pages:
+                pages[chunk[page.index]] = page.model_copy(update={"index": chunk[page.index]})
+        return responses
+
+    @staticmethod
+    def _store_ocr_pages(redis_service, group_id, copies, pages):
+        """Cache newly OCRed pages (fingerprint -> page number) for the rest of the group"""
+        if redis_service is None or not copies:
+            return
+        redis_service.store_ocr_pages(
+            group_id,
+            {fingerprint: pages[number].markdown for fingerprint, number in copies.items() if number in pages},
+            settings.ocr_page_cache_ttl_seconds
+        )
+
+    @staticmethod
+    def _wait_for_ocr_pages(redis_service, group_id, fingerprints):
+        """
+        Poll the group cache for pages another document claimed, until they are all cached, their
+        claims are gone (the holder failed) or settings.ocr_page_claim_wait_seconds have passed
+        """
+        found = {}
+        deadline = time.monotonic() + settings.ocr_page_claim_wait_seconds
+        while True:
+            missing = sorted(set(fingerprints) - set(found))
+            found.update(redis_service.get_ocr_pages(group_id, missing))
+            missing = [fingerprint for fingerprint in missing if fingerprint not in found]
+            if not missing or time.monotonic() >= deadline or not redis_service.get_ocr_page_claims(group_id, missing):
+                return found
+            time.sleep(0.5)
+
+    def _ocr_chunk(self, pdf_bytes, pages, traceparent=None):
+        """OCR one chunk of pages, retrying it on its own with exponential backoff"""
+        attempts = settings.ocr_chunk_retries + 1
+        for attempt in range(1, attempts + 1):
+            try:
+                with tracer.span("mistral.ocr_chunk", {"pages": pages, "attempt": attempt}, traceparent):
+                    return self._ocr_pdf_bytes(pdf_bytes)
+            except Exception as e:
+                if attempt == attempts:
+                    logger.error(f"OCR of pages {pages} failed after {attempts} attempts: {e}")
+                    raise
+                delay = settings.ocr_chunk_retry_backoff_seconds * 2 ** (attempt - 1)
+                logger.warning(f"OCR of pages {pages} failed (attempt {attempt}/{attempts}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
 
     
     def fill_purewick_resupply_agreement(self, pdf_path, extracted_data, output_path="filled_purewick.pdf"):
@@ -959,7 +1188,7 @@ class PdfProcessor:
         
         return " ".join(address_parts) if address_parts else ""
 
-    def _convert_to_non_editable(self, input_path: str, output_path: str, dpi: int = 150) -> None:
+    def _convert_to_non_editable(self, input_path: str, output_path: str, dpi: int = None) -> None:
         """
         Convert filled PDF to non-editable by rendering each page as an image.
         This completely removes all form fields and makes the PDF truly read-only.
@@ -967,8 +1196,9 @@ class PdfProcessor:
         Args:
             input_path: Path to the filled PDF
             output_path: Path where the non-editable PDF will be saved
-            dpi: Resolution for rendering (150 is good quality, default)
+            dpi: Resolution for rendering (defaults to settings.pdf_flatten_dpi, 150)
         """
+        dpi = dpi or settings.pdf_flatten_dpi
         try:
             # Open the filled PDF
             filled_doc = fitz.open(input_path)
@@ -1005,6 +1235,7 @@ class PdfProcessor:
             import shutil
             shutil.copy(input_path, output_path)
 
+    @traced("templates.fill")
     def fill_pdf_templates(self, json_result, group_id, templates, db_session):
         """
         Fill PDF templates with extracted data using PyMuPDF (fitz).
@@ -1019,6 +1250,8 @@ class PdfProcessor:
             List of dictionaries containing S3 information for generated documents
         """
         try:
+            file_handler = get_container().file_handler
+
             # Generate PDFs for requested templates
             generated_documents = []            
             for temp in templates:
@@ -1036,6 +1269,7 @@ class PdfProcessor:
                     
                     # Function mapping
                     logger.info(f"Template name: '{temp.name}' - checking for template type")
+                    render_started = time.perf_counter()
                     try:
                         if "purewick" in temp.name.lower():
                             logger.info("Using Purewick resupply agreement filling function")
@@ -1109,6 +1343,8 @@ class PdfProcessor:
                     except Exception as e:
                         logger.error(f"Error filling PDF template {temp.name}: {e}")
                         continue
+                    finally:
+                        record_timing("render", time.perf_counter() - render_started)
                     
                     # Upload filled PDF to S3 and create database entry
                     try:
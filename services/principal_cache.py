@@ -0,0 +1,176 @@
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Dict, Any
+from config import settings
+from models.database_models import User
+
+logger = logging.getLogger(__name__)
+
+# User columns cached for authentication; never includes hashed_password
+PRINCIPAL_FIELDS = ("id", "email", "first_name", "last_name", "username", "is_active", "is_admin", "created_at", "updated_at")
+PRINCIPAL_DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+def principal_from_user(user: User) -> Dict[str, Any]:
+    """Snapshot the authentication-relevant fields of a user"""
+    principal = {}
+    for field in PRINCIPAL_FIELDS:
+        value = getattr(user, field)
+        principal[field] = value.isoformat() if isinstance(value, datetime) else value
+    return principal
+
+
+def user_from_principal(principal: Dict[str, Any]) -> User:
+    """Build a detached User from a cached principal (not bound to any session)"""
+    values = dict(principal)
+    for field in PRINCIPAL_DATETIME_FIELDS:
+        if values.get(field):
+            values[field] = datetime.fromisoformat(values[field])
+    return User(**values)
+
+
+class PrincipalCache:
+    """
+    Short-TTL cache of authenticated user principals keyed by email (the JWT subject).
+
+    Lookups hit an in-process LRU first, then Redis, so authenticated requests need no
+    database query in the steady state. invalidate() deletes the Redis copy and publishes
+    on a channel that every process listens to, dropping its local copy immediately.
+
+    The in-process layer is only used while the invalidation listener is subscribed; without
+    Redis every lookup falls through to the database. The listener connects to Redis in its
+    own thread, so start() never blocks application startup.
+    """
+
+    REDIS_KEY_PREFIX = "principal:"
+    INVALIDATION_CHANNEL = "principal_invalidations"
+
+    def __init__(self):
+        self.ttl_seconds = settings.principal_cache_ttl_seconds
+        self.max_entries = settings.principal_cache_max_entries
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_service = None
+        self._listener_thread = None
+        self._stopping = threading.Event()
+        self._subscribed = threading.Event()
+
+    @property
+    def _redis(self):
+        if self._redis_service is None:
+            from services.container import get_container
+            self._redis_service = get_container().redis_service
+        return self._redis_service
+
+    @property
+    def listener_running(self) -> bool:
+        return self._listener_thread is not None and self._listener_thread.is_alive()
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        """Return the cached principal for an email, or None on a miss"""
+        if self.ttl_seconds <= 0:
+            return None
+
+        if self._subscribed.is_set():
+            with self._lock:
+                entry = self._local.get(email)
+                if entry is not None:
+                    expires_at, principal = entry
+                    if expires_at > time.monotonic():
+                        self._local.move_to_end(email)
+                        return principal
+                    del self._local[email]
+
+        cached = self._redis.get_key(f"{self.REDIS_KEY_PREFIX}{email}")
+        if cached is None:
+            return None
+
+        principal = json.loads(cached)
+        self._set_local(email, principal)
+        return principal
+
+    def set(self, email: str, principal: Dict[str, Any]) -> None:
+        """Cache a principal in Redis and locally"""
+        if self.ttl_seconds <= 0:
+            return
+        self._redis.set_key(f"{self.REDIS_KEY_PREFIX}{email}", json.dumps(principal), expire_seconds=self.ttl_seconds)
+        self._set_local(email, principal)
+
+    def invalidate(self, email: str) -> None:
+        """Drop a principal everywhere (call after changing a user's status or profile)"""
+        with self._lock:
+            self._local.pop(email, None)
+
+        self._redis.delete_key(f"{self.REDIS_KEY_PREFIX}{email}")
+        if self._redis.is_connected():
+            try:
+                self._redis.redis_client.publish(self.INVALIDATION_CHANNEL, email)
+            except Exception as e:
+                logger.error(f"Error publishing principal invalidation for {email}: {e}")
+
+    def start(self) -> None:
+        """Start listening for invalidations from other processes"""
+        if self.ttl_seconds <= 0 or self.listener_running:
+            return
+
+        self._stopping.clear()
+        self._listener_thread = threading.Thread(target=self._listen, name="principal-cache-invalidation", daemon=True)
+        self._listener_thread.start()
+        logger.info(f"Principal cache started (TTL {self.ttl_seconds}s, max {self.max_entries} local entries)")
+
+    def stop(self) -> None:
+        """Stop the invalidation listener and clear the local cache"""
+        self._stopping.set()
+        if self._listener_thread is not None:
+            self._listener_thread.join(timeout=5)
+            self._listener_thread = None
+        self._subscribed.clear()
+        with self._lock:
+            self._local.clear()
+
+    def _set_local(self, email: str, principal: Dict[str, Any]) -> None:
+        if not self._subscribed.is_set():
+            return
+        with self._lock:
+            self._local[email] = (time.monotonic() + self.ttl_seconds, principal)
+            self._local.move_to_end(email)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _listen(self) -> None:
+        if self._redis.redis_client is None:
+            logger.warning("Redis not connected, principal cache limited to the database")
+            return
+
+        while not self._stopping.is_set():
+            pubsub = None
+            try:
+                pubsub = self._redis.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                self._subscribed.set()
+                while not self._stopping.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        with self._lock:
+                            self._local.pop(message["data"], None)
+            except Exception as e:
+                # Anything cached locally may have missed an invalidation
+                logger.error(f"Principal cache invalidation listener error: {e}")
+                self._subscribed.clear()
+                with self._lock:
+                    self._local.clear()
+                self._stopping.wait(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+
+# Global instance, started and stopped by the application lifespan
+principal_cache = PrincipalCache()
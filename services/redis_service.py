@@ -2,15 +2,25 @@ import redis
 import logging
 from typing import Optional
 from config import settings
+from services.request_timing import timed
 
 logger = logging.getLogger(__name__)
 
+
+class TimedRedis(redis.Redis):
+    """Redis client that counts each command towards the current request's Server-Timing"""
+
+    def execute_command(self, *args, **options):
+        with timed("redis"):
+            return super().execute_command(*args, **options)
+
+
 class RedisService:
     """Service class for Redis operations"""
     
     def __init__(self):
         try:
-            self.redis_client = redis.Redis.from_url(
+            self.redis_client = TimedRedis.from_url(
                 settings.redis_url,
                 max_connections=settings.redis_max_connections,
                 socket_connect_timeout=settings.redis_socket_connect_timeout,
@@ -191,6 +201,139 @@ class RedisService:
         logger.info(f"Task progress update result for {task_id}: {result}")
         return result
     
+    def record_group_result(self, task_id: str, index: int, result: Optional[str], expire_seconds: int = 3600) -> Optional[tuple]:
+        """
+        Store the result of one document in a group and return (is_new, reported_count).
+
+        Results are kept in a hash keyed by document index, so a redelivered task
+        overwrites its own slot instead of being counted twice.
+        """
+        if not self.is_connected():
+            logger.warning("Redis not connected, cannot record group result")
+            return None
+
+        try:
+            import json
+            results_key = f"group_results:{task_id}"
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.hset(results_key, str(index), json.dumps(result))
+            pipe.hlen(results_key)
+            pipe.expire(results_key, expire_seconds)
+            is_new, reported_count, _ = pipe.execute()
+            return bool(is_new), reported_count
+        except Exception as e:
+            logger.error(f"Error recording group result in Redis: {e}")
+            return None
+
+    def get_group_results(self, task_id: str) -> dict:
+        """Get all recorded document results for a group, keyed by document index"""
+        if not self.is_connected():
+            logger.warning("Redis not connected, cannot get group results")
+            return {}
+
+        try:
+            import json
+            results = self.redis_client.hgetall(f"group_results:{task_id}")
+            return {int(index): json.loads(value) for index, value in results.items()}
+        except Exception as e:
+            logger.error(f"Error getting group results from Redis: {e}")
+            return {}
+
+    def get_group_reported_count(self, task_id: str) -> int:
+        """Get how many documents of a group have reported a result"""
+        if not self.is_connected():
+            return 0
+
+        try:
+            return self.redis_client.hlen(f"group_results:{task_id}")
+        except Exception as e:
+            logger.error(f"Error getting group result count from Redis: {e}")
+            return 0
+
+    def delete_group_results(self, task_id: str) -> bool:
+        """Delete the recorded document results for a group"""
+        if not self.is_connected():
+            logger.warning("Redis not connected, cannot delete group results")
+            return False
+
+        try:
+            return self.redis_client.delete(f"group_results:{task_id}") > 0
+        except Exception as e:
+            logger.error(f"Error deleting group results from Redis: {e}")
+            return False
+
+    def get_ocr_pages(self, group_id: str, fingerprints: list) -> dict:
+        """Get the OCR markdown cached for pages of a document group, keyed by page fingerprint"""
+        if not self.is_connected() or not fingerprints:
+            return {}
+
+        try:
+            values = self.redis_client.mget([f"ocr_page_cache:{group_id}:{fingerprint}" for fingerprint in fingerprints])
+            return {fingerprint: value for fingerprint, value in zip(fingerprints, values) if value is not None}
+        except Exception as e:
+            logger.error(f"Error getting cached OCR pages from Redis: {e}")
+            return {}
+
+    def store_ocr_pages(self, group_id: str, pages: dict, expire_seconds: int = 3600) -> bool:
+        """Cache OCR markdown for pages of a document group, keyed by page fingerprint"""
+        if not self.is_connected() or not pages:
+            return False
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for fingerprint, markdown in pages.items():
+                pipe.setex(f"ocr_page_cache:{group_id}:{fingerprint}", expire_seconds, markdown)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Error caching OCR pages in Redis: {e}")
+            return False
+
+    def claim_ocr_pages(self, group_id: str, fingerprints: list, token: str, expire_seconds: int) -> list:
+        """
+        Claim pages of a document group for OCR, so concurrent documents sharing a page OCR it once.
+
+        Returns:
+            The fingerprints this call claimed; all of them when Redis is unavailable
+        """
+        if not self.is_connected() or not fingerprints:
+            return list(fingerprints)
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for fingerprint in fingerprints:
+                pipe.set(f"ocr_page_claim:{group_id}:{fingerprint}", token, nx=True, ex=expire_seconds)
+            return [fingerprint for fingerprint, claimed in zip(fingerprints, pipe.execute()) if claimed]
+        except Exception as e:
+            logger.error(f"Error claiming OCR pages in Redis: {e}")
+            return list(fingerprints)
+
+    def get_ocr_page_claims(self, group_id: str, fingerprints: list) -> set:
+        """Fingerprints of a document group that are still claimed for OCR"""
+        if not self.is_connected() or not fingerprints:
+            return set()
+
+        try:
+            values = self.redis_client.mget([f"ocr_page_claim:{group_id}:{fingerprint}" for fingerprint in fingerprints])
+            return {fingerprint for fingerprint, value in zip(fingerprints, values) if value is not None}
+        except Exception as e:
+            logger.error(f"Error getting OCR page claims from Redis: {e}")
+            return set()
+
+    def release_ocr_page_claims(self, group_id: str, fingerprints: list, token: str) -> None:
+        """Drop this caller's OCR page claims (after its OCR failed) so waiting documents stop waiting"""
+        if not self.is_connected() or not fingerprints:
+            return
+
+        try:
+            release = self.redis_client.register_script(
+                "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+            )
+            for fingerprint in fingerprints:
+                release(keys=[f"ocr_page_claim:{group_id}:{fingerprint}"], args=[token])
+        except Exception as e:
+            logger.error(f"Error releasing OCR page claims in Redis: {e}")
+
     def delete_task_status(self, task_id: str) -> bool:
         """Delete task status from Redis"""
         if not self.is_connected():
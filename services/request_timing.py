@@ -0,0 +1,172 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, UTC
+from typing import Dict, List, Optional, Tuple
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Breakdown categories reported in the Server-Timing header, in header order
+TIMING_CATEGORIES = ("auth", "db", "redis", "s3", "render")
+
+# Histogram upper bounds in seconds for API request latency
+REQUEST_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REQUEST_METRIC_NAME = "parachute_http_request_duration_seconds"
+
+# Per-request {category: [seconds, count]}; None outside of an HTTP request (e.g. in Celery)
+_request_timings: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("request_timings", default=None)
+
+
+def record_timing(category: str, seconds: float) -> None:
+    """Add time spent in a category to the current request's breakdown"""
+    timings = _request_timings.get()
+    if timings is None:
+        return
+    entry = timings.setdefault(category, [0.0, 0])
+    entry[0] += seconds
+    entry[1] += 1
+
+
+@contextmanager
+def timed(category: str):
+    """Time a block towards the current request's breakdown"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(category, time.perf_counter() - started)
+
+
+class RequestMetrics:
+    """In-process per-route latency histograms and a ring buffer of slow requests"""
+
+    def __init__(self, buckets: Tuple[float, ...] = REQUEST_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, str], Dict[str, float]] = {}
+        self.slow_requests = deque(maxlen=settings.slow_request_log_size)
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        key = (method, route, f"{status_code // 100}xx")
+        with self._lock:
+            values = self._series.setdefault(key, {"count": 0, "sum": 0.0})
+            values["count"] += 1
+            values["sum"] += seconds
+            for bound in self.buckets:
+                if seconds <= bound:
+                    values[bound] = values.get(bound, 0) + 1
+
+    def record_slow_request(self, method: str, route: str, path: str, status_code: int, seconds: float, timings: Dict[str, List[float]]) -> None:
+        breakdown = {category: round(value[0] * 1000, 1) for category, value in timings.items()}
+        self.slow_requests.append({
+            "timestamp": datetime.now(UTC).isoformat(),
+            "method": method,
+            "route": route,
+            "path": path,
+            "status_code": status_code,
+            "duration_ms": round(seconds * 1000, 1),
+            "breakdown_ms": breakdown
+        })
+        logger.warning(f"Slow request {method} {path} ({status_code}) took {seconds:.2f}s: {breakdown}")
+
+    def render_prometheus(self) -> str:
+        """Route latency histograms in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {REQUEST_METRIC_NAME} HTTP request latency by route",
+            f"# TYPE {REQUEST_METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            series = {key: dict(values) for key, values in self._series.items()}
+        for (method, route, status_class), values in sorted(series.items()):
+            labels = f'method="{method}",route="{route}",status="{status_class}"'
+            for bound in self.buckets:
+                lines.append(f'{REQUEST_METRIC_NAME}_bucket{{{labels},le="{bound}"}} {int(values.get(bound, 0))}')
+            lines.append(f'{REQUEST_METRIC_NAME}_bucket{{{labels},le="+Inf"}} {int(values["count"])}')
+            lines.append(f"{REQUEST_METRIC_NAME}_sum{{{labels}}} {values['sum']}")
+            lines.append(f"{REQUEST_METRIC_NAME}_count{{{labels}}} {int(values['count'])}")
+        return "\n".join(lines) + "\n"
+
+
+def route_template(scope) -> str:
+    """Route path template (e.g. /agent/stream-status/{task_id}) to keep label cardinality bounded"""
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+
+    from starlette.routing import Match
+    app = scope.get("app")
+    for candidate in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return getattr(candidate, "path", scope["path"])
+    return "unmatched"
+
+
+def _server_timing_header(timings: Dict[str, List[float]], total_seconds: float) -> str:
+    entries = []
+    for category in TIMING_CATEGORIES:
+        if category in timings:
+            seconds, count = timings[category]
+            entries.append(f'{category};dur={seconds * 1000:.1f};desc="{int(count)} calls"')
+    entries.append(f"app;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that times every HTTP request.
+
+    Adds a Server-Timing header breaking the request into auth, db, redis, s3 and render time
+    (summed across calls, so concurrent calls can exceed the total; auth includes its own db
+    and redis lookups), feeds the per-route latency histograms and logs slow requests.
+    Pure ASGI rather than BaseHTTPMiddleware so streaming responses are not buffered.
+    """
+
+    def __init__(self, app, metrics: Optional[RequestMetrics] = None):
+        self.app = app
+        self.metrics = metrics or request_metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.request_timing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, List[float]] = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+        response_seconds = None
+
+        async def send_with_timing(message):
+            nonlocal status_code, response_seconds
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_seconds = time.perf_counter() - started
+                header = _server_timing_header(timings, response_seconds)
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", header.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # Time to response start, so streaming responses (SSE) are not counted for their whole lifetime
+            elapsed = response_seconds if response_seconds is not None else time.perf_counter() - started
+            try:
+                method = scope["method"]
+                route = route_template(scope)
+                self.metrics.observe(method, route, status_code, elapsed)
+                threshold = settings.slow_request_route_thresholds.get(route, settings.slow_request_threshold_seconds)
+                if elapsed >= threshold:
+                    self.metrics.record_slow_request(method, route, scope["path"], status_code, elapsed, timings)
+            except Exception as e:
+                logger.error(f"Error recording request timing: {e}")
+
+
+# Global instance
+request_metrics = RequestMetrics()
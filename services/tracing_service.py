@@ -0,0 +1,259 @@
+import json
+import time
+import uuid
+import inspect
+import logging
+import functools
+import importlib
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+from config import settings
+from services.request_timing import route_template
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+
+# Redis key holding the traceparent of a document group's upload request
+GROUP_TRACE_KEY_PREFIX = "trace:group:"
+GROUP_TRACE_TTL_SECONDS = 7 * 24 * 3600
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent span_id) from a W3C traceparent header, or None if absent or malformed"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2]
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.error = None
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def finish(self) -> None:
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+class LogSpanExporter:
+    """Writes each finished span to the application log"""
+
+    def export(self, span: Span) -> None:
+        logger.info(f"span {json.dumps(span.to_dict(), default=str)}")
+
+
+class JsonlSpanExporter:
+    """Appends each finished span as one JSON line to a local file, for offline analysis"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.tracing_jsonl_path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+def _build_exporter(name: str):
+    """Exporter for the tracing_exporter setting: none, log, jsonl or a "module:Class" path"""
+    if name in ("", "none"):
+        return None
+    if name == "log":
+        return LogSpanExporter()
+    if name == "jsonl":
+        return JsonlSpanExporter()
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class Tracer:
+    """
+    Minimal tracer with W3C traceparent propagation.
+
+    The current span lives in a context variable, so spans nest across awaits and
+    asyncio.to_thread calls. Celery tasks continue the publisher's trace through a
+    traceparent message header (see services.celery_service). Disabled when
+    tracing_exporter is "none".
+    """
+
+    def __init__(self):
+        self._exporter = None
+        self._exporter_loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def exporter(self):
+        if not self._exporter_loaded:
+            with self._lock:
+                if not self._exporter_loaded:
+                    try:
+                        self._exporter = _build_exporter(settings.tracing_exporter)
+                    except Exception as e:
+                        logger.error(f"Could not load span exporter {settings.tracing_exporter!r}, tracing disabled: {e}")
+                    self._exporter_loaded = True
+        return self._exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None, traceparent: Optional[str] = None) -> Optional[Span]:
+        """Start a span under traceparent if given, else under the current span; None when disabled"""
+        if not self.enabled:
+            return None
+        remote = parse_traceparent(traceparent)
+        if remote is not None:
+            trace_id, parent_id = remote
+        else:
+            parent = _current_span.get()
+            trace_id, parent_id = (parent.trace_id, parent.span_id) if parent else (uuid.uuid4().hex, None)
+        return Span(name, trace_id, parent_id, attributes)
+
+    def end_span(self, span: Optional[Span]) -> None:
+        if span is None:
+            return
+        span.finish()
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.error(f"Error exporting span {span.name}: {e}")
+
+    @contextmanager
+    def span(self, name: str, attributes: Optional[Dict[str, Any]] = None, traceparent: Optional[str] = None):
+        """Run a block in a new span that becomes the current span"""
+        span = self.start_span(name, attributes, traceparent)
+        if span is None:
+            yield None
+            return
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+    def activate(self, span: Optional[Span]):
+        """Make span current outside of a with block; returns a token for deactivate()"""
+        return _current_span.set(span) if span is not None else None
+
+    def deactivate(self, token) -> None:
+        if token is not None:
+            _current_span.reset(token)
+
+    def current_traceparent(self) -> Optional[str]:
+        span = _current_span.get()
+        return span.traceparent if span else None
+
+
+def traced(name: str):
+    """Decorator running a function (sync or async) in a span"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def store_group_traceparent(redis_service, group_id: str) -> None:
+    """Remember the trace of a group's upload so later requests on the group can join it"""
+    traceparent = tracer.current_traceparent()
+    if traceparent:
+        redis_service.set_key(f"{GROUP_TRACE_KEY_PREFIX}{group_id}", traceparent, expire_seconds=GROUP_TRACE_TTL_SECONDS)
+
+
+def get_group_traceparent(redis_service, group_id: str) -> Optional[str]:
+    if not tracer.enabled:
+        return None
+    return redis_service.get_key(f"{GROUP_TRACE_KEY_PREFIX}{group_id}")
+
+
+class TracingMiddleware:
+    """ASGI middleware that runs every HTTP request in a span, continuing an incoming traceparent"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                incoming = value.decode("latin-1")
+                break
+
+        with tracer.span(f"HTTP {scope['method']} {scope['path']}", {"http.method": scope["method"], "http.path": scope["path"]}, incoming) as span:
+            async def send_with_traceparent(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"traceparent", span.traceparent.encode())]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_traceparent)
+
+            route = route_template(scope)
+            span.name = f"HTTP {scope['method']} {route}"
+            span.set_attribute("http.route", route)
+
+
+# Global instance
+tracer = Tracer()
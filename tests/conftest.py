@@ -0,0 +1,145 @@
+import pytest
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis-py client commands the services use (decode_responses=True)"""
+
+    def __init__(self):
+        self.values = {}
+        self.lists = {}
+        self.hashes = {}
+        self.published = []
+
+    def ping(self):
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = str(value)
+        return True
+
+    def setex(self, key, seconds, value):
+        self.values[key] = str(value)
+        return True
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1)
+        return int(self.values[key])
+
+    def expire(self, key, seconds):
+        return True
+
+    def delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            for store in (self.values, self.lists, self.hashes):
+                if store.pop(key, None) is not None:
+                    deleted += 1
+        return deleted
+
+    def lpush(self, key, *values):
+        items = self.lists.setdefault(key, [])
+        for value in values:
+            items.insert(0, value)
+        return len(items)
+
+    def rpush(self, key, *values):
+        items = self.lists.setdefault(key, [])
+        items.extend(values)
+        return len(items)
+
+    def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def rpoplpush(self, source, destination):
+        items = self.lists.get(source)
+        if not items:
+            return None
+        value = items.pop()
+        if not items:
+            del self.lists[source]
+        self.lpush(destination, value)
+        return value
+
+    def lrem(self, key, count, value):
+        items = self.lists.get(key, [])
+        removed = 0
+        while value in items and (count == 0 or removed < count):
+            items.remove(value)
+            removed += 1
+        if key in self.lists and not items:
+            del self.lists[key]
+        return removed
+
+    def hset(self, key, field, value):
+        fields = self.hashes.setdefault(key, {})
+        is_new = field not in fields
+        fields[field] = value
+        return int(is_new)
+
+    def hlen(self, key):
+        return len(self.hashes.get(key, {}))
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def eval(self, script, numkeys, *keys_and_args):
+        # Only the compare-and-delete lock release scripts are used
+        key, token = keys_and_args[0], keys_and_args[1]
+        if self.values.get(key) == token:
+            del self.values[key]
+            return 1
+        return 0
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them against the FakeRedis on execute()"""
+
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        commands, self._commands = self._commands, []
+        return [method(*args, **kwargs) for method, args, kwargs in commands]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def redis_service(fake_redis):
+    """A RedisService whose client is the fake, without the connection made by __init__"""
+    from services.redis_service import RedisService
+    service = RedisService.__new__(RedisService)
+    service.redis_client = fake_redis
+    return service
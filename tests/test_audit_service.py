@@ -0,0 +1,93 @@
+import json
+import pytest
+from sqlalchemy.exc import DataError, OperationalError
+from config import settings
+from services.audit_service import AuditLogWriter
+
+
+@pytest.fixture
+def writer(fake_redis):
+    writer = AuditLogWriter()
+    writer.backend = "redis"
+    writer._redis_client = fake_redis
+    writer.inserted = []
+    writer._insert = writer.inserted.extend
+    return writer
+
+
+def _push(fake_redis, *categories):
+    for category in categories:
+        fake_redis.lpush(AuditLogWriter.PENDING_KEY, json.dumps({"category": category, "created_at": "2025-01-01T00:00:00"}))
+
+
+def _fail_with(writer, error):
+    def insert(events):
+        raise error
+    writer._insert = insert
+
+
+def test_flush_writes_batch_and_clears_processing(writer, fake_redis):
+    _push(fake_redis, "login", "logout")
+
+    assert writer.flush() == 2
+    assert [event["category"] for event in writer.inserted] == ["login", "logout"]
+    assert fake_redis.llen(AuditLogWriter.PROCESSING_KEY) == 0
+    assert AuditLogWriter.FLUSH_LOCK_KEY not in fake_redis.values
+
+
+def test_connection_errors_keep_the_batch_without_counting_attempts(writer, fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "audit_log_max_flush_attempts", 2)
+    _push(fake_redis, "login")
+    _fail_with(writer, OperationalError("INSERT", {}, Exception("connection refused")))
+
+    for _ in range(5):
+        with pytest.raises(OperationalError):
+            writer.flush()
+
+    assert fake_redis.llen(AuditLogWriter.PROCESSING_KEY) == 1
+    assert fake_redis.llen(AuditLogWriter.DEAD_LETTER_KEY) == 0
+    assert AuditLogWriter.ATTEMPTS_KEY not in fake_redis.values
+
+    # The batch is written once the database is back
+    writer._insert = writer.inserted.extend
+    assert writer.flush() == 1
+    assert fake_redis.llen(AuditLogWriter.PROCESSING_KEY) == 0
+
+
+def test_rejected_batch_is_dead_lettered_and_replayed(writer, fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "audit_log_max_flush_attempts", 2)
+    _push(fake_redis, "login", "logout")
+    _fail_with(writer, DataError("INSERT", {}, Exception("value too long")))
+
+    with pytest.raises(DataError):
+        writer.flush()
+    assert fake_redis.llen(AuditLogWriter.PROCESSING_KEY) == 2
+
+    assert writer.flush() == 0
+    assert fake_redis.llen(AuditLogWriter.PROCESSING_KEY) == 0
+    assert fake_redis.llen(AuditLogWriter.DEAD_LETTER_KEY) == 2
+    assert AuditLogWriter.ATTEMPTS_KEY not in fake_redis.values
+
+    assert writer.replay_dead_letters() == 2
+    assert fake_redis.llen(AuditLogWriter.DEAD_LETTER_KEY) == 0
+    writer._insert = writer.inserted.extend
+    assert writer.flush() == 2
+
+
+def test_undecodable_events_are_dead_lettered_immediately(writer, fake_redis):
+    _push(fake_redis, "login")
+    fake_redis.lpush(AuditLogWriter.PENDING_KEY, "not json")
+
+    assert writer.flush() == 1
+    assert [event["category"] for event in writer.inserted] == ["login"]
+    assert fake_redis.lrange(AuditLogWriter.DEAD_LETTER_KEY, 0, -1) == ["not json"]
+    assert fake_redis.llen(AuditLogWriter.PROCESSING_KEY) == 0
+
+
+def test_flush_leaves_a_lock_held_by_another_process(writer, fake_redis):
+    _push(fake_redis, "login")
+    fake_redis.set(AuditLogWriter.FLUSH_LOCK_KEY, "other-process")
+
+    assert writer.flush() == 0
+    assert fake_redis.get(AuditLogWriter.FLUSH_LOCK_KEY) == "other-process"
+    assert writer.inserted == []
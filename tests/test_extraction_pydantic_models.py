@@ -0,0 +1,48 @@
+from models.pydantic_models.extraction_pydantic_models import (
+    MEDICAL_DOC_SECTION_MODELS,
+    ConfidenceField,
+    MedicalDocumentExtraction,
+    section_response_model,
+    strict_json_schema
+)
+
+
+def _schema_nodes(node):
+    if isinstance(node, dict):
+        yield node
+        for child in node.values():
+            yield from _schema_nodes(child)
+    elif isinstance(node, list):
+        for child in node:
+            yield from _schema_nodes(child)
+
+
+def test_integer_values_round_trip_as_integers():
+    field = ConfidenceField.model_validate({"value": 30, "confidence": 0.9}).model_dump()
+    assert field["value"] == 30 and isinstance(field["value"], int)
+
+    document = MedicalDocumentExtraction.model_validate(
+        {"patient_information": {"address": {"zip": {"value": 77079, "confidence": 0.9}}}}
+    ).model_dump()
+    zip_value = document["patient_information"]["address"]["zip"]["value"]
+    assert zip_value == 77079 and isinstance(zip_value, int)
+
+
+def test_other_value_types_are_kept():
+    for value in (True, False, 12.5, "30", None):
+        assert ConfidenceField.model_validate({"value": value}).model_dump()["value"] == value
+    assert ConfidenceField.model_validate({"value": True}).model_dump()["value"] is True
+
+
+def test_strict_schemas_are_inlined_and_fully_required():
+    models = [MedicalDocumentExtraction]
+    for section, model in MEDICAL_DOC_SECTION_MODELS.items():
+        models += [model, section_response_model(section)]
+
+    for model in models:
+        for node in _schema_nodes(strict_json_schema(model)):
+            for keyword in ("allOf", "$ref", "$defs", "default"):
+                assert keyword not in node, f"{model.__name__} schema has {keyword}"
+            if isinstance(node.get("properties"), dict):
+                assert node["required"] == list(node["properties"]), f"{model.__name__} schema misses required keys"
+                assert node["additionalProperties"] is False
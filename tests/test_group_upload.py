@@ -0,0 +1,116 @@
+import io
+import json
+import asyncio
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from routers import agent
+from services import celery_service
+from services.db_service import DatabaseService
+
+
+class RecordingTask:
+    """Stands in for a Celery task; records apply_async calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    def apply_async(self, args=None, task_id=None):
+        self.calls.append((args, task_id))
+        return SimpleNamespace(id=task_id)
+
+
+class FakeSession:
+    def __init__(self):
+        self.rows = []
+
+    def add_all(self, rows):
+        self.rows.extend(rows)
+
+    def flush(self):
+        for number, row in enumerate(self.rows, start=1):
+            row.id = number
+
+    def commit(self):
+        pass
+
+
+class FakeFileHandler:
+    def __init__(self, failing):
+        self.failing = set(failing)
+
+    def save_pdf_to_s3(self, file, file_id):
+        if file.filename in self.failing:
+            return {"success": False}
+        return {"success": True, "s3_key": f"medical_pdf_uploads/{file_id}.pdf"}
+
+
+def _upload(filename):
+    return SimpleNamespace(filename=filename, content_type="application/pdf", file=io.BytesIO(b"%PDF-1.4"))
+
+
+@pytest.fixture
+def merge_task(monkeypatch):
+    task = RecordingTask()
+    monkeypatch.setattr(celery_service, "merge_group_results_task", task)
+    return task
+
+
+@pytest.fixture
+def upload_endpoint(monkeypatch, redis_service):
+    """analyze_medical_doc with Celery, the barrier and the audit log replaced by recorders"""
+    recorded = SimpleNamespace(process=RecordingTask(), barrier=[])
+    monkeypatch.setattr(agent, "process_document_task", recorded.process)
+    monkeypatch.setattr(agent, "record_group_document_result", lambda *args: recorded.barrier.append(args))
+    monkeypatch.setattr(agent, "store_group_traceparent", lambda *args: None)
+    monkeypatch.setattr(DatabaseService, "create_audit_log", staticmethod(lambda **kwargs: None))
+
+    def call(filenames, failing):
+        return asyncio.run(agent.analyze_medical_doc(
+            files=[_upload(filename) for filename in filenames],
+            current_user=SimpleNamespace(id=1, email="staff@example.com"),
+            db=FakeSession(),
+            file_handler=FakeFileHandler(failing),
+            redis_service=redis_service,
+            request=None
+        ))
+
+    recorded.call = call
+    return recorded
+
+
+def test_barrier_merges_once_when_failed_documents_report(redis_service, merge_task):
+    results = [json.dumps({"patient_information": {}}), None, json.dumps({"meta": {}})]
+
+    completed = [
+        celery_service.record_group_document_result("task-1", "group-1", 1, index, 3, result, redis_service)
+        for index, result in enumerate(results)
+    ]
+    assert completed == [False, False, True]
+    assert merge_task.calls == [(["task-1", "group-1", 1, 3], "task-1_merge")]
+
+    # A redelivered document task fills its own slot again and does not queue a second merge
+    assert not celery_service.record_group_document_result("task-1", "group-1", 1, 2, 3, results[2], redis_service)
+    assert len(merge_task.calls) == 1
+    assert redis_service.get_group_results("task-1")[1] is None
+
+
+def test_partial_upload_failure_returns_task_and_failed_files(upload_endpoint):
+    response = upload_endpoint.call(["a.pdf", "b.pdf"], failing=["b.pdf"])
+
+    assert response["task_id"] and response["stream_url"].endswith(response["task_id"])
+    assert [failed["original_filename"] for failed in response["failed_files"]] == ["b.pdf"]
+    assert len(upload_endpoint.process.calls) == 1
+    # The failed document reports to the barrier so the queued one can still be merged
+    assert [(args[3], args[4], args[5]) for args in upload_endpoint.barrier] == [(1, 2, None)]
+
+
+def test_total_upload_failure_skips_the_barrier(upload_endpoint, redis_service):
+    with pytest.raises(HTTPException) as error:
+        upload_endpoint.call(["a.pdf", "b.pdf"], failing=["a.pdf", "b.pdf"])
+
+    assert error.value.status_code == 500
+    assert upload_endpoint.process.calls == []
+    assert upload_endpoint.barrier == []
+    statuses = [json.loads(value) for key, value in redis_service.redis_client.values.items() if key.startswith("task_status:")]
+    assert [status["stage"] for status in statuses] == ["failed"]
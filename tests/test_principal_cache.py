@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from routers import admin
+from services.db_service import DatabaseService
+from services.principal_cache import PrincipalCache
+
+EMAIL = "staff@example.com"
+PRINCIPAL = {"id": 7, "email": EMAIL, "is_active": True, "is_admin": False}
+
+
+@pytest.fixture
+def cache(redis_service):
+    cache = PrincipalCache()
+    cache.ttl_seconds = 60
+    cache._redis_service = redis_service
+    # As if the invalidation listener were subscribed, so the local layer is in use
+    cache._subscribed.set()
+    return cache
+
+
+class FakeQuery:
+    def __init__(self, user):
+        self.user = user
+
+    def filter(self, *conditions):
+        return self
+
+    def first(self):
+        return self.user
+
+
+class FakeSession:
+    def __init__(self, user):
+        self.user = user
+
+    def query(self, model):
+        return FakeQuery(self.user)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_invalidate_drops_local_and_redis_copies_and_notifies(cache, fake_redis):
+    cache.set(EMAIL, PRINCIPAL)
+    assert cache.get(EMAIL) == PRINCIPAL
+
+    cache.invalidate(EMAIL)
+
+    assert EMAIL not in cache._local
+    assert f"{PrincipalCache.REDIS_KEY_PREFIX}{EMAIL}" not in fake_redis.values
+    assert fake_redis.published == [(PrincipalCache.INVALIDATION_CHANNEL, EMAIL)]
+    assert cache.get(EMAIL) is None
+
+
+def test_local_layer_is_unused_until_subscribed(cache, fake_redis):
+    cache._subscribed.clear()
+    cache.set(EMAIL, PRINCIPAL)
+    assert cache._local == {}
+
+    # Without the listener another process's invalidation only reaches Redis, which is honoured
+    fake_redis.delete(f"{PrincipalCache.REDIS_KEY_PREFIX}{EMAIL}")
+    assert cache.get(EMAIL) is None
+
+
+def test_deactivating_a_user_invalidates_their_principal(cache, monkeypatch):
+    monkeypatch.setattr(admin, "principal_cache", cache)
+    monkeypatch.setattr(DatabaseService, "create_audit_log", staticmethod(lambda **kwargs: None))
+    cache.set(EMAIL, PRINCIPAL)
+    user = SimpleNamespace(id=7, email=EMAIL, is_admin=False, is_active=True, updated_at=None)
+
+    response = asyncio.run(admin.deactivate_user(
+        request_data=SimpleNamespace(user_id=7),
+        request=None,
+        current_user=SimpleNamespace(id=1, email="admin@example.com"),
+        db=FakeSession(user)
+    ))
+
+    assert response.is_active is False
+    assert user.is_active is False
+    assert cache.get(EMAIL) is None